@@ -0,0 +1,104 @@
+"""
+Benchmark the jobs write path against a local Postgres.
+
+Compares the legacy per-row SELECT + INSERT loop with the COPY + ON CONFLICT
+bulk upsert and prints rows/sec for each batch size. Everything runs in a
+throw-away schema so the real jobs table is never touched.
+
+    python -m benchmarks.bench_db_write --dsn "dbname=postgres host=localhost user=postgres"
+"""
+import argparse
+import random
+import time
+import psycopg2
+from utils.db import JOB_COLUMNS, migrate_schema, bulk_upsert_jobs, build_job_rows
+
+SCHEMA = "bench_db_write"
+
+
+def make_jobs(count, offset=0):
+    jobs = []
+    for i in range(offset, offset + count):
+        jobs.append({
+            'offer_id': str(i),
+            'title': f"Python Developer {i}",
+            'company': f"Company {i % 500}",
+            'location': random.choice(["Warszawa", "Kraków", "Wrocław", "Gdańsk"]),
+            'salary': f"{10000 + i % 5000} - {15000 + i % 5000} zł",
+            'url': f"https://example.com/offers/{i}",
+            'short_description': "Tab\tseparated \\ text with \"quotes\"\nand newlines",
+            'published': "2025-01-01",
+            'job_type': "Full-time",
+            'contract_type': "B2B",
+            'technologies': ["Python", "PostgreSQL", "Docker", "a \"quoted\" {tech}"],
+            'scraped_at': "2025-01-01 08:00:00",
+        })
+    return jobs
+
+
+def legacy_save(connection, rows):
+    """The pre-bulk write path: one SELECT and one INSERT round trip per job"""
+    cursor = connection.cursor()
+    placeholders = ', '.join(['%s'] * len(JOB_COLUMNS))
+    source_index = JOB_COLUMNS.index('source')
+    for row in rows:
+        job_id, source = row[0], row[source_index]
+        cursor.execute("SELECT id FROM jobs WHERE job_id = %s AND source = %s", (job_id, source))
+        if cursor.fetchone() is None:
+            cursor.execute(f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({placeholders})", row)
+    connection.commit()
+    cursor.close()
+
+
+def reset_schema(connection):
+    cursor = connection.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA};")
+    connection.commit()
+    cursor.close()
+    migrate_schema(connection)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark jobs table write paths')
+    parser.add_argument('--dsn', default="dbname=postgres host=localhost user=postgres")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='Skip the legacy path above this many rows (it is very slow)')
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(args.dsn)
+    try:
+        print(f"{'rows':>8} {'path':>8} {'fresh rows/s':>14} {'re-run rows/s':>14}")
+        for size in args.sizes:
+            rows = build_job_rows(make_jobs(size), 'second_page')
+
+            reset_schema(connection)
+            fresh = timed(bulk_upsert_jobs, connection, rows)
+            rerun = timed(bulk_upsert_jobs, connection, rows)
+            print(f"{size:>8} {'bulk':>8} {size / fresh:>14.0f} {size / rerun:>14.0f}")
+
+            if size <= args.legacy_max:
+                reset_schema(connection)
+                # The legacy loop predates partitioning, so give it the month make_jobs scrapes in
+                cursor = connection.cursor()
+                cursor.execute("CREATE TABLE jobs_2025_01 PARTITION OF jobs FOR VALUES FROM ('2025-01-01') TO ('2025-02-01')")
+                connection.commit()
+                cursor.close()
+                fresh = timed(legacy_save, connection, rows)
+                rerun = timed(legacy_save, connection, rows)
+                print(f"{size:>8} {'legacy':>8} {size / fresh:>14.0f} {size / rerun:>14.0f}")
+    finally:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Exercise the background DatabaseWriter against a local Postgres.
+
+A producer thread stands in for the scrapers: it builds job batches and
+sleeps --scrape-delay seconds per batch as if it were loading a page. The
+same workload is run with synchronous writes after every batch (the old
+behaviour) and with the writer draining batches in the background, and
+the wall time of each is printed. With --kill-every N the writer's
+connection is terminated from the server side every N seconds, to check
+that retries lose nothing. Everything runs in a throw-away schema.
+
+    python -m benchmarks.bench_db_writer --dsn "dbname=postgres host=localhost user=postgres" --kill-every 0.5
+"""
+import argparse
+import threading
+import time
+import psycopg2
+from benchmarks.bench_db_write import make_jobs
+from utils.db import build_job_rows, bulk_upsert_jobs, create_connection_pool, migrate_schema
+from utils.db_writer import DatabaseWriter
+
+SCHEMA = "bench_db_writer"
+APPLICATION_NAME = "bench_db_writer"
+
+
+def schema_dsn(dsn):
+    return f"{dsn} application_name={APPLICATION_NAME} options='-c search_path={SCHEMA}'"
+
+
+def reset_schema(dsn):
+    connection = psycopg2.connect(dsn)
+    cursor = connection.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    connection.commit()
+    connection.close()
+    connection = psycopg2.connect(schema_dsn(dsn))
+    migrate_schema(connection)
+    connection.close()
+
+
+def count_jobs(dsn):
+    connection = psycopg2.connect(schema_dsn(dsn))
+    cursor = connection.cursor()
+    cursor.execute("SELECT count(*) FROM jobs")
+    count = cursor.fetchone()[0]
+    connection.close()
+    return count
+
+
+def batches(rows, batch_size):
+    return [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+
+def run_synchronous(dsn, rows, batch_size, scrape_delay):
+    connection = psycopg2.connect(schema_dsn(dsn))
+    start = time.perf_counter()
+    for batch in batches(rows, batch_size):
+        time.sleep(scrape_delay)
+        bulk_upsert_jobs(connection, batch)
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return elapsed
+
+
+def kill_writer_connections(dsn, interval, stop):
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    killed = 0
+    while not stop.wait(interval):
+        cursor.execute("SELECT count(pg_terminate_backend(pid)) FROM pg_stat_activity "
+                       "WHERE application_name = %s AND pid <> pg_backend_pid()", (APPLICATION_NAME,))
+        killed += cursor.fetchone()[0]
+    connection.close()
+    return killed
+
+
+def run_background(dsn, rows, batch_size, scrape_delay, flush_rows, flush_interval, kill_every):
+    pool = create_connection_pool(max_connections=2, dsn=schema_dsn(dsn))
+    writer = DatabaseWriter(pool, flush_rows=flush_rows, flush_interval=flush_interval, retry_delay=0.1)
+    writer.start()
+
+    stop = threading.Event()
+    killer_result = {}
+    killer = None
+    if kill_every:
+        killer = threading.Thread(target=lambda: killer_result.update(killed=kill_writer_connections(dsn, kill_every, stop)))
+        killer.start()
+
+    start = time.perf_counter()
+    for batch in batches(rows, batch_size):
+        time.sleep(scrape_delay)
+        writer.submit(batch, 'second_page')
+    writer.close()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if killer:
+        killer.join()
+    pool.closeall()
+    return elapsed, writer, killer_result.get('killed', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the background database writer')
+    parser.add_argument('--dsn', default="dbname=postgres host=localhost user=postgres")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--scrape-delay', type=float, default=0.02,
+                        help='Seconds the producer spends per batch, standing in for page loads')
+    parser.add_argument('--flush-rows', type=int, default=1000)
+    parser.add_argument('--flush-interval', type=float, default=2.0)
+    parser.add_argument('--kill-every', type=float, default=0,
+                        help='Terminate the writer connection from the server every N seconds')
+    args = parser.parse_args()
+
+    rows = build_job_rows(make_jobs(args.rows), 'second_page')
+    try:
+        reset_schema(args.dsn)
+        elapsed = run_synchronous(args.dsn, rows, args.batch_size, args.scrape_delay)
+        print(f"{'synchronous':>12}: {elapsed:6.2f}s, {count_jobs(args.dsn)}/{args.rows} jobs stored")
+
+        reset_schema(args.dsn)
+        elapsed, writer, killed = run_background(args.dsn, rows, args.batch_size, args.scrape_delay,
+                                                 args.flush_rows, args.flush_interval, args.kill_every)
+        print(f"{'background':>12}: {elapsed:6.2f}s, {count_jobs(args.dsn)}/{args.rows} jobs stored, "
+              f"{writer.stats['flushes']} flushes, {writer.stats['retries']} retries, "
+              f"{killed} connections killed, {len(writer.errors)} failed flushes")
+    finally:
+        connection = psycopg2.connect(args.dsn)
+        cursor = connection.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
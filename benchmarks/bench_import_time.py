@@ -0,0 +1,75 @@
+"""
+Measure CLI startup: the import time of main under `python -X importtime`,
+the heaviest modules it pulls in and the wall time of `main.py --help`.
+Each measurement runs in a fresh interpreter; the median is reported.
+
+    python -m benchmarks.bench_import_time --repeat 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _run(args, cwd):
+    # The logger writes log.log to the working directory, so keep it out of the repo
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def measure_startup(module='main', repeat=5, top=10):
+    """Median import and --help times in milliseconds plus the slowest modules of the median run"""
+    cwd = tempfile.mkdtemp(prefix="bench_import_time_")
+    runs = []
+    for _ in range(repeat):
+        runs.append(parse_importtime(_run(['-X', 'importtime', '-c', f'import {module}'], cwd).stderr))
+    runs.sort(key=lambda modules: modules[module][1])
+    median_run = runs[len(runs) // 2]
+
+    help_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run([os.path.join(REPO_ROOT, f'{module}.py'), '--help'], cwd)
+        help_times.append(time.perf_counter() - start)
+
+    slowest = sorted(median_run.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'status': 'ok',
+        'import_ms': round(median_run[module][1] / 1000, 1),
+        'help_ms': round(statistics.median(help_times) * 1000, 1),
+        'modules_imported': len(median_run),
+        'slowest_modules_ms': {name: round(self_us / 1000, 1) for name, (self_us, _) in slowest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI import and --help time')
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = measure_startup(args.module, args.repeat)
+    print(f"import {args.module}: {result['import_ms']} ms ({result['modules_imported']} modules), "
+          f"--help: {result['help_ms']} ms")
+    for name, ms in result['slowest_modules_ms'].items():
+        print(f"  {ms:>7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the normalization stage on synthetic scrape batches.
+
+Compares the batch normalizer in utils.normalize with the per-row regex
+parsing it replaced, over the same salary, publish date and work mode
+strings, and prints rows/sec for each batch size. Batches are normalized
+the way the pipeline does it: one call per --batch-size rows.
+
+    python -m benchmarks.bench_normalize --rows 100000
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+from utils.db import build_job_rows
+from utils.normalize import normalize_jobs
+
+SALARIES = [
+    "{low} - {high} PLN", "{low} – {high} zł brutto / mies.", "{low} – {high} zł netto (+ VAT) / mies.",
+    "do {high} zł", "od {low} zł brutto", "{hour} zł/godz. netto", "{hour} €/h", "{low_k}-{high_k}k USD",
+    "{year} - {year_high} EUR brutto/Jahr", "N/A", "Undisclosed Salary",
+]
+PUBLISHED = [
+    "Opublikowana: {day} {month_pl} 2025", "2025-01-{day:02d}", "2025-01-{day:02d}T08:00:00.000Z",
+    "{day:02d}.03.2025", "dzisiaj", "wczoraj", "{day} dni temu", "{day} days ago", "vor {day} Tagen", "N/A",
+]
+MONTHS_PL = ["stycznia", "lutego", "marca", "kwietnia", "maja", "czerwca", "lipca", "sierpnia", "września",
+             "października", "listopada", "grudnia"]
+WORK_MODES = ["Praca zdalna", "Praca hybrydowa", "Praca stacjonarna", "Remote", "Hybrid", "Office", ""]
+
+
+def make_jobs(count, seed=1):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        low = rng.randrange(6000, 25000, 500)
+        jobs.append({
+            'offer_id': str(i),
+            'title': f"Python Developer {i}",
+            'company': f"Company {i % 500}",
+            'location': rng.choice(["Warszawa", "Kraków", "Wrocław", "Gdańsk"]),
+            'salary': rng.choice(SALARIES).format(
+                low=f"{low:,}".replace(',', ' '), high=f"{low + 5000:,}".replace(',', ' '),
+                hour=f"{rng.randrange(80, 250)},50", low_k=low // 1000, high_k=low // 1000 + 5,
+                year=f"{low * 5:,}".replace(',', '.'), year_high=f"{low * 6:,}".replace(',', '.')),
+            'published': rng.choice(PUBLISHED).format(day=rng.randrange(1, 28), month_pl=rng.choice(MONTHS_PL)),
+            'work_conditions': rng.choice(WORK_MODES),
+            'url': f"https://example.com/offers/{i}",
+            'scraped_at': "2025-03-10 08:00:00",
+        })
+    return jobs
+
+
+# The per-row parsing the batch normalizer replaced
+_CURRENCIES = ((re.compile(r'\bpln\b|zł|zl\b', re.IGNORECASE), 'PLN'), (re.compile(r'\beur\b|€', re.IGNORECASE), 'EUR'),
+               (re.compile(r'\busd\b|\$', re.IGNORECASE), 'USD'))
+_HOURLY = re.compile(r'/\s*h\b|\bgodz|\bhour|\bhr\b', re.IGNORECASE)
+_YEARLY = re.compile(r'\byear|\brok|\brocz|\bannual|/\s*y\b', re.IGNORECASE)
+_AMOUNT = re.compile(r'\d{1,3}(?:[ \u00a0\u202f,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?')
+
+
+def _to_number(amount):
+    amount = re.sub(r'[ \u00a0\u202f]', '', amount)
+    if re.fullmatch(r'\d+(,\d{3})+', amount):
+        amount = amount.replace(',', '')
+    return float(amount.replace(',', '.'))
+
+
+def per_row_normalize(salaries, published, work_modes):
+    rows = []
+    for salary, date_text, work_mode in zip(salaries, published, work_modes):
+        amounts = [_to_number(amount) for amount in _AMOUNT.findall(salary or '')]
+        currency = next((code for pattern, code in _CURRENCIES if pattern.search(salary)), None)
+        period = 'hour' if _HOURLY.search(salary) else 'year' if _YEARLY.search(salary) else 'month'
+        try:
+            published_date = datetime.strptime(date_text, '%Y-%m-%d').date()
+        except ValueError:
+            published_date = None
+        mode = work_mode.lower()
+        remote = 'hybrid' if 'hybr' in mode else 'remote' if 'zdaln' in mode or 'remote' in mode else None
+        rows.append((min(amounts[:2], default=None), max(amounts[:2], default=None), currency, period,
+                     published_date, remote))
+    return rows
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def in_batches(fn, jobs, batch_size):
+    for start in range(0, len(jobs), batch_size):
+        fn(jobs[start:start + batch_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark salary, date and work mode normalization')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[200, 1000, 100000])
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.rows)
+    salaries = [job['salary'] for job in jobs]
+    published = [job['published'] for job in jobs]
+    work_modes = [job['work_conditions'] for job in jobs]
+    scraped_at = [job['scraped_at'] for job in jobs]
+
+    elapsed, rows = timed(per_row_normalize, salaries, published, work_modes)
+    print(f"{'per-row':>20} {args.rows / elapsed:>12.0f} rows/s  "
+          f"({sum(row[4] is not None for row in rows) / args.rows:.0%} dates parsed)")
+    elapsed, columns = timed(normalize_jobs, salaries, published, (work_modes,), scraped_at)
+    print(f"{'batch, one call':>20} {args.rows / elapsed:>12.0f} rows/s  "
+          f"({sum(value is not None for value in columns['published_date']) / args.rows:.0%} dates parsed, "
+          f"{sum(value is not None for value in columns['salary_basis']) / args.rows:.0%} gross/net known)")
+
+    for batch_size in args.batch_sizes:
+        elapsed, _ = timed(in_batches, lambda batch: build_job_rows(batch, 'second_page'), jobs, batch_size)
+        print(f"{f'build_job_rows/{batch_size}':>20} {args.rows / elapsed:>12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Crawl the fixture server's Make it in Germany listing over HTTP while the
+server fails a share of requests with a 500, once without page retries and
+once with them, and print how many jobs came through, the retries it took
+and the pages still missing.
+
+    python -m benchmarks.bench_page_retry --pages 200 --fail-rate 0.1
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.fixture_server import FixtureServer
+from scrapers.third_jobs_scrapper import ThirdJobsScraper
+
+
+def run(server, page_retries, concurrency):
+    server.failed = 0
+    scraper = ThirdJobsScraper(fetch_mode='http', base_url=server.make_it_in_germany_url, concurrency=concurrency,
+                               stop_after_known=0, rate_limiter=server.rate_limiter(), page_retries=page_retries)
+    # Keep the backoff short; the fixture fails at random rather than because it is overloaded
+    scraper.retry.base_delay = 0.05
+    start = time.perf_counter()
+    jobs = list(scraper.iter_jobs())
+    return time.perf_counter() - start, len(jobs), server.failed, scraper.retry.as_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page retries against a flaky server')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.01, help='Simulated server latency per request (seconds)')
+    parser.add_argument('--fail-rate', type=float, default=0.1, help='Share of requests the server answers with a 500')
+    parser.add_argument('--page-retries', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_page_retry_"))
+    with FixtureServer(total_pages=args.pages, per_page=args.per_page, latency=args.latency,
+                       fail_rate=args.fail_rate) as server:
+        expected = args.pages * args.per_page
+        for page_retries in (0, args.page_retries):
+            duration, count, failed, retries = run(server, page_retries, args.concurrency)
+            print(f"{page_retries} retries: {count}/{expected} jobs in {duration:.2f}s, {failed} requests failed "
+                  f"by the server, {retries['retries']} retries, {retries['recovered']} pages recovered, "
+                  f"still missing: {retries['failed_pages'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Crawl the fixture server's Make it in Germany listing over HTTP while the
+server answers 429 above --max-rps, once with the limiter out of the way
+and once with the adaptive limiter, and print jobs/sec, the 429s the
+server had to send and the rate the limiter settled at.
+
+    python -m benchmarks.bench_rate_limit --pages 200 --max-rps 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.fixture_server import FixtureServer
+from scrapers.third_jobs_scrapper import ThirdJobsScraper
+from utils.rate_limit import RateLimiter, host_of
+
+
+def run(server, rate_limiter, concurrency):
+    # Start with the server's one-second window empty
+    time.sleep(1)
+    server.throttled = 0
+    scraper = ThirdJobsScraper(fetch_mode='http', base_url=server.make_it_in_germany_url, concurrency=concurrency,
+                               stop_after_known=0, rate_limiter=rate_limiter)
+    start = time.perf_counter()
+    jobs = list(scraper.iter_jobs())
+    return time.perf_counter() - start, len(jobs), server.throttled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the adaptive rate limiter against a throttling server')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated server latency per request (seconds)')
+    parser.add_argument('--max-rps', type=int, default=20, help='Requests per second the server allows')
+    parser.add_argument('--rate', type=float, default=2.0, help='Starting rate of the adaptive limiter')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_rate_limit_"))
+    with FixtureServer(total_pages=args.pages, per_page=args.per_page, latency=args.latency,
+                       max_rps=args.max_rps) as server:
+        expected = args.pages * args.per_page
+        adaptive = RateLimiter(rate=args.rate, max_in_flight=args.concurrency)
+        for name, rate_limiter in (('unlimited', server.rate_limiter()), ('adaptive', adaptive)):
+            duration, count, throttled = run(server, rate_limiter, args.concurrency)
+            stats = rate_limiter.as_dict()[host_of(server.url)]
+            print(f"{name:>10}: {count}/{expected} jobs in {duration:.2f}s ({count / duration:.0f} jobs/s), "
+                  f"{throttled} requests throttled by the server, limiter ended at {stats['rate']:.1f}/s "
+                  f"after {stats['requests']} requests")
+
+
+if __name__ == "__main__":
+    main()
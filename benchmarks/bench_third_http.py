@@ -0,0 +1,43 @@
+"""
+Time ThirdJobsScraper's browserless HTTP mode against the local fixture
+server, with and without concurrency.
+
+    python -m benchmarks.bench_third_http --pages 50 --latency 0.2
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.fixture_server import FixtureServer
+from scrapers.third_jobs_scrapper import ThirdJobsScraper
+
+
+def run(server, concurrency):
+    scraper = ThirdJobsScraper(fetch_mode='http', base_url=server.make_it_in_germany_url, concurrency=concurrency,
+                               rate_limiter=server.rate_limiter())
+    start = time.perf_counter()
+    scraper.scrape()
+    return time.perf_counter() - start, len(scraper.jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HTTP fetch mode of ThirdJobsScraper')
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated server latency per request (seconds)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    # scrape() exports to output/ under the working directory
+    os.chdir(tempfile.mkdtemp(prefix="bench_third_http_"))
+    with FixtureServer(total_pages=args.pages, per_page=args.per_page, latency=args.latency) as server:
+        expected = args.pages * args.per_page
+        for concurrency in (1, args.concurrency):
+            duration, count = run(server, concurrency)
+            status = "ok" if count == expected else f"MISMATCH (expected {expected})"
+            print(f"concurrency={concurrency:<3} {count} jobs in {duration:.2f}s "
+                  f"({count / duration:.0f} jobs/s) {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Run one queued crawl of the fixture server's Make it in Germany listing
+with several `main.py worker` processes against the configured Postgres
+database, optionally SIGKILL one of them mid-crawl, and check that every
+page task was done exactly once by someone and every job came through.
+
+    python -m benchmarks.bench_work_queue --workers 3 --pages 200 --kill-after 3 --lease 5
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.fixture_server import FixtureServer
+from utils.db import connect_to_database
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def start_worker(index, args, crawl_id, server, directory):
+    command = [sys.executable, MAIN, 'worker', '--http', '--no-http-cache', '--scraper', 'third_page',
+               '--crawl-id', crawl_id, '--worker-id', f"bench-{index}", '--parallel', str(args.parallel),
+               '--lease', str(args.lease), '--rate', '1000', '--max-rate', '1000', '--max-in-flight', '100',
+               '--metrics-dir', os.path.join(directory, 'metrics')]
+    env = {**os.environ, 'third_page_url': server.make_it_in_germany_url}
+    output = open(os.path.join(directory, f"worker-{index}.log"), 'w')
+    return subprocess.Popen(command, cwd=directory, env=env, stdout=output, stderr=subprocess.STDOUT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a queued crawl with several worker processes')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--parallel', type=int, default=2, help='Tasks each worker runs at once')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated server latency per request (seconds)')
+    parser.add_argument('--lease', type=float, default=5.0, help='Task lease of the workers (seconds)')
+    parser.add_argument('--kill-after', type=float, default=None,
+                        help='SIGKILL the first worker this many seconds in, leaving its tasks to be reclaimed')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_work_queue_")
+    crawl_id = f"bench_{time.strftime('%Y%m%d_%H%M%S')}"
+    with FixtureServer(total_pages=args.pages, per_page=args.per_page, latency=args.latency) as server:
+        start = time.perf_counter()
+        workers = [start_worker(index, args, crawl_id, server, directory) for index in range(args.workers)]
+        if args.kill_after is not None:
+            time.sleep(args.kill_after)
+            workers[0].send_signal(signal.SIGKILL)
+            print(f"Killed worker bench-0 after {args.kill_after:g}s")
+        exit_codes = [worker.wait() for worker in workers]
+        duration = time.perf_counter() - start
+
+    connection = connect_to_database()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+            SELECT status, count(*), coalesce(sum(jobs), 0), count(*) FILTER (WHERE attempts > 1)
+            FROM crawl_tasks WHERE crawl_id = %s GROUP BY status
+            """, (crawl_id,))
+            statuses = cursor.fetchall()
+            cursor.execute("""
+            SELECT worker, count(*) FROM crawl_tasks WHERE crawl_id = %s AND status = 'done'
+            GROUP BY worker ORDER BY worker
+            """, (crawl_id,))
+            per_worker = cursor.fetchall()
+    finally:
+        connection.close()
+
+    expected = args.pages * args.per_page
+    jobs = sum(row[2] for row in statuses)
+    print(f"Crawl {crawl_id}: {args.workers} workers in {duration:.2f}s, exit codes {exit_codes}, logs in {directory}")
+    for status, count, status_jobs, retried in statuses:
+        print(f"  {status}: {count} tasks, {status_jobs} jobs, {retried} needed more than one attempt")
+    print(f"  done per worker: {', '.join(f'{worker}={count}' for worker, count in per_worker)}")
+    print(f"  {jobs}/{expected} jobs from {args.pages} pages")
+
+
+if __name__ == "__main__":
+    main()
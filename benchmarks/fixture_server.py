@@ -0,0 +1,176 @@
+"""
+Local HTTP server that serves fixture pages so the scrapers can be run and
+timed without touching the live sites.
+"""
+import os
+import json
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+from benchmarks import fixtures
+from utils.rate_limit import RateLimiter
+
+
+class FixtureServer:
+    """
+    Serves the synthetic sites on 127.0.0.1 in a background thread.
+    Every site lists total_pages * per_page offers. `latency` adds a fixed
+    delay per request to mimic a remote server. Files under recordings_dir
+    (saved pages, laid out by URL path) are served in place of the
+    synthetic pages when present. With max_rps, requests beyond that many
+    in the last second are answered 429 with a Retry-After, like a site
+    that throttles. With fail_rate, that fraction of requests is answered
+    500 at random (seeded), like a flaky origin.
+    """
+
+    def __init__(self, total_pages=50, per_page=20, latency=0.0, recordings_dir=None, max_rps=None, fail_rate=0.0,
+                 seed=0):
+        self.total_pages = total_pages
+        self.per_page = per_page
+        self.latency = latency
+        self.recordings_dir = recordings_dir
+        self.max_rps = max_rps
+        self.recent = deque()
+        self.requests = 0
+        self.throttled = 0
+        self.fail_rate = fail_rate
+        self.failed = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def make_it_in_germany_url(self):
+        return f"{self.url}{fixtures.MAKE_IT_IN_GERMANY_PATH}?{fixtures.MAKE_IT_IN_GERMANY_QUERY}"
+
+    @property
+    def total_offers(self):
+        return self.total_pages * self.per_page
+
+    def justjoin_url(self, category='python'):
+        return f"{self.url}{fixtures.JUSTJOIN_PATH_PREFIX}{category}"
+
+    @property
+    def pracuj_url(self):
+        return f"{self.url}{fixtures.PRACUJ_PATH}"
+
+    def rate_limiter(self):
+        """A limiter that never holds the scrapers back; the fixture is local, so politeness would only time itself"""
+        return RateLimiter(rate=10000, burst=10000, max_rate=10000, max_in_flight=1000)
+
+    def _over_limit(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and self.recent[0] <= now - 1:
+                self.recent.popleft()
+            if len(self.recent) >= self.max_rps:
+                self.throttled += 1
+                return True
+            self.recent.append(now)
+            return False
+
+    def _fails(self):
+        with self.lock:
+            if self.random.random() < self.fail_rate:
+                self.failed += 1
+                return True
+            return False
+
+    def _recording(self, path):
+        if not self.recordings_dir:
+            return None
+        root = os.path.abspath(self.recordings_dir)
+        file_path = os.path.normpath(os.path.join(root, path.lstrip('/')))
+        if os.path.isdir(file_path):
+            file_path = os.path.join(file_path, 'index.html')
+        if not file_path.startswith(root) or not os.path.isfile(file_path):
+            return None
+        with open(file_path, encoding='utf-8') as f:
+            return f.read()
+
+    def route(self, path, query):
+        """Return (status, content_type, body) for a request"""
+        recording = self._recording(path)
+        if recording is not None:
+            return 200, 'text/html; charset=utf-8', recording
+        if path.startswith(fixtures.JUSTJOIN_PATH_PREFIX):
+            return 200, 'text/html; charset=utf-8', fixtures.justjoin_page(path[len(fixtures.JUSTJOIN_PATH_PREFIX):])
+        if path == fixtures.JUSTJOIN_API_PATH:
+            start = int(query.get('from', ['0'])[0])
+            limit = int(query.get('limit', [str(fixtures.JUSTJOIN_BATCH)])[0])
+            return 200, 'application/json', json.dumps(fixtures.justjoin_offers(start, limit, self.total_offers))
+        if path == fixtures.PRACUJ_PATH:
+            page = min(max(int(query.get('pn', ['1'])[0]), 1), self.total_pages)
+            return 200, 'text/html; charset=utf-8', fixtures.pracuj_page(page, self.total_pages, self.per_page)
+        if path == fixtures.PRACUJ_API_PATH:
+            page = min(max(int(query.get('page', ['1'])[0]), 1), self.total_pages)
+            return 200, 'application/json', json.dumps({
+                'offers': fixtures.pracuj_offers(page, self.per_page),
+                'pagination': fixtures.pracuj_pagination(page, self.total_pages),
+            })
+        if path == fixtures.MAKE_IT_IN_GERMANY_PATH:
+            page = int(query.get('tx_solr[page]', ['1'])[0])
+            if page < 1 or page > self.total_pages:
+                return 404, 'text/plain', 'Not found'
+            return 200, 'text/html; charset=utf-8', fixtures.make_it_in_germany_page(page, self.total_pages, self.per_page)
+        return 404, 'text/plain', 'Not found'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.max_rps and server._over_limit():
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if server.fail_rate and server._fails():
+                    self.send_response(500)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                parts = urlsplit(self.path)
+                status, content_type, body = server.route(parts.path, parse_qs(parts.query))
+                payload = body.encode('utf-8')
+                # Support conditional requests like a real origin would
+                etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,201 @@
+"""
+Synthetic HTML fixtures shaped like the pages the scrapers parse. Only the
+markup the selectors depend on is reproduced.
+"""
+from html import escape
+
+MAKE_IT_IN_GERMANY_PATH = "/en/working-in-germany/job-listings"
+MAKE_IT_IN_GERMANY_QUERY = "tx_solr%5Bfilter%5D%5B0%5D=topjobs%3A4"
+
+
+def make_it_in_germany_page(page, total_pages, per_page=20):
+    items = []
+    for i in range((page - 1) * per_page, page * per_page):
+        items.append(f"""
+        <li class="list__item">
+          <h3><a href="/en/working-in-germany/job-listings/job-{i}">Software Engineer {i}</a></h3>
+          <p>{escape(f"Firma {i % 97} GmbH & Co. KG")}</p>
+          <span class="icon--before icon--pin"><span class="element">Berlin</span></span>
+          <span class="icon--before icon--calendar"><time datetime="2025-01-{i % 28 + 1:02d}">{i % 28 + 1}.01.2025</time></span>
+        </li>""")
+        if i % per_page == 4:
+            items.append('<li class="list__item list__item--newsletter"><p>Newsletter</p></li>')
+    items.append('<li class="list__item list__item--customercenter"><p>Customer center</p></li>')
+
+    return f"""<!DOCTYPE html>
+<html><head><title>Job listings - page {page}</title></head>
+<body>
+  <h1 class="h2">Job listings</h1>
+  <div id="list45536">
+    <div class="job-category__main">
+      <ul>{''.join(items)}
+      </ul>
+    </div>
+    <ul class="pagination">
+      <li class="pagination__item"><a href="?page=1">1</a></li>
+      <li class="pagination__item pagination__item--last"><a href="?page={total_pages}">{total_pages}</a></li>
+    </ul>
+  </div>
+</body></html>"""
+
+
+JUSTJOIN_PATH_PREFIX = "/job-offers/all-locations/"
+JUSTJOIN_API_PATH = "/api/justjoin/offers"
+JUSTJOIN_BATCH = 50
+
+# Virtualized infinite scroll like justjoin.it: offers are fetched as JSON in
+# batches when the viewport nears the end of the list, and only the rows in
+# (or close to) the viewport exist in the DOM, each tagged with data-index.
+_JUSTJOIN_SCRIPT = """
+const ROW = 120, OVERSCAN = 4, BATCH = %(batch)d;
+const list = document.getElementById('list');
+const offers = [];
+let total = null, loading = false;
+
+const amount = value => value.toLocaleString('en-US').replace(/,/g, ' ');
+
+function card(offer, index) {
+    const employment = offer.employmentTypes[0];
+    const salary = employment.from !== null
+        ? `<span>${amount(employment.from)}</span><span>${amount(employment.to)}</span><span>${employment.currency.toUpperCase()}</span>`
+        : '<span>Undisclosed Salary</span>';
+    const skills = offer.requiredSkills.map((skill, i) => `<div class="skill-tag-${i + 1}"><div>${skill}</div></div>`).join('');
+    const remote = offer.workplaceType === 'remote' ? '<span>Fully remote</span>' : '';
+    return `<div data-index="${index}" style="position:absolute;top:${index * ROW}px;height:${ROW - 8}px">
+      <a href="/job-offer/${offer.slug}"><h3>${offer.title}</h3></a>
+      <div class="MuiBox-root css-1kb0cuq"><img id="offerCardCompanyLogo" src="${offer.companyLogoThumbUrl}"><span>${offer.companyName}</span></div>
+      <div class="MuiBox-root css-18ypp16">${salary}</div>
+      <span class="css-1o4wo1x">${offer.city}</span>${remote}${skills}
+    </div>`;
+}
+
+function render() {
+    const first = Math.max(0, Math.floor(window.scrollY / ROW) - OVERSCAN);
+    const last = Math.min(offers.length, Math.ceil((window.scrollY + window.innerHeight) / ROW) + OVERSCAN);
+    list.style.height = `${offers.length * ROW}px`;
+    list.innerHTML = offers.slice(first, last).map((offer, i) => card(offer, first + i)).join('');
+    if (!loading && (total === null || offers.length < total)
+            && (last >= offers.length - OVERSCAN || document.documentElement.scrollHeight <= window.innerHeight)) {
+        load();
+    }
+}
+
+async function load() {
+    loading = true;
+    const response = await fetch(`%(api)s?from=${offers.length}&limit=${BATCH}`);
+    const page = await response.json();
+    total = page.meta.totalItems;
+    offers.push(...page.data);
+    loading = false;
+    render();
+}
+
+window.addEventListener('scroll', render, {passive: true});
+load();
+"""
+
+
+def justjoin_offers(start, limit, total):
+    """One batch of the JSON feed behind the justjoin fixture, shaped like the site's offers API"""
+    offers = []
+    for i in range(start, min(start + limit, total)):
+        undisclosed = i % 5 == 0
+        offers.append({
+            'slug': f"company-{i % 300}-python-developer-{i}",
+            'title': f"Python Developer {i}",
+            'companyName': f"Company {i % 300}",
+            'companyLogoThumbUrl': f"/logo/{i % 40}.png",
+            'city': ["Warszawa", "Kraków", "Wrocław", "Gdańsk"][i % 4],
+            'workplaceType': ["remote", "hybrid", "office"][i % 3],
+            'employmentTypes': [{
+                'type': "b2b",
+                'from': None if undisclosed else (10 + i % 10) * 1000,
+                'to': None if undisclosed else (20 + i % 10) * 1000,
+                'currency': "pln",
+            }],
+            'requiredSkills': ["Python", "Django", "PostgreSQL"][:1 + i % 3],
+            'publishedAt': f"2025-01-{i % 28 + 1:02d}T08:00:00.000Z",
+        })
+    end = start + len(offers)
+    return {'data': offers, 'meta': {'totalItems': total, 'next': {'cursor': end if end < total else None}}}
+
+
+def justjoin_page(category):
+    script = _JUSTJOIN_SCRIPT % {'batch': JUSTJOIN_BATCH, 'api': JUSTJOIN_API_PATH}
+    return f"""<!DOCTYPE html>
+<html><head><title>{escape(category)} job offers</title></head>
+<body style="margin:0">
+  <div id="list" style="position:relative"></div>
+  <script>{script}</script>
+</body></html>"""
+
+
+PRACUJ_PATH = "/praca/python"
+PRACUJ_API_PATH = "/api/pracuj/offers"
+
+# Client-side pagination like pracuj.pl: the page buttons fetch the next page's
+# offers and swap them into the list without a navigation.
+_PRACUJ_SCRIPT = """
+document.querySelector('.cookies_aropjbf button').addEventListener('click', event => {
+    event.target.closest('.cookies_aropjbf').style.display = 'none';
+});
+document.addEventListener('click', async event => {
+    const button = event.target.closest('button[data-page]');
+    if (!button) return;
+    const response = await fetch(`%(api)s?page=${button.dataset.page}`);
+    const fragment = await response.json();
+    document.getElementById('offers').innerHTML = fragment.offers;
+    document.getElementById('pagination').innerHTML = fragment.pagination;
+});
+"""
+
+
+def pracuj_offers(page, per_page):
+    offers = []
+    for i in range((page - 1) * per_page, page * per_page):
+        technologies = ''.join(f"<span>{tech}</span>" for tech in ["Python", "SQL", "AWS"][:1 + i % 3])
+        offers.append(f"""
+        <div data-test="default-offer" data-test-offerid="{1000000 + i}">
+          <h2 data-test="offer-title"><a href="/praca/python-developer-{i},oferta,{1000000 + i}">Python Developer {i}</a></h2>
+          <span data-test="offer-salary">{12000 + i % 5000} – {18000 + i % 5000} zł brutto / mies.</span>
+          <h3 data-test="text-company-name">{escape(f"Firma {i % 211} Sp. z o.o.")}</h3>
+          <h4 data-test="text-region">Warszawa</h4>
+          <p data-test="text-added">Opublikowana: 1 stycznia 2025</p>
+          <ul>
+            <li data-test="offer-additional-info-0">Specjalista (Mid / Regular)</li>
+            <li data-test="offer-additional-info-2">Umowa o pracę</li>
+            <li data-test="offer-additional-info-4">Praca hybrydowa</li>
+          </ul>
+          <div data-test="technologies-list">{technologies}</div>
+          <div data-test="section-short-description"><p class="invisible">Offer {i} description</p></div>
+        </div>""")
+    return ''.join(offers)
+
+
+def pracuj_pagination(page, total_pages):
+    # A window of page numbers around the current one, then the last page; the
+    # scraper reads the page count from the last button and clicks "next"
+    # when a page number is not rendered
+    numbers = sorted({1, total_pages, *range(max(1, page - 2), min(total_pages, page + 2) + 1)})
+    buttons = ''.join(f'<button data-page="{number}" data-test="bottom-pagination-button-page-{number}">{number}</button>'
+                      for number in numbers)
+    next_page = min(page + 1, total_pages)
+    return (f'<div class="listing_n1mxvncp">{buttons}</div>'
+            f'<button data-page="{next_page}" data-test="bottom-pagination-button-next">Next</button>')
+
+
+def pracuj_page(page, total_pages, per_page=50):
+    script = _PRACUJ_SCRIPT % {'api': PRACUJ_API_PATH}
+    return f"""<!DOCTYPE html>
+<html><head><title>Python - pracuj.pl</title></head>
+<body>
+  <div class="cookies_aropjbf"><div><button type="button">Accept</button></div></div>
+  <div id="offers-list">
+    <div>Filters</div>
+    <div>Sorting</div>
+    <div>Results</div>
+    <div id="offers">{pracuj_offers(page, per_page)}</div>
+  </div>
+  <div class="listing_a1ftse4d" id="pagination">{pracuj_pagination(page, total_pages)}</div>
+  <script>{script}</script>
+</body></html>"""
@@ -0,0 +1,194 @@
+"""
+Run every scraper against the local fixture server and record per-phase
+timings, jobs/sec and WebDriver command counts as JSON, so runs can be
+compared without the live sites' noise.
+
+    python -m benchmarks.run_suite --pages 500 --per-page 20
+    python -m benchmarks.run_suite --dsn "dbname=crawler host=localhost" --compare benchmarks/results/<previous>.json
+
+Browser scenarios are skipped when Firefox is not installed. The DB write
+phase is only measured with --dsn; it writes into a throw-away schema. The
+startup scenario times `import main` and `main.py --help` instead of a crawl.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import psycopg2
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.bench_import_time import measure_startup
+from scrapers.first_scrapper import FirstScraper
+from scrapers.second_scrapper import SecondScrapper
+from scrapers.third_jobs_scrapper import ThirdJobsScraper
+from utils.db import migrate_schema, save_jobs_to_database
+
+SCHEMA = "bench_suite"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCENARIOS = ('startup', 'justjoin', 'justjoin_network', 'pracuj', 'germany', 'germany_http')
+BROWSER_SCENARIOS = ('justjoin', 'justjoin_network', 'pracuj', 'germany')
+
+
+def run_justjoin(server, lean=False):
+    scraper = FirstScraper(server.justjoin_url(), headless=True, stop_after_known=0, max_jobs=server.total_offers,
+                           lean=lean, rate_limiter=server.rate_limiter())
+    return scraper, scraper.scrape(), 'justjoin_categories'
+
+
+def run_justjoin_network(server, lean=False):
+    scraper = FirstScraper(server.justjoin_url(), headless=True, stop_after_known=0, max_jobs=server.total_offers,
+                           lean=lean, extraction_mode='network', rate_limiter=server.rate_limiter())
+    return scraper, scraper.scrape(), 'justjoin_categories'
+
+
+def run_pracuj(server, lean=False):
+    scraper = SecondScrapper(server.pracuj_url, headless=True, stop_after_known=0, lean=lean,
+                             rate_limiter=server.rate_limiter())
+    scraper.scrape()
+    return scraper, list(scraper.jobs.values()), 'second_page'
+
+
+def run_germany(server, lean=False):
+    scraper = ThirdJobsScraper(headless=True, base_url=server.make_it_in_germany_url, stop_after_known=0, lean=lean,
+                               rate_limiter=server.rate_limiter())
+    scraper.scrape()
+    return scraper, scraper.jobs, 'third_page'
+
+
+def run_germany_http(server, lean=False):
+    scraper = ThirdJobsScraper(fetch_mode='http', base_url=server.make_it_in_germany_url, stop_after_known=0,
+                               rate_limiter=server.rate_limiter())
+    scraper.scrape()
+    return scraper, scraper.jobs, 'third_page'
+
+
+RUNNERS = {
+    'justjoin': run_justjoin,
+    'justjoin_network': run_justjoin_network,
+    'pracuj': run_pracuj,
+    'germany': run_germany,
+    'germany_http': run_germany_http,
+}
+
+
+def reset_schema(connection):
+    cursor = connection.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA};")
+    connection.commit()
+    cursor.close()
+    migrate_schema(connection)
+
+
+def run_scenario(name, server, connection=None, lean=False):
+    server.requests = 0
+    start = time.perf_counter()
+    scraper, jobs, source = RUNNERS[name](server, lean)
+    if connection is not None:
+        reset_schema(connection)
+        with scraper.timer.phase('db_write'):
+            save_jobs_to_database(connection, jobs, source)
+    duration = time.perf_counter() - start
+
+    result = {
+        'status': 'ok' if len(jobs) == server.total_offers else 'incomplete',
+        'jobs': len(jobs),
+        'expected_jobs': server.total_offers,
+        'seconds': round(duration, 3),
+        'jobs_per_sec': round(len(jobs) / duration, 1) if duration else None,
+        'phases': scraper.timer.as_dict(),
+        'http_requests': server.requests,
+    }
+    if scraper.page_stats.pages:
+        result['page_loads'] = scraper.page_stats.as_dict()
+    counter = getattr(scraper, 'command_counter', None)
+    if counter is not None:
+        result['webdriver_commands'] = {'total': counter.total, **dict(counter.counts.most_common())}
+    waiter = getattr(scraper, 'waiter', None)
+    if waiter is not None:
+        result['waits'] = waiter.as_dict()
+    return result
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)['scenarios']
+    print(f"\nCompared with {previous_path}")
+    print(f"{'scenario':<14} {'jobs/s before':>14} {'jobs/s now':>11} {'change':>8}")
+    for name, result in results.items():
+        if name == 'startup' and previous.get(name, {}).get('import_ms'):
+            before, now = previous[name]['import_ms'], result['import_ms']
+            print(f"{'import ms':<14} {before:>14.1f} {now:>11.1f} {(now - before) / before:>+8.1%}")
+            continue
+        before = previous.get(name, {}).get('jobs_per_sec')
+        now = result.get('jobs_per_sec')
+        if not before or not now:
+            continue
+        print(f"{name:<14} {before:>14.1f} {now:>11.1f} {(now - before) / before:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against local fixture sites')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--pages', type=int, default=50, help='Listing pages per site')
+    parser.add_argument('--per-page', type=int, default=20, help='Offers per listing page')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated server latency per request (seconds)')
+    parser.add_argument('--recordings', help='Directory of recorded pages served in place of the synthetic ones')
+    parser.add_argument('--lean', action='store_true', help='Run the browser scenarios with the lean profile')
+    parser.add_argument('--dsn', help='Postgres DSN; when given the DB write phase is measured too')
+    parser.add_argument('--output', help='Where to write the JSON results (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare jobs/sec against')
+    args = parser.parse_args()
+
+    started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    recordings = os.path.abspath(args.recordings) if args.recordings else None
+    compare_with = os.path.abspath(args.compare) if args.compare else None
+    connection = psycopg2.connect(args.dsn) if args.dsn else None
+    has_browser = shutil.which('firefox') is not None
+
+    # scrape() exports to output/ under the working directory
+    os.chdir(tempfile.mkdtemp(prefix="bench_suite_"))
+    results = {}
+    try:
+        with FixtureServer(total_pages=args.pages, per_page=args.per_page, latency=args.latency,
+                           recordings_dir=recordings) as server:
+            for name in args.scenario:
+                if name == 'startup':
+                    results[name] = measure_startup()
+                elif name in BROWSER_SCENARIOS and not has_browser:
+                    results[name] = {'status': 'skipped', 'reason': 'Firefox is not installed'}
+                else:
+                    try:
+                        results[name] = run_scenario(name, server, connection, args.lean)
+                    except Exception as e:
+                        results[name] = {'status': 'failed', 'error': str(e)}
+                        if connection is not None:
+                            connection.rollback()
+                print(f"{name:<14} {json.dumps(results[name])}")
+    finally:
+        if connection is not None:
+            cursor = connection.cursor()
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            connection.commit()
+            connection.close()
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'started_at': started_at,
+            'config': {'pages': args.pages, 'per_page': args.per_page, 'latency': args.latency,
+                       'recordings': recordings, 'db_write': connection is not None,
+                       'lean': args.lean},
+            'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+            'scenarios': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if compare_with:
+        compare(results, compare_with)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,438 +1,668 @@
 import os
 import time
+import math
+import signal
 import argparse
-import psycopg2
-from dotenv import load_dotenv
-from scrapers.first_scrapper import FirstScraper
-from scrapers.second_scrapper import SecondScrapper
-from scrapers.third_jobs_scrapper import ThirdJobsScraper
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from utils.logger import Logger
-import json
-import pandas as pd
-from datetime import datetime
-
-# Load environment variables
-load_dotenv()
-
-# Fetch database variables
-USER = os.getenv("user")
-PASSWORD = os.getenv("password")
-HOST = os.getenv("host")
-PORT = os.getenv("port")
-DBNAME = os.getenv("dbname")
-FIRST_PAGE_URL = os.getenv("first_page_url")
-SECOND_PAGE_URL = os.getenv("second_page_url")
-THIRD_PAGE_URL = os.getenv("third_page_url")
+from utils.scheduler import parse_duration
+
+# Scrapers, the browser stack and the database driver are imported only once
+# they are needed, so --help and argument errors return without loading them. The
+# *_page_url overrides are read in get_scraper, after utils.config has loaded .env
 
 logger = Logger()
 
-def get_scraper(scraper_name, headless=True, url=None):
-    # Define scraper classes
-    scrapers = {
-        'second_page': SecondScrapper,
-        'third_page': ThirdJobsScraper
-    }
+# Scraper classes by source as (module, class), imported on first use
+SCRAPER_REGISTRY = {
+    'justjoin_categories': ('scrapers.first_scrapper', 'FirstScraper'),
+    'second_page': ('scrapers.second_scrapper', 'SecondScrapper'),
+    'third_page': ('scrapers.third_jobs_scrapper', 'ThirdJobsScraper'),
+}
+
+EXPORT_FORMATS = ['ndjson', 'csv', 'parquet']
+
+def load_scraper_class(scraper_name):
+    module_name, class_name = SCRAPER_REGISTRY[scraper_name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_scraper(scraper_name, url=None, fetch_mode='browser', http_cache=None, **scraper_options):
+    # Paginated scrapers; justjoin categories are created by open_justjoin_category
+    scrapers = ['second_page', 'third_page']
 
     if scraper_name not in scrapers:
-        raise ValueError(f"Unknown scraper: {scraper_name}. Available scrapers: {', '.join(scrapers.keys())}")
+        raise ValueError(f"Unknown scraper: {scraper_name}. Available scrapers: {', '.join(scrapers)}")
 
     # Initialize the scraper with the appropriate parameters
+    scraper_class = load_scraper_class(scraper_name)
     if scraper_name == 'third_page':
-        return scrapers[scraper_name](headless=headless)
+        # third_page_url replaces the built-in listing URL, e.g. with a mirror. Read here, not at
+        # import: .env is only loaded by utils.config, which the scraper module has imported by now
+        url = url or os.getenv(f"{scraper_name}_url")
+        if url:
+            scraper_options['base_url'] = url
+        return scraper_class(fetch_mode=fetch_mode, http_cache=http_cache, **scraper_options)
     else:
         if not url:
             url = os.getenv(f"{scraper_name}_url")
-        return scrapers[scraper_name](url=url, headless=headless)
+        return scraper_class(url=url, **scraper_options)
 
-def connect_to_database():
-    try:
-        connection = psycopg2.connect(
-            user=USER,
-            password=PASSWORD,
-            host=HOST,
-            port=PORT,
-            dbname=DBNAME
-        )
-        logger.info("Database connection successful!")
-        return connection
-    except Exception as e:
-        logger.error(f"Failed to connect to database: {e}")
-        raise
+JUSTJOIN_CATEGORIES = [
+    "javascript",
+    "python",
+    "data",
+    "devops"
+]
 
-def check_and_update_table_structure(connection):
-    """Check the existing table structure and update it if needed"""
-    try:
-        cursor = connection.cursor()
-
-        # Check if the table exists
-        cursor.execute("""
-        SELECT EXISTS (
-            SELECT FROM information_schema.tables
-            WHERE table_name = 'jobs'
-        );
-        """)
-        table_exists = cursor.fetchone()[0]
-
-        if not table_exists:
-            logger.info("Jobs table does not exist. Creating it...")
-            setup_database(connection)
-            return
+# Offers per justjoin category, as FirstScraper's max_jobs
+JUSTJOIN_MAX_JOBS = 1000
 
-        # Get the current columns in the table
-        cursor.execute("""
-        SELECT column_name, data_type
-        FROM information_schema.columns
-        WHERE table_name = 'jobs';
-        """)
-        existing_columns = {row[0]: row[1] for row in cursor.fetchall()}
-
-        # Define the required columns and their data types
-        required_columns = {
-            'id': 'integer',
-            'job_id': 'character varying',
-            'title': 'character varying',
-            'company': 'character varying',
-            'location': 'character varying',
-            'salary': 'character varying',
-            'url': 'text',
-            'description': 'text',
-            'published_date': 'character varying',
-            'job_type': 'character varying',
-            'contract_type': 'character varying',
-            'remote_status': 'character varying',
-            'technologies': 'ARRAY',
-            'source': 'character varying',
-            'scraped_at': 'timestamp without time zone',
-            'created_at': 'timestamp without time zone'
-        }
-
-        # Check for missing columns and add them
-        for column, data_type in required_columns.items():
-            if column not in existing_columns:
-                logger.info(f"Adding missing column: {column}")
-                if data_type == 'ARRAY':
-                    cursor.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT[];")
-                else:
-                    cursor.execute(f"ALTER TABLE jobs ADD COLUMN {column} {data_type};")
-
-        # Check if the index exists
-        cursor.execute("""
-        SELECT EXISTS (
-            SELECT FROM pg_indexes
-            WHERE tablename = 'jobs' AND indexname = 'idx_jobs_job_id_source'
-        );
-        """)
-        index_exists = cursor.fetchone()[0]
-
-        if not index_exists:
-            logger.info("Creating index on job_id and source")
-            cursor.execute("""
-            CREATE INDEX idx_jobs_job_id_source ON jobs(job_id, source);
-            """)
-
-        connection.commit()
-        logger.info("Table structure check and update completed successfully")
-    except Exception as e:
-        logger.error(f"Error checking and updating table structure: {e}")
-        connection.rollback()
-        raise
-    finally:
-        cursor.close()
+JUSTJOIN_BASE_URL = "https://justjoin.it/job-offers/all-locations/{category}?experience-level=junior,mid&orderBy=DESC&sortBy=published"
 
-def setup_database(connection):
-    """Create the jobs table if it doesn't exist"""
-    try:
-        cursor = connection.cursor()
-
-        # Create jobs table with a structure that can accommodate all scrapers
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS jobs (
-            id SERIAL PRIMARY KEY,
-            job_id VARCHAR(255),
-            title VARCHAR(255),
-            company VARCHAR(255),
-            location VARCHAR(255),
-            salary VARCHAR(255),
-            url TEXT,
-            description TEXT,
-            published_date VARCHAR(255),
-            job_type VARCHAR(255),
-            contract_type VARCHAR(255),
-            remote_status VARCHAR(255),
-            technologies TEXT[],
-            source VARCHAR(50),
-            scraped_at TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        connection.commit()
-        logger.info("Jobs table created or already exists")
-
-        # Now create the index after the table exists
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_jobs_job_id_source ON jobs(job_id, source);
-        """)
-
-        connection.commit()
-        logger.info("Database setup completed successfully")
-    except Exception as e:
-        logger.error(f"Error setting up database: {e}")
-        connection.rollback()
-        raise
-    finally:
-        cursor.close()
+def open_justjoin_category(category, **scraper_options):
+    """
+    Create the scraper for a single justjoin.it category. Returns the scraper
+    and an iterator over its jobs, tagged with the category.
+    """
+    url = JUSTJOIN_BASE_URL.format(category=category)
+    logger.info(f"Scraping {category} jobs from {url}")
 
-def save_jobs_to_database(connection, jobs, source):
-    """Save scraped jobs to the database"""
-    try:
-        cursor = connection.cursor()
-        jobs_added = 0
-
-        for job in jobs:
-            # Extract job data based on the source
-            if source == 'justjoin_categories':
-                job_id = job.get('data_index', '')
-                title = job.get('title', '')
-                company = job.get('company', '')
-                location = job.get('location', '')
-                salary = job.get('salary', '')
-                url = job.get('url', '')
-                description = ''
-                published_date = None  # Use None for empty dates
-                job_type = ''
-                contract_type = ''
-                remote_status = job.get('remote_status', '')
-                technologies = job.get('skills', [])
-                scraped_at = job.get('scraped_at', time.strftime("%Y-%m-%d %H:%M:%S"))
-                position = title  # Use title as position
-                source_url = url  # Use url as source_url
-                status = 'new'  # Default status for newly scraped jobs
-
-            elif source == 'second_page':
-                job_id = job.get('offer_id', '')
-                title = job.get('title', '')
-                company = job.get('company', '')
-                location = job.get('location', '')
-                salary = job.get('salary', '')
-                url = job.get('url', '')
-                description = job.get('short_description', '')
-
-                # Handle published date properly
-                published_str = job.get('published', '')
-                if published_str and published_str != 'N/A':
-                    try:
-                        # Try to parse the date string
-                        published_date = datetime.strptime(published_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        published_date = None
-                else:
-                    published_date = None
-
-                job_type = job.get('job_type', '')
-                contract_type = job.get('contract_type', '')
-                remote_status = ''  # Pracuj doesn't provide remote status in the current scraping
-                technologies = job.get('technologies', [])
-                scraped_at = job.get('scraped_at', time.strftime("%Y-%m-%d %H:%M:%S"))
-                position = title  # Use title as position
-                source_url = url  # Use url as source_url
-                status = 'new'  # Default status for newly scraped jobs
-
-            elif source == 'third_page':
-                job_id = str(hash(f"{job.get('title', '')}{job.get('company', '')}"))  # Create a unique ID
-                title = job.get('title', '')
-                company = job.get('company', '')
-                location = job.get('location', '')
-                salary = ''  # Germany scraper doesn't provide salary in the current scraping
-                url = job.get('url', '')
-                description = ''  # Germany scraper doesn't provide description in the current scraping
-
-                # Handle published date properly
-                date_str = job.get('date', '')
-                if date_str:
-                    try:
-                        # Try to parse the date string
-                        published_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        published_date = None
-                else:
-                    published_date = None
-
-                job_type = ''  # Germany scraper doesn't provide job type in the current scraping
-                contract_type = ''  # Germany scraper doesn't provide contract type in the current scraping
-                remote_status = ''  # Germany scraper doesn't provide remote status in the current scraping
-                technologies = []  # Germany scraper doesn't provide technologies in the current scraping
-                scraped_at = job.get('scraped_at', time.strftime("%Y-%m-%d %H:%M:%S"))
-                position = title  # Use title as position
-                source_url = url  # Use url as source_url
-                status = 'new'  # Default status for newly scraped jobs
-
-            # Check if job already exists to avoid duplicates
-            cursor.execute(
-                "SELECT id FROM jobs WHERE job_id = %s AND source = %s",
-                (job_id, source)
-            )
-
-            if cursor.fetchone() is None:
-                # Insert the job into the database
-                cursor.execute("""
-                INSERT INTO jobs (
-                    job_id, title, company, position, location, salary, url, description,
-                    published_date, job_type, contract_type, remote_status,
-                    technologies, source, scraped_at, source_url, status
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    job_id, title, company, position, location, salary, url, description,
-                    published_date, job_type, contract_type, remote_status,
-                    technologies, source, scraped_at, source_url, status
-                ))
-                jobs_added += 1
-
-        connection.commit()
-        logger.info(f"Added {jobs_added} new jobs to the database from {source}")
-    except Exception as e:
-        logger.error(f"Error saving jobs to database: {e}")
-        connection.rollback()
-        raise
-    finally:
-        cursor.close()
+    # Create FirstScraper instance directly for category scraping
+    scraper = load_scraper_class('justjoin_categories')(url=url, **scraper_options)
 
-def scrape_justjoin_categories(headless=True):
-    """Scrape multiple job categories from justjoin.it"""
-    categories = [
-        "javascript",
-        "python",
-        "data",
-        "devops"
-    ]
-
-    base_url = "https://justjoin.it/job-offers/all-locations/{category}?experience-level=junior,mid&orderBy=DESC&sortBy=published"
-    all_jobs = {}
+    def tagged_jobs():
+        for job in scraper.iter_jobs():
+            job['category'] = category
+            yield job
+        logger.info(f"Found {scraper.job_count} jobs for {category}")
 
-    for category in categories:
-        url = base_url.format(category=category)
-        logger.info(f"Scraping {category} jobs from {url}")
+    return scraper, tagged_jobs()
 
-        # Create FirstScraper instance directly for category scraping
-        scraper = FirstScraper(url=url, headless=headless)
-        jobs = scraper.scrape()
+def scrape_justjoin_category(category, **scraper_options):
+    """Scrape a single justjoin.it category. Returns the jobs and the scraper's crawl stats."""
+    scraper, jobs = open_justjoin_category(category, **scraper_options)
+    return list(jobs), scraper.crawl_stats
 
-        # Add category information to each job
-        for job in jobs:
-            job['category'] = category
+def scrape_justjoin_categories(**scraper_options):
+    """Scrape multiple job categories from justjoin.it"""
+    all_jobs = {}
+
+    for category in JUSTJOIN_CATEGORIES:
+        jobs, _ = scrape_justjoin_category(category, **scraper_options)
 
         # Merge jobs into the main dictionary
         all_jobs.update({f"{category}_{job['data_index']}": job for job in jobs})
 
-        logger.info(f"Found {len(jobs)} jobs for {category}")
-
     return all_jobs
 
-def main():
-    try:
-        # Connect to the database
-        connection = connect_to_database()
-
-        # Check and update the table structure
-        check_and_update_table_structure(connection)
-
-        # Set up argument parser
-        parser = argparse.ArgumentParser(description='Web Job Scraper')
-        parser.add_argument('--scraper', type=str, required=False,
-                          choices=['second_page', 'third_page', 'all', 'justjoin_categories'],
-                          default='all',
-                          help='Choose which scraper to run (default: all)')
-        parser.add_argument('--headless', action='store_true',
-                          help='Run browser in headless mode')
-        args = parser.parse_args()
-
-        # Create output directory if it doesn't exist
-        output_dir = "output"
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Define scrapers to run
-        if args.scraper == 'justjoin_categories':
-            scrapers_to_run = ['justjoin_categories']
-        elif args.scraper == 'all':
-            scrapers_to_run = ['second_page', 'third_page']
+def open_scraper(scraper_name, fetch_mode='browser', http_cache=None, **scraper_options):
+    """Create one of the paginated scrapers. Returns the scraper and an iterator over its jobs."""
+    scraper = get_scraper(scraper_name, fetch_mode=fetch_mode, http_cache=http_cache, **scraper_options)
+    logger.info(f"Scraping jobs from {scraper_name}...")
+    return scraper, scraper.iter_jobs()
+
+def run_scraper(scraper_name, fetch_mode='browser', http_cache=None, **scraper_options):
+    """Run one of the paginated scrapers and return its jobs as a list plus its crawl stats"""
+    scraper, jobs = open_scraper(scraper_name, fetch_mode=fetch_mode, http_cache=http_cache, **scraper_options)
+    return list(jobs), scraper.crawl_stats
+
+def build_tasks(scrapers_to_run, fetch_mode='browser', http_cache=None, justjoin_mode='script', **scraper_options):
+    """
+    Split the selected scrapers into independent units of work. Each task
+    creates its own scraper when it runs and takes a browser session from
+    the shared pool, so no two tasks drive the same WebDriver at once.
+    Returns a list of (label, source, callable) tuples; the callable takes
+    extra scraper options (e.g. the task's checkpoint) and returns the
+    scraper and an iterator over its jobs.
+    """
+    tasks = []
+    for scraper_name in scrapers_to_run:
+        if scraper_name == 'justjoin_categories':
+            for category in JUSTJOIN_CATEGORIES:
+                tasks.append((f"justjoin:{category}", scraper_name,
+                              lambda category=category, **task_options: open_justjoin_category(
+                                  category, extraction_mode=justjoin_mode, **scraper_options, **task_options)))
+        else:
+            tasks.append((scraper_name, scraper_name,
+                          lambda scraper_name=scraper_name, **task_options: open_scraper(
+                              scraper_name, fetch_mode=fetch_mode, http_cache=http_cache, **scraper_options,
+                              **task_options)))
+    return tasks
+
+def page_tasks(source, first, last):
+    """Work queue tasks for pages first..last of a paginated source, as (source, label, payload)"""
+    return [(source, f"{source}:page{page}", {'page': page}) for page in range(first, last + 1)]
+
+def queue_seed_tasks(scrapers_to_run, scroll_range=250):
+    """
+    First tasks of a work queue crawl: page 1 of each paginated source (its
+    worker queues the remaining pages once it has read the page count) and
+    each justjoin category split into ranges of scroll_range list positions.
+    """
+    tasks = []
+    for scraper_name in scrapers_to_run:
+        if scraper_name == 'justjoin_categories':
+            for category in JUSTJOIN_CATEGORIES:
+                for start in range(0, JUSTJOIN_MAX_JOBS, scroll_range):
+                    end = min(start + scroll_range, JUSTJOIN_MAX_JOBS)
+                    tasks.append((scraper_name, f"justjoin:{category}:{start}-{end}",
+                                  {'category': category, 'start': start, 'end': end}))
         else:
-            scrapers_to_run = [args.scraper]
+            tasks.extend(page_tasks(scraper_name, 1, 1))
+    return tasks
+
+def open_queue_task(source, payload, fetch_mode='browser', http_cache=None, justjoin_mode='script',
+                    **scraper_options):
+    """Create the scraper for one work queue task. Returns the scraper and an iterator over the task's jobs."""
+    if source == 'justjoin_categories':
+        return open_justjoin_category(payload['category'], extraction_mode=justjoin_mode,
+                                      index_range=(payload['start'], payload['end']), **scraper_options)
+    scraper = get_scraper(source, fetch_mode=fetch_mode, http_cache=http_cache, **scraper_options)
+    logger.info(f"Scraping page {payload['page']} of {source}...")
+    return scraper, scraper.iter_page(payload['page'])
+
+class ProgressTracker:
+    """Thread-safe progress and ETA reporting for tasks running in a pool of workers"""
+
+    def __init__(self, total_tasks, workers):
+        self.total_tasks = total_tasks
+        self.workers = max(1, min(workers, total_tasks))
+        self.completed = 0
+        self.durations = []
+        self.lock = threading.Lock()
+
+    def task_done(self, label, duration, job_count):
+        with self.lock:
+            self.completed += 1
+            self.durations.append(duration)
+            remaining = self.total_tasks - self.completed
+            avg_duration = sum(self.durations) / len(self.durations)
+            # Remaining tasks run in waves of `workers` at a time
+            estimated_remaining_time = avg_duration * math.ceil(remaining / self.workers)
+
+            logger.info(f"{label} completed in {duration:.2f} seconds with {job_count} jobs")
+            logger.info(f"Progress: {self.completed}/{self.total_tasks} tasks "
+                        f"({(self.completed / self.total_tasks) * 100:.1f}%)")
+            logger.info(f"Estimated time remaining: {estimated_remaining_time:.1f} seconds")
+
+def log_incremental_summary(crawl_stats):
+    """Report how much of each listing the incremental stop let us skip"""
+    pages_saved = 0
+    for label, stats in crawl_stats.items():
+        if not stats['stopped_early']:
+            continue
+        if stats['pages_total']:
+            saved = stats['pages_total'] - stats['pages_visited']
+            pages_saved += saved
+            logger.info(f"Incremental: {label} stopped after {stats['pages_visited']}/{stats['pages_total']} pages "
+                        f"({saved} pages saved, {stats['known_seen']} known offers seen)")
+        else:
+            logger.info(f"Incremental: {label} stopped after {stats['pages_visited']} screens "
+                        f"({stats['known_seen']} known offers seen)")
+    logger.info(f"Incremental: {pages_saved} listing pages skipped in total")
+
+def parse_args(argv=None):
+    """Parse the command line; runs before anything heavy is imported or connected"""
+    parser = argparse.ArgumentParser(description='Web Job Scraper')
+    parser.add_argument('command', nargs='?', choices=['run', 'daemon', 'worker'], default='run',
+                      help='run: scrape once and exit (default); daemon: keep running and scrape every source '
+                           'on its own schedule, e.g. "main.py daemon --every 24h third_page=6h"; worker: share '
+                           'a crawl with other worker processes through page-level tasks in the database')
+    parser.add_argument('--scraper', type=str, required=False, nargs='+',
+                      choices=['second_page', 'third_page', 'all', 'justjoin_categories'],
+                      default=['all'],
+                      help='Choose which scrapers to run (default: all)')
+    parser.add_argument('--headless', action='store_true',
+                      help='Run browser in headless mode')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                      help='Run sources and justjoin categories in N concurrent workers (default: 1)')
+    parser.add_argument('--http', action='store_true',
+                      help='Fetch server-rendered sources (third_page) over plain HTTP instead of a browser')
+    parser.add_argument('--no-http-cache', action='store_true',
+                      help='Do not revalidate --http pages against the on-disk page cache')
+    parser.add_argument('--full', action='store_true',
+                      help='Walk every page even when only already-known offers are found')
+    parser.add_argument('--stop-after-known', type=int, default=20, metavar='N',
+                      help='In incremental mode, stop a source after N consecutive known offers (default: 20)')
+    parser.add_argument('--justjoin-mode', choices=['script', 'elements', 'network'], default='script',
+                      help='How justjoin offers are read: rendered cards via one script per scroll (default), '
+                           'per-element WebDriver calls, or the JSON the page fetches')
+    parser.add_argument('--backfill-fingerprints', action='store_true',
+                      help='Recompute stable job IDs and fingerprints for stored jobs, collapse duplicates '
+                           'and mark cross-source near duplicates, then exit')
+    parser.add_argument('--lean', action='store_true',
+                      help='Block images, media, fonts and third-party trackers in the browser')
+    parser.add_argument('--session-pages', type=int, default=200, metavar='N',
+                      help='Restart a pooled browser session after N page loads (default: 200)')
+    parser.add_argument('--resume', action='store_true',
+                      help='Continue tasks whose last run did not finish from their last completed page')
+    parser.add_argument('--export', nargs='+', choices=EXPORT_FORMATS, default=['ndjson', 'csv'],
+                      help='Formats written under output/source=<source>/date=<day>/ (default: ndjson csv)')
+    parser.add_argument('--batch-size', type=int, default=200, metavar='N',
+                      help='Hand jobs to the database and output files in batches of N (default: 200)')
+    parser.add_argument('--queue-size', type=int, default=8, metavar='N',
+                      help='Batches that may wait for the writer before scrapers pause (default: 8)')
+    parser.add_argument('--flush-rows', type=int, default=1000, metavar='N',
+                      help='The database writer saves buffered jobs once N have piled up (default: 1000)')
+    parser.add_argument('--flush-interval', type=float, default=2.0, metavar='SECONDS',
+                      help='...or this long after the first buffered job, whichever comes first (default: 2)')
+    parser.add_argument('--metrics-dir', default=os.path.join('output', 'metrics'), metavar='DIR',
+                      help='Write the JSON run report and crawler.prom here; point it at the node_exporter '
+                           'textfile directory to scrape the run metrics (default: output/metrics)')
+    parser.add_argument('--rate', type=float, default=2.0, metavar='PER_SECOND',
+                      help='Requests per second each site starts at; the rate adapts between 0.1 and --max-rate '
+                           'as responses come back healthy or throttled (default: 2)')
+    parser.add_argument('--max-rate', type=float, default=20.0, metavar='PER_SECOND',
+                      help='Upper bound of the adaptive per-site request rate (default: 20)')
+    parser.add_argument('--max-in-flight', type=int, default=4, metavar='N',
+                      help='Requests to one site in progress at the same time, across all workers (default: 4)')
+    parser.add_argument('--page-retries', type=int, default=2, metavar='N',
+                      help='Retries of a page (or scroll step) that fails to load, with backoff; pages that still '
+                           'fail are tried once more at the end of the crawl (default: 2)')
+    parser.add_argument('--page-timeout', type=parse_duration, default=30.0, metavar='DURATION',
+                      help='How long a single page load or fetch may take, e.g. 30 or 1m (default: 30s)')
+    parser.add_argument('--every', nargs='+', default=['24h'], metavar='[SOURCE=]INTERVAL',
+                      help='daemon: how often each source runs, e.g. 6h or third_page=12h; a bare interval '
+                           'applies to every source not named (default: 24h)')
+    parser.add_argument('--jitter', type=parse_duration, default=300, metavar='SECONDS',
+                      help='daemon: delay every scheduled run by a random 0..SECONDS (default: 300)')
+    parser.add_argument('--status-host', default='127.0.0.1', metavar='HOST',
+                      help='daemon: address of the JSON status endpoint (default: 127.0.0.1)')
+    parser.add_argument('--status-port', type=int, default=8787, metavar='PORT',
+                      help='daemon: port of the JSON status endpoint, 0 to disable (default: 8787)')
+    parser.add_argument('--crawl-id', default=time.strftime('%Y%m%d'), metavar='ID',
+                      help='worker: the crawl to work on; workers with the same ID share its tasks, and the first '
+                           'one to start queues them (default: today\'s date)')
+    parser.add_argument('--worker-id', default=None, metavar='ID',
+                      help='worker: name of this worker in the task table (default: host:pid)')
+    parser.add_argument('--lease', type=parse_duration, default=120.0, metavar='DURATION',
+                      help='worker: how long a claimed task stays reserved without a heartbeat; tasks of a dead '
+                           'worker are taken over after this (default: 2m)')
+    parser.add_argument('--task-attempts', type=int, default=3, metavar='N',
+                      help='worker: attempts per task, across all workers, before it is marked failed (default: 3)')
+    parser.add_argument('--scroll-range', type=int, default=250, metavar='N',
+                      help='worker: list positions per justjoin task (default: 250)')
+    return parser.parse_args(argv)
+
+def selected_scrapers(names):
+    """Expand 'all' and drop repeats, keeping the order given on the command line"""
+    scrapers_to_run = []
+    for scraper_name in names:
+        names = ['second_page', 'third_page'] if scraper_name == 'all' else [scraper_name]
+        scrapers_to_run.extend(name for name in names if name not in scrapers_to_run)
+    return scrapers_to_run
+
+class CrawlResources:
+    """
+    What every crawl needs and is slow to set up: the database pool, the
+    warm browser sessions, the HTTP page cache and the checkpoint store. A
+    single run opens them once; the daemon keeps them across its runs. The
+    rate limiter is kept too, so the daemon remembers how fast each site
+    let it go.
+    """
+
+    def __init__(self, args, pool):
+        from utils.driver_pool import DriverPool
+        from utils.http_cache import HttpCache
+        from utils.checkpoint import CheckpointStore
+        from utils.rate_limit import RateLimiter
+
+        workers = max(1, args.parallel)
+        self.pool = pool
+        self.driver_pool = DriverPool(headless=args.headless, max_pages_per_session=args.session_pages,
+                                      max_idle=workers, lean=args.lean)
+        # --full fetches every page in full; the cache is only refreshed then
+        self.http_cache = HttpCache(revalidate=not args.full) if args.http and not args.no_http_cache else None
+        self.checkpoints = CheckpointStore()
+        self.rate_limiter = RateLimiter(rate=args.rate, max_rate=args.max_rate, max_in_flight=max(1, args.max_in_flight))
+
+    def close(self):
+        logger.info(f"Rate limits: {self.rate_limiter.summary()}")
+        self.checkpoints.close()
+        if self.http_cache:
+            logger.info(f"HTTP cache: {self.http_cache.summary()}")
+            self.http_cache.close()
+        # Quit any browsers still held by the pool
+        self.driver_pool.close()
+
+def run_crawl(args, scrapers_to_run, resources, run_id, slots=None, metrics_labels=None,
+              prometheus_name='crawler.prom', work_queue=None):
+    """
+    Scrape scrapers_to_run once with the shared resources and write the run
+    report. At most `slots` tasks scrape at a time (a semaphore, shared when
+    several crawls run at once; --parallel when not given). With a
+    work_queue the tasks are claimed from it instead, until the queued
+    crawl has no open tasks left. Returns a summary of the run; failed
+    tasks and batches are reported in it rather than raised.
+    """
+    from utils.known_jobs import KnownJobs
+    from utils.db import borrow_connection, instrument_connection
+    from utils.db_writer import DatabaseWriter
+    from utils.pipeline import JobPipeline, batched
+    from utils.export import JobExporter
+    from utils.instrumentation import RunMetrics
+    from utils.checkpoint import Checkpoint
+
+    metrics = RunMetrics(run_id, labels=metrics_labels)
+    workers = max(1, args.parallel)
+    slots = slots or threading.BoundedSemaphore(workers)
+
+    # Create output directory if it doesn't exist
+    output_dir = "output"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Incremental mode: preload what is already stored so scrapers can stop early.
+    # Queued pages are independent tasks, so a queued crawl always walks them all
+    known_jobs = None
+    if not args.full and work_queue is None:
+        # Sources started together by the daemon share the pool with the writers still running
+        connection = borrow_connection(resources.pool)
+        try:
+            with instrument_connection(connection, metrics.db):
+                known_jobs = KnownJobs.load(connection, scrapers_to_run)
+        finally:
+            resources.pool.putconn(connection)
+
+    task_options = dict(fetch_mode='http' if args.http else 'browser', http_cache=resources.http_cache,
+                        justjoin_mode=args.justjoin_mode, headless=args.headless, driver_pool=resources.driver_pool,
+                        rate_limiter=resources.rate_limiter, known_jobs=known_jobs,
+                        stop_after_known=args.stop_after_known, page_retries=max(0, args.page_retries),
+                        page_timeout=args.page_timeout)
+    if work_queue is None:
+        tasks = build_tasks(scrapers_to_run, **task_options)
+        logger.info(f"Running {len(tasks)} tasks from {', '.join(scrapers_to_run)} with {workers} worker(s)")
+        progress = ProgressTracker(len(tasks), workers)
+    else:
+        logger.info(f"Working on crawl {work_queue.crawl_id} as {work_queue.worker_id} with {workers} worker(s)")
+
+    total_jobs = 0
+    failed_tasks = []
+    crawl_stats = {}
+    start_time = time.time()
+    exporter = JobExporter(output_dir, args.export, run_id)
+    # Jobs are written by a background thread while the crawl goes on
+    writer = DatabaseWriter(resources.pool, flush_rows=max(1, args.flush_rows), flush_interval=args.flush_interval,
+                            max_pending=max(1, args.queue_size), timer=metrics.db)
+    writer.start()
+    pipeline = JobPipeline(exporter, writer, max_batches=max(1, args.queue_size), metrics=metrics)
+    pipeline.start()
+
+    def run_task(label, source, task, claimed=None):
+        # Jobs go to the pipeline while the crawl continues, so nothing is
+        # held here and a failed task keeps everything submitted before it
+        with slots:
+            task_start_time = time.time()
+            logger.info(f"Starting {label}...")
+            # A queued task's progress is kept by the queue; its checkpoint only reports page saves
+            checkpoint = (Checkpoint(None, label, run_id) if claimed
+                          else resources.checkpoints.start(label, run_id, resume=args.resume))
+            scraper, jobs = task(checkpoint=checkpoint)
+            job_count = 0
+            error = None
+            # Batches are saved in the order they are submitted. Each reports back once
+            # written, and only then do the pages it completes count for the checkpoint
+            unsaved = []
+
+            def on_saved(batch=()):
+                pages = checkpoint.take_staged()
+
+                def saved(ok):
+                    if not ok:
+                        unsaved.append(len(batch))
+                    checkpoint.pages_saved(pages, ok)
+                return saved
+
+            try:
+                for batch in batched(jobs, max(1, args.batch_size)):
+                    pipeline.submit(batch, source, on_saved=on_saved(batch))
+                    job_count += len(batch)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                # Pages handed over after the last batch, e.g. ones without new jobs
+                pipeline.submit([], source, on_saved=on_saved())
+                metrics.record_scraper(source, label, scraper, job_count, error)
+            if claimed:
+                settle_claimed(claimed, scraper, job_count, unsaved)
+            return job_count, scraper.crawl_stats, time.time() - task_start_time
+
+    def settle_claimed(claimed, scraper, job_count, unsaved):
+        # The first page knows how many there are; queue the rest before this task counts as done
+        if claimed.payload.get('page') == 1 and scraper.crawl_stats.get('pages_total'):
+            work_queue.enqueue(page_tasks(claimed.source, 2, scraper.crawl_stats['pages_total']))
+
+        def saved(ok):
+            # Called after every batch of the task was written; any that was not sends it back
+            if ok and not unsaved:
+                work_queue.complete(claimed, job_count)
+            else:
+                work_queue.fail(claimed, f"{sum(unsaved)} of its jobs could not be saved")
+        pipeline.submit([], claimed.source, on_saved=saved)
+
+    def listed_results():
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as executor:
+            futures = {executor.submit(run_task, label, source, task): label for label, source, task in tasks}
+            for future in as_completed(futures):
+                yield futures[future], future, None
+
+    def claimed_results():
+        # Claim only as many tasks as there are free workers, so the rest stay with other processes
+        poll_interval = min(5.0, work_queue.lease / 4)
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as executor:
+            while True:
+                while len(running) < workers:
+                    claimed = work_queue.claim()
+                    if claimed is None:
+                        break
+                    task = lambda claimed=claimed, **task_extra: open_queue_task(
+                        claimed.source, claimed.payload, **task_options, **task_extra)
+                    future = executor.submit(run_task, claimed.label, claimed.source, task, claimed)
+                    running[future] = claimed
+                if not running:
+                    # Other workers may still queue pages or die and leave their tasks to be reclaimed
+                    if work_queue.stop_requested.is_set() or work_queue.finished():
+                        return
+                    work_queue.stop_requested.wait(poll_interval)
+                    continue
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    claimed = running.pop(future)
+                    yield claimed.label, future, claimed
 
-        total_jobs = 0
-        start_time = time.time()
+    try:
+        for label, future, claimed in (claimed_results() if work_queue else listed_results()):
+            try:
+                job_count, stats, duration = future.result()
+            except Exception as e:
+                logger.error(f"{label} failed: {e}")
+                failed_tasks.append(label)
+                if claimed:
+                    work_queue.fail(claimed, e)
+                continue
+
+            total_jobs += job_count
+            crawl_stats[label] = stats
+            if work_queue is None:
+                progress.task_done(label, duration, job_count)
+            else:
+                logger.info(f"{label} completed in {duration:.2f} seconds with {job_count} jobs")
+    finally:
+        # Flush whatever the workers already handed over, even after a failure
+        pipeline.close()
+        writer.close()
+
+    # Calculate total time
+    end_time = time.time()
+    total_duration = end_time - start_time
+
+    failed_batches = len(pipeline.errors) + len(writer.errors)
+    if failed_tasks or failed_batches:
+        logger.warning(f"Completed with failures: {len(failed_tasks)} task(s) failed, "
+                       f"{failed_batches} batch(es) could not be saved")
+    else:
+        logger.info(f"All scrapers completed successfully!")
+    for source, counts in writer.counts.items():
+        logger.info(f"{source}: {counts['inserted']} new, {counts['skipped']} already known")
+    if known_jobs is not None:
+        log_incremental_summary(crawl_stats)
+    logger.info(f"Total jobs scraped: {total_jobs}")
+    logger.info(f"Total time: {total_duration:.2f} seconds")
+    if total_jobs:
+        logger.info(f"Average time per job: {total_duration/total_jobs:.2f} seconds")
 
-        # Run each scraper
-        for i, scraper_name in enumerate(scrapers_to_run, 1):
-            scraper_start_time = time.time()
-            logger.info(f"Starting {scraper_name} scraper ({i}/{len(scrapers_to_run)})...")
+    logger.info(f"Database writer: {writer.stats['rows']} jobs in {writer.stats['flushes']} flushes "
+                f"({writer.stats['seconds']:.2f}s writing, {writer.stats['retries']} retries, "
+                f"{writer.stats['rejected']} rejected jobs dropped, "
+                f"{writer.stats['blocked_seconds']:.2f}s of backpressure)")
+    metrics.finish(total_jobs=total_jobs, failed_tasks=failed_tasks, failed_batches=failed_batches,
+                   saved=writer.counts, db_writer=writer.stats, rate_limits=resources.rate_limiter.as_dict(),
+                   **({'work_queue': work_queue.as_dict()} if work_queue else {}))
+    for page in metrics.slowest_pages(3):
+        logger.info(f"Slow page: {page['task']} page {page['page']} took {page['seconds']:.2f}s "
+                    f"({', '.join(f'{name}={seconds:.2f}s' for name, seconds in page['phases'].items())})")
+    report_path, prometheus_path = metrics.write(args.metrics_dir, prometheus_name)
+    logger.info(f"Run report written to {report_path}, Prometheus metrics to {prometheus_path}")
+
+    return {
+        'run_id': run_id,
+        'jobs': total_jobs,
+        'saved': writer.counts,
+        'failed_tasks': failed_tasks,
+        'failed_batches': failed_batches,
+        'report': report_path,
+    }
 
-            if scraper_name == 'justjoin_categories':
-                # Handle justjoin categories scraping
-                jobs = scrape_justjoin_categories(headless=args.headless)
-                jobs_list = list(jobs.values())
-                total_jobs += len(jobs_list)
+def run_daemon(args, scrapers_to_run, resources):
+    """
+    Scrape each source on its own interval until SIGTERM or Ctrl+C, keeping
+    the resources warm between runs. All sources share --parallel task
+    slots, and a failing source only affects its own schedule.
+    """
+    from utils.scheduler import Scheduler, SourceSchedule, StatusServer, parse_intervals
+
+    intervals = parse_intervals(args.every, scrapers_to_run)
+    slots = threading.BoundedSemaphore(max(1, args.parallel))
+
+    def run_source(source):
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{source}"
+        # One textfile per source, told apart by the schedule label
+        return run_crawl(args, [source], resources, run_id, slots=slots, metrics_labels={'schedule': source},
+                         prometheus_name=f"crawler_{source}.prom")
+
+    scheduler = Scheduler(run_source, [SourceSchedule(source, intervals[source], args.jitter)
+                                       for source in scrapers_to_run])
+    for source in scrapers_to_run:
+        logger.info(f"{source}: every {intervals[source]:g}s, up to {args.jitter:g}s of jitter")
+
+    def stop(signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the running sources finish")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    status_server = None
+    if args.status_port:
+        status_server = StatusServer(scheduler, args.status_host, args.status_port)
+        status_server.start()
+        logger.info(f"Status endpoint listening on {status_server.address}")
+    try:
+        scheduler.run_forever()
+    finally:
+        if status_server:
+            status_server.close()
 
-                # Save results
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                json_path = os.path.join(output_dir, f"justjoin_categories_{timestamp}.json")
-                csv_path = os.path.join(output_dir, f"justjoin_categories_{timestamp}.csv")
+def run_worker(args, scrapers_to_run, resources):
+    """
+    Work on the queued crawl --crawl-id alongside any other workers until it
+    has no open tasks left. The crawl's first tasks are queued here if no
+    worker has done so yet. SIGTERM or Ctrl+C stops claiming new tasks;
+    the ones already claimed are finished first.
+    """
+    from utils.work_queue import WorkQueue
 
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(jobs_list, f, ensure_ascii=False, indent=4)
+    work_queue = WorkQueue(resources.pool, args.crawl_id, args.worker_id, lease=args.lease,
+                           max_attempts=max(1, args.task_attempts)).start()
 
-                df = pd.DataFrame(jobs_list)
-                df.to_csv(csv_path, index=False, encoding='utf-8')
+    def stop(signum, frame):
+        logger.info(f"Received signal {signum}, finishing the claimed tasks without taking new ones")
+        work_queue.stop()
 
-                # Save to database
-                save_jobs_to_database(connection, jobs_list, 'justjoin_categories')
-            else:
-                # Initialize the chosen scraper
-                scraper = get_scraper(scraper_name, headless=args.headless)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
 
-                # Scrape the jobs
-                logger.info(f"Scraping jobs from {scraper_name}...")
-                scraper.scrape()
+    try:
+        work_queue.enqueue(queue_seed_tasks(scrapers_to_run, max(1, args.scroll_range)))
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        # One textfile per worker, so workers sharing a metrics directory do not overwrite each other
+        worker_name = "".join(char if char.isalnum() else '_' for char in work_queue.worker_id)
+        summary = run_crawl(args, scrapers_to_run, resources, run_id, work_queue=work_queue,
+                            metrics_labels={'crawl': args.crawl_id, 'worker': work_queue.worker_id},
+                            prometheus_name=f"crawler_worker_{worker_name}.prom")
+    finally:
+        work_queue.close()
+    counts = work_queue.counts()
+    logger.info(f"Crawl {args.crawl_id}: {', '.join(f'{count} {status}' for status, count in sorted(counts.items()))}")
+    return summary
 
-                # Get the scraped jobs
-                if scraper_name == 'third_page':
-                    jobs = scraper.jobs  # Germany scraper stores jobs in self.jobs
-                else:
-                    jobs = list(scraper.jobs.values())  # JustJoin and Pracuj store jobs in self.jobs dictionary
+def main():
+    args = parse_args()
 
-                # Save the jobs to the database
-                logger.info(f"Saving {len(jobs)} jobs from {scraper_name} to the database...")
-                save_jobs_to_database(connection, jobs, scraper_name)
+    from utils.db import create_connection_pool, migrate_schema, backfill_fingerprints
 
-                # Calculate progress and time
-                total_jobs += len(jobs)
-                scraper_end_time = time.time()
-                scraper_duration = scraper_end_time - scraper_start_time
+    try:
+        scrapers_to_run = selected_scrapers(args.scraper)
+        # Setup queries and background writers share one pool; the daemon
+        # may have a writer per source going at once. A worker also claims,
+        # renews and settles tasks, and each of its workers queues pages
+        if args.command == 'daemon':
+            max_connections = len(scrapers_to_run) + 1
+        elif args.command == 'worker':
+            max_connections = max(1, args.parallel) + 3
+        else:
+            max_connections = 2
+        pool = create_connection_pool(max_connections=max_connections)
+        connection = pool.getconn()
+        logger.info("Database connection successful!")
 
-                # Estimate remaining time
-                remaining_scrapers = len(scrapers_to_run) - i
-                avg_time_per_scraper = (scraper_end_time - start_time) / i
-                estimated_remaining_time = avg_time_per_scraper * remaining_scrapers
+        # Apply pending schema migrations; a single query when the schema is current
+        migrate_schema(connection)
 
-                logger.info(f"{scraper_name} scraper completed in {scraper_duration:.2f} seconds")
-                logger.info(f"Progress: {i}/{len(scrapers_to_run)} scrapers ({(i/len(scrapers_to_run))*100:.1f}%)")
-                logger.info(f"Estimated time remaining: {estimated_remaining_time:.1f} seconds")
+        if args.backfill_fingerprints:
+            backfill_fingerprints(connection)
+            return
+        pool.putconn(connection)
 
-        # Calculate total time
-        end_time = time.time()
-        total_duration = end_time - start_time
+        resources = CrawlResources(args, pool)
+        if args.command == 'daemon':
+            run_daemon(args, scrapers_to_run, resources)
+            return
+        if args.command == 'worker':
+            summary = run_worker(args, scrapers_to_run, resources)
+            # Failed tasks went back to the queue for another attempt; only lost writes are an error here
+            if summary['failed_batches']:
+                raise RuntimeError(f"Failed batches: {summary['failed_batches']}")
+            return
 
-        logger.info(f"All scrapers completed successfully!")
-        logger.info(f"Total jobs scraped: {total_jobs}")
-        logger.info(f"Total time: {total_duration:.2f} seconds")
-        logger.info(f"Average time per job: {total_duration/total_jobs:.2f} seconds")
+        summary = run_crawl(args, scrapers_to_run, resources, time.strftime("%Y%m%d_%H%M%S"))
+        if summary['failed_tasks'] or summary['failed_batches']:
+            raise RuntimeError(f"Failed tasks: {', '.join(summary['failed_tasks']) or 'none'}; "
+                               f"failed batches: {summary['failed_batches']}")
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         raise
     finally:
-        # Close database connection if it exists
-        if 'connection' in locals():
-            connection.close()
+        if 'resources' in locals():
+            resources.close()
+
+        # Close the pooled database connections
+        if 'pool' in locals():
+            pool.closeall()
             logger.info("Database connection closed.")
 
 if __name__ == "__main__":
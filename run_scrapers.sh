@@ -3,29 +3,14 @@
 # Activate virtual environment
 source venv/bin/activate
 
-# Function to run scraper and check for errors
-run_scraper() {
-    local scraper_name=$1
-    local display_name=$2
-    echo "Starting $display_name..."
-    if python main.py --scraper "$scraper_name" --headless; then
-        echo "$display_name completed successfully."
-    else
-        echo "Error: $display_name failed."
-        exit 1
-    fi
-}
+# Scraper tasks running at the same time across all sources, each with its own browser
+PARALLEL=${PARALLEL:-3}
+# How often each source runs; a bare interval applies to every source not named
+EVERY=${EVERY:-24h}
 
-# Run the JustJoin categories scraper
-run_scraper "justjoin_categories" "JustJoin Categories scraper"
-
-# Run the second scraper
-run_scraper "second_page" "Pracuj scraper"
-
-# Run the third scraper
-run_scraper "third_page" "Germany Jobs scraper"
-
-# Deactivate virtual environment
-deactivate
-
-echo "All scrapers have completed their execution."
+# One long-lived process: imports, the database pool and the browsers stay warm
+# between runs, and a failing source is retried on its next run without
+# stopping the others. Run status: curl http://127.0.0.1:8787/status
+echo "Starting the scraper daemon for JustJoin Categories, Pracuj and Germany Jobs..."
+exec python main.py daemon --scraper justjoin_categories second_page third_page --parallel "$PARALLEL" --headless \
+    --every $EVERY
@@ -1,105 +1,480 @@
 import time
-import json
-import pandas as pd
 from collections import OrderedDict
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
+from contextlib import nullcontext
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.firefox import GeckoDriverManager
+from selenium.common.exceptions import WebDriverException
+from utils.driver_pool import create_firefox_driver, restart_driver
+from utils.instrumentation import WebDriverCommandCounter, PhaseTimer, PageLoadStats
+from utils.waits import Waiter, new_data_index_beyond
+from utils.network_capture import install_capture_hook, drain_captured
+from utils.known_jobs import IncrementalTracker
+from utils.rate_limit import RateLimiter
+from utils.retry import PageRetry
+from utils.export import export_jobs
 from utils.logger import Logger  # Import custom Loguru logger
 
 logger = Logger()  # Initialize logger
 
+# Collects every visible job card in one round trip. Mirrors _parse_job_element:
+# same selectors, same fallbacks, and cards whose index is already known are
+# skipped in the browser so they are never serialized back.
+EXTRACT_JOBS_SCRIPT = """
+const known = new Set(arguments[0]);
+const text = (root, selector) => {
+    const element = root.querySelector(selector);
+    return element ? element.innerText : null;
+};
+const jobs = [];
+for (const card of document.querySelectorAll('[data-index]')) {
+    const dataIndex = card.getAttribute('data-index');
+    if (known.has(dataIndex)) continue;
+
+    const title = text(card, 'h3');
+    if (title === null) continue;
+
+    let salary = 'N/A';
+    const salaryContainer = card.querySelector('div.MuiBox-root.css-18ypp16');
+    if (salaryContainer) {
+        if (salaryContainer.innerText.includes('Undisclosed Salary')) {
+            salary = 'Undisclosed Salary';
+        } else {
+            const spans = salaryContainer.querySelectorAll('span');
+            salary = spans.length >= 3
+                ? `${spans[0].innerText.trim()} - ${spans[1].innerText.trim()} ${spans[2].innerText.trim()}`
+                : salaryContainer.innerText.trim();
+        }
+    }
+
+    const remote = document.evaluate(
+        ".//span[contains(text(), 'Fully remote')] | .//span[contains(text(), 'remote')]",
+        card, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+
+    const skills = [];
+    for (const skill of card.querySelectorAll('div.skill-tag-1 div, div.skill-tag-2 div, div.skill-tag-3 div')) {
+        const skillText = skill.innerText.trim();
+        if (skillText && skillText.toLowerCase() !== 'new') skills.push(skillText);
+    }
+
+    const link = card.querySelector('a');
+    const logo = card.querySelector('img#offerCardCompanyLogo');
+    jobs.push({
+        data_index: dataIndex,
+        title: title,
+        company: text(card, 'div.MuiBox-root.css-1kb0cuq > span:nth-child(2)') ?? 'N/A',
+        company_logo: logo ? logo.src : 'N/A',
+        salary: salary,
+        location: text(card, 'span.css-1o4wo1x') ?? 'N/A',
+        remote_status: remote ? remote.innerText : 'Not specified',
+        skills: skills,
+        url: link ? link.href : 'N/A'
+    });
+}
+return jobs;
+"""
+
+
+# Offer list responses of justjoin's API (and of the local stand-in)
+JUSTJOIN_OFFERS_PATTERN = r"/offers(\?|$)"
+
+
+def _amount(value):
+    return f"{value:,.0f}".replace(",", " ")
+
+
+def map_justjoin_offer(offer, data_index, page_url):
+    """Map one offer from the offers JSON to the job dict the DOM extraction produces"""
+    employment = (offer.get('employmentTypes') or [{}])[0]
+    if employment.get('from') is not None and employment.get('to') is not None:
+        currency = (employment.get('currency') or '').upper()
+        salary = f"{_amount(employment['from'])} - {_amount(employment['to'])} {currency}".strip()
+    else:
+        salary = "Undisclosed Salary"
+
+    skills = [skill.get('name') if isinstance(skill, dict) else skill for skill in offer.get('requiredSkills') or []]
+    logo = offer.get('companyLogoThumbUrl')
+    return {
+        'data_index': data_index,
+        'title': offer.get('title') or "N/A",
+        'company': offer.get('companyName') or "N/A",
+        'company_logo': urljoin(page_url, logo) if logo else "N/A",
+        'salary': salary,
+        'location': offer.get('city') or "N/A",
+        'remote_status': "Fully remote" if offer.get('workplaceType') == 'remote' else "Not specified",
+        'skills': [skill for skill in skills if skill and skill.lower() != 'new'],
+        'url': urljoin(page_url, f"/job-offer/{offer['slug']}"),
+        # Only available from the JSON feed
+        'published': (offer.get('publishedAt') or '')[:10] or "N/A",
+        'contract_type': employment.get('type') or '',
+    }
+
 
 class FirstScraper:
-    def __init__(self, url, headless=True):
+    def __init__(self, url, headless=True, driver_pool=None, extraction_mode='script',
+                 known_jobs=None, stop_after_known=20, max_jobs=1000, lean=False,
+                 capture_pattern=JUSTJOIN_OFFERS_PATTERN, checkpoint=None, rate_limiter=None,
+                 page_timeout=30, page_retries=2, index_range=None):
         self.url = url
+        self.headless = headless
+        self.lean = lean
+        self.page_timeout = page_timeout
+        # Shared with the other scrapers of the run; every load and scroll goes through it
+        self.rate_limiter = rate_limiter or RateLimiter()
         self.jobs = OrderedDict()
-
-        firefox_options = Options()
-        if headless:
-            firefox_options.add_argument("--headless")
-        firefox_options.add_argument("--width=1920")
-        firefox_options.add_argument("--height=1080")
-        firefox_options.set_preference("dom.webnotifications.enabled", False)
-        firefox_options.set_preference("app.update.enabled", False)
-
-        logger.info("Setting up Firefox WebDriver...")
-        self.driver = webdriver.Firefox(service=Service(GeckoDriverManager().install()), options=firefox_options)
-        self.max_jobs = 1000
+        # Keys of the jobs read so far and the extracted jobs not yet yielded
+        self.seen = set()
+        self.pending = []
+        self.driver_pool = driver_pool
+        self.timer = PhaseTimer()
+        with self.timer.phase('driver_start'):
+            self.driver = driver_pool.acquire() if driver_pool else create_firefox_driver(headless, lean)
+        self.driver.set_page_load_timeout(page_timeout)
+        # A failing load or scroll step is retried after reopening the list at the same offset
+        self.retry = PageRetry('justjoin_categories', attempts=page_retries + 1, retry_on=(WebDriverException,))
+        self.scroll_y = 0
+        self.list_reopened = False
+        # 'script' reads all cards with one execute_script per scroll,
+        # 'elements' walks them with find_element calls and 'network'
+        # reads the offers JSON the page fetches instead of the DOM
+        self.extraction_mode = extraction_mode
+        self.capture_pattern = capture_pattern
+        self.captured_slugs = set()
+        self.total_offers = None
+        self.command_counter = WebDriverCommandCounter().attach(self.driver)
+        self.waiter = Waiter(self.driver, timer=self.timer)
+        self.page_stats = PageLoadStats()
+        # Optional (start, end) of the list positions to hand over, for one
+        # work queue task. The list can only be scrolled from the top, so
+        # the offers before start are still read, just not yielded
+        self.index_range = index_range
+        self.max_jobs = min(max_jobs, index_range[1]) if index_range else max_jobs
         self.last_seen_index = -1
-        logger.info("Firefox WebDriver setup complete")
+        # Offers are listed newest first, so a run of known offers means the rest is known too
+        self.incremental = IncrementalTracker(known_jobs, 'justjoin_categories', stop_after_known)
+        self.crawl_stats = {'pages_visited': 0, 'pages_total': None, 'stopped_early': False, 'known_seen': 0}
+        # Optional Checkpoint. The virtual list cannot be entered mid-way, so a
+        # resumed crawl scrolls from the top but skips offers already handed over
+        self.checkpoint = checkpoint
+
+    @property
+    def job_count(self):
+        return len(self.seen)
 
     def scrape(self, scroll_pause_time=2):
+        """Scrape the whole list and return it; iter_jobs() streams it instead"""
+        self.jobs = OrderedDict((job['data_index'], job) for job in self.iter_jobs(scroll_pause_time))
+        return list(self.jobs.values())
+
+    def iter_jobs(self, scroll_pause_time=2):
+        """
+        Yield jobs as they are extracted. Only the keys of yielded jobs are
+        kept, so memory does not grow with the size of the crawl.
+        """
         try:
-            logger.info(f"Navigating to {self.url}")
-            self.driver.get(self.url)
+            if self.extraction_mode == 'network' and not install_capture_hook(self.driver, self.capture_pattern):
+                logger.warning("Falling back to script extraction")
+                self.extraction_mode = 'script'
 
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-index]"))
-            )
+            logger.info(f"Navigating to {self.url}")
+            # Screens are numbered from 1; scrolling and waiting count towards the screen they load
+            self.timer.current_page = 1
+            self.retry.call(1, self._open_list, self._recover_load)
             logger.info("Page loaded successfully")
 
-            scroll_count = 0
-            no_new_jobs_count = 0
+            if self.extraction_mode == 'network':
+                yield from self._scroll_network(scroll_pause_time)
+            else:
+                yield from self._scroll_dom(scroll_pause_time)
+
+            self.crawl_stats['known_seen'] = self.incremental.known_seen
+            if self.checkpoint:
+                self.checkpoint.complete()
+            logger.info(f"Scraping finished. Total jobs collected: {self.job_count}")
+            logger.info(f"Issued {self.command_counter.summary()}")
+            logger.info(f"Waits: {self.waiter.summary()}")
+            logger.info(f"Phases: {self.timer.summary()}")
+            logger.info(f"Page loads: {self.page_stats.summary()}")
+
+        except Exception as e:
+            logger.error(f"An error occurred during scraping: {str(e)}")
+            # Whatever was extracted before the error is still worth keeping
+            yield from self._take_pending()
+            if self.checkpoint:
+                self.checkpoint.page_failed(self.crawl_stats['pages_visited'] + 1)
+            raise
+
+        finally:
+            self.close_driver()
+            logger.info("Browser closed")
 
-            while len(self.jobs) < self.max_jobs and no_new_jobs_count < 5:
-                current_job_count = len(self.jobs)
-                self._extract_visible_jobs()
+    def _scroll_dom(self, scroll_pause_time):
+        """Scroll one viewport at a time and read the rendered cards"""
+        scroll_count = 0
+        no_new_jobs_count = 0
+
+        while self.job_count < self.max_jobs and no_new_jobs_count < 5:
+            current_job_count = self.job_count
+            self.retry.call(scroll_count + 1, self._extract_step, self._recover)
+            self.crawl_stats['pages_visited'] = scroll_count + 1
+            yield from self._take_pending()
+
+            if self.incremental.should_stop:
+                logger.info(f"Stopping after {self.incremental.consecutive_known} consecutive known offers "
+                            f"({scroll_count} scrolls)")
+                self.crawl_stats['stopped_early'] = True
+                break
+
+            if self.job_count > current_job_count:
+                logger.info(f"Found {self.job_count - current_job_count} new jobs. Total: {self.job_count}")
+                no_new_jobs_count = 0
+            else:
+                no_new_jobs_count += 1
+                logger.warning(f"No new jobs found. Attempt {no_new_jobs_count}/5")
+                if self._reached_end_of_list():
+                    logger.info("Reached the end of the list")
+                    break
+
+            scroll_count += 1
+            self.timer.current_page = scroll_count + 1
+            self.retry.call(scroll_count, lambda: self._scroll_step(scroll_count, scroll_pause_time), self._recover)
+            if self.list_reopened:
+                # The reopened list gets its full number of attempts to load past the old position
+                self.list_reopened = False
+                no_new_jobs_count = 0
+
+    def _scroll_step(self, scroll_count, scroll_pause_time):
+        # A scroll makes the list fetch its next batch, so it is paced like a page load
+        with self.rate_limiter.acquire(self.url, self.timer) as ticket:
+            with self.timer.phase('navigation'):
+                self.scroll_y = self.driver.execute_script("window.scrollBy(0, window.innerHeight); return window.scrollY;")
+            logger.info(f"Scrolling... (#{scroll_count})")
+            # Continue as soon as the virtual list renders cards past the last one
+            # seen; scroll_pause_time is only the upper bound now
+            self.waiter.for_new_cards(self.last_seen_index, timeout=scroll_pause_time)
+            ticket.page_loaded(self.page_stats.record(self.driver, f'scroll {scroll_count}'))
+
+    def _extract_step(self):
+        with self.timer.phase('extraction'):
+            self._extract_visible_jobs()
+
+    def _scroll_network(self, scroll_pause_time):
+        """
+        Read offers from the JSON responses the page fetches while scrolling.
+        Each scroll jumps to the bottom of the list, which is enough to make
+        the page request its next batch.
+        """
+        scroll_count = 0
+        no_new_jobs_count = 0
+        # The request a scroll triggers is paced like a page load; it counts as
+        # finished once its responses have been waited for
+        ticket = None
 
-                if len(self.jobs) > current_job_count:
-                    logger.info(f"Found {len(self.jobs) - current_job_count} new jobs. Total: {len(self.jobs)}")
+        try:
+            while self.job_count < self.max_jobs and no_new_jobs_count < 5:
+                responses = self.retry.call(scroll_count + 1, lambda: self._drain_step(scroll_pause_time, ticket),
+                                            self._recover)
+                if self.list_reopened:
+                    self.list_reopened = False
+                    no_new_jobs_count = 0
+                if responses is None:
+                    logger.warning("Network capture hook is not active in the page, falling back to script extraction")
+                    self.extraction_mode = 'script'
+                    yield from self._scroll_dom(scroll_pause_time)
+                    return
+
+                new_jobs = self._add_captured_offers(responses)
+                self.crawl_stats['pages_visited'] = scroll_count + 1
+                yield from self._take_pending()
+
+                if self.incremental.should_stop:
+                    logger.info(f"Stopping after {self.incremental.consecutive_known} consecutive known offers "
+                                f"({scroll_count} scrolls)")
+                    self.crawl_stats['stopped_early'] = True
+                    break
+
+                if new_jobs:
+                    logger.info(f"Captured {new_jobs} new jobs. Total: {self.job_count}")
                     no_new_jobs_count = 0
                 else:
                     no_new_jobs_count += 1
-                    logger.warning(f"No new jobs found. Attempt {no_new_jobs_count}/5")
+                    logger.warning(f"No new offers captured. Attempt {no_new_jobs_count}/5")
+
+                if self.total_offers is not None and len(self.captured_slugs) >= self.total_offers:
+                    logger.info("Reached the end of the list")
+                    break
 
-                self.driver.execute_script("window.scrollBy(0, window.innerHeight);")
                 scroll_count += 1
+                self.timer.current_page = scroll_count + 1
+                ticket = self.retry.call(scroll_count, self._scroll_to_bottom, self._recover)
                 logger.info(f"Scrolling... (#{scroll_count})")
-                time.sleep(scroll_pause_time)
-
-            logger.info(f"Scraping finished. Total jobs collected: {len(self.jobs)}")
-            return list(self.jobs.values())
-
-        except Exception as e:
-            logger.error(f"An error occurred during scraping: {str(e)}")
-            return list(self.jobs.values())
-
         finally:
+            if ticket:
+                ticket.done()
+
+    def _drain_step(self, scroll_pause_time, ticket):
+        # The scroll's ticket is finished here, before a retry could reopen the list
+        with ticket or nullcontext():
+            self.waiter.for_captured_responses(timeout=scroll_pause_time)
+        with self.timer.phase('extraction'):
+            return drain_captured(self.driver)
+
+    def _scroll_to_bottom(self):
+        """Scroll to the end of the list; the returned ticket stays open until the batch it triggers arrives"""
+        ticket = self.rate_limiter.acquire(self.url, self.timer)
+        try:
+            with self.timer.phase('navigation'):
+                self.scroll_y = self.driver.execute_script(
+                    "window.scrollTo(0, document.documentElement.scrollHeight); return window.scrollY;")
+        except WebDriverException:
+            ticket.done(error=True)
+            raise
+        return ticket
+
+    def _open_list(self):
+        with self.rate_limiter.acquire(self.url, self.timer) as ticket:
+            with self.timer.phase('navigation'):
+                self.driver.get(self.url)
+            self.waiter.for_element('page_load', (By.CSS_SELECTOR, "[data-index]"))
+            ticket.page_loaded(self.page_stats.record(self.driver, 'initial'))
+
+    def _restart_session(self):
+        self.command_counter.detach()
+        with self.timer.phase('driver_start'):
+            self.driver = restart_driver(self.driver, self.driver_pool, self.headless, self.lean)
+        self.driver.set_page_load_timeout(self.page_timeout)
+        self.command_counter.attach(self.driver)
+        self.waiter.driver = self.driver
+        # Without the add-on no responses are captured and the crawl falls back to script extraction
+        if self.extraction_mode == 'network':
+            install_capture_hook(self.driver, self.capture_pattern)
+
+    def _recover_load(self, level):
+        """Escalation before retrying the initial load, which opens the list itself"""
+        if level == 'new_session':
+            self._restart_session()
+
+    def _recover(self, level):
+        """
+        Escalation before retrying a scroll step: reopen the list, in a new
+        session on the last retry, and jump back to the last scroll offset.
+        The virtual list may render a little before or after it; cards
+        already seen are skipped either way.
+        """
+        if level == 'new_session':
+            self._restart_session()
+        self._open_list()
+        self.driver.execute_script("window.scrollTo(0, arguments[0]);", self.scroll_y)
+        self.list_reopened = True
+
+    def _add_captured_offers(self, responses):
+        """Map captured offers JSON to job dicts; returns how many offers were new"""
+        scraped_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        new_jobs = 0
+        for response in responses:
+            body = response.get('body')
+            offers = body.get('data') if isinstance(body, dict) else body
+            if not isinstance(offers, list):
+                continue
+            meta = body.get('meta') if isinstance(body, dict) else None
+            if isinstance(meta, dict) and meta.get('totalItems') is not None:
+                self.total_offers = meta['totalItems']
+
+            for offer in offers:
+                slug = offer.get('slug') if isinstance(offer, dict) else None
+                if not slug or slug in self.captured_slugs:
+                    continue
+                self.captured_slugs.add(slug)
+                # Same meaning as the DOM modes: the offer's position in the list
+                data_index = str(self.job_count)
+                job_data = map_justjoin_offer(offer, data_index, self.url)
+                job_data['scraped_at'] = scraped_at
+                self._add_job(data_index, job_data)
+                self.last_seen_index = int(data_index)
+                new_jobs += 1
+        return new_jobs
+
+    def _add_job(self, data_index, job_data):
+        self.seen.add(data_index)
+        if self.index_range and not self.index_range[0] <= int(data_index) < self.index_range[1]:
+            return
+        self.pending.append(job_data)
+        self.incremental.observe(job_data)
+
+    def _take_pending(self):
+        """Yield the extracted jobs not handed over yet, then checkpoint the scroll position"""
+        jobs, self.pending = self.pending, []
+        if self.checkpoint and self.checkpoint.resumed:
+            jobs = [job for job in jobs if job['url'] not in self.checkpoint.seen]
+        yield from jobs
+        if self.checkpoint:
+            self.checkpoint.page_done(self.crawl_stats['pages_visited'], [job['url'] for job in jobs])
+
+    def _reached_end_of_list(self):
+        """Scrolled to the bottom, nothing is loading and no unseen cards are rendered"""
+        at_bottom = self.driver.execute_script(
+            "return window.innerHeight + window.scrollY >= document.documentElement.scrollHeight - 2;"
+        )
+        if not at_bottom or not self.waiter.for_network_idle():
+            return False
+        return not new_data_index_beyond(self.last_seen_index)(self.driver)
+
+    def close_driver(self):
+        """Return the browser to the shared pool, or quit it when running standalone"""
+        self.command_counter.detach()
+        if self.driver_pool:
+            self.driver_pool.release(self.driver)
+        else:
             self.driver.quit()
-            logger.info("Browser closed")
 
     def _extract_visible_jobs(self):
-        try:
-            job_elements = self.driver.find_elements(By.CSS_SELECTOR, "[data-index]")
-            new_jobs = 0
-
-            for job_element in job_elements:
-                try:
-                    data_index = job_element.get_attribute("data-index")
-                    if data_index in self.jobs:
-                        continue
-
-                    index_num = int(data_index)
-                    self.last_seen_index = max(self.last_seen_index, index_num)
-                    job_data = self._parse_job_element(job_element, data_index)
-
-                    if job_data:
-                        self.jobs[data_index] = job_data
-                        new_jobs += 1
-                except Exception as e:
-                    logger.warning(f"Failed to parse job {data_index}: {str(e)}")
+        if self.extraction_mode == 'script':
+            self._extract_visible_jobs_script()
+        else:
+            self._extract_visible_jobs_elements()
+
+    def _extract_visible_jobs_script(self):
+        """
+        Extract all new visible cards with a single WebDriver round trip. A
+        failed script raises, so the step is retried instead of looking like
+        a screen without new offers.
+        """
+        job_list = self.driver.execute_script(EXTRACT_JOBS_SCRIPT, list(self.seen)) or []
+        scraped_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        for job_data in job_list:
+            data_index = job_data['data_index']
+            self.last_seen_index = max(self.last_seen_index, int(data_index))
+            job_data['scraped_at'] = scraped_at
+            self._add_job(data_index, job_data)
+
+        if job_list:
+            logger.info(f"Extracted {len(job_list)} new job listings")
+
+    def _extract_visible_jobs_elements(self):
+        # Only a single card that fails to parse is skipped; a failed lookup raises like the script mode
+        job_elements = self.driver.find_elements(By.CSS_SELECTOR, "[data-index]")
+        new_jobs = 0
+
+        for job_element in job_elements:
+            try:
+                data_index = job_element.get_attribute("data-index")
+                if data_index in self.seen:
                     continue
 
-            if new_jobs > 0:
-                logger.info(f"Extracted {new_jobs} new job listings")
+                index_num = int(data_index)
+                self.last_seen_index = max(self.last_seen_index, index_num)
+                job_data = self._parse_job_element(job_element, data_index)
 
-        except Exception as e:
-            logger.error(f"Error extracting jobs: {str(e)}")
+                if job_data:
+                    self._add_job(data_index, job_data)
+                    new_jobs += 1
+            except Exception as e:
+                logger.warning(f"Failed to parse job {data_index}: {str(e)}")
+                continue
+
+        if new_jobs > 0:
+            logger.info(f"Extracted {new_jobs} new job listings")
 
     def _parse_job_element(self, job_element, data_index):
         """Parse a job element to extract all relevant data"""
@@ -185,24 +560,9 @@ class FirstScraper:
             logger.error(f"Failed to parse job element {data_index}: {str(e)}")
             return None
 
-    def save_to_json(self, filename="jobs.json"):
-        try:
-            job_list = list(self.jobs.values())
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(job_list, f, ensure_ascii=False, indent=4)
-            logger.info(f"Successfully saved {len(job_list)} jobs to {filename}")
-        except Exception as e:
-            logger.error(f"Failed to save JSON file: {str(e)}")
-
-    def save_to_csv(self, filename="jobs.csv"):
-        try:
-            job_list = list(self.jobs.values())
-            df = pd.DataFrame(job_list)
-            df['skills'] = df['skills'].apply(lambda x: ', '.join(x) if x else '')
-            df.to_csv(filename, index=False, encoding='utf-8')
-            logger.info(f"Successfully saved {len(job_list)} jobs to {filename}")
-        except Exception as e:
-            logger.error(f"Failed to save CSV file: {str(e)}")
+    def export(self, output_dir="output", formats=('ndjson', 'csv')):
+        """Write the jobs of the last scrape() through the export layer"""
+        return export_jobs(self.jobs.values(), 'justjoin_categories', output_dir, formats)
 
 
 if __name__ == "__main__":
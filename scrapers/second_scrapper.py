@@ -1,186 +1,335 @@
 import time
-import json
-import pandas as pd
 from collections import OrderedDict
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.firefox import GeckoDriverManager
+from selenium.common.exceptions import WebDriverException
+from utils.driver_pool import create_firefox_driver, restart_driver
+from utils.instrumentation import WebDriverCommandCounter, PhaseTimer, PageLoadStats
+from utils.waits import Waiter, first_attribute
+from utils.known_jobs import IncrementalTracker
+from utils.rate_limit import RateLimiter
+from utils.retry import PageRetry
+from utils.export import export_jobs
 from utils.logger import Logger
 
 logger = Logger()
 
+OFFER_SELECTOR = 'div[data-test="default-offer"]'
+OFFERS_LIST_SELECTOR = '#offers-list > div:nth-child(4)'
+COOKIE_BUTTON_SELECTOR = '.cookies_aropjbf > div:nth-child(1) > button:nth-child(1)'
+
+# Precompiled selectors, all relative to a single offer card
+_offers = CSSSelector(OFFER_SELECTOR)
+_title = CSSSelector('[data-test="offer-title"] a')
+_salary = CSSSelector('[data-test="offer-salary"]')
+_company = CSSSelector('[data-test="text-company-name"]')
+_location = CSSSelector('[data-test="text-region"]')
+_published = CSSSelector('[data-test="text-added"]')
+_job_type = CSSSelector('li[data-test="offer-additional-info-0"]')
+_contract_type = CSSSelector('li[data-test="offer-additional-info-2"]')
+_work_conditions = CSSSelector('li[data-test="offer-additional-info-4"]')
+_technologies = CSSSelector('[data-test="technologies-list"] span')
+_short_description = CSSSelector('[data-test="section-short-description"] .invisible')
+
+
+def _text(elements, default="N/A"):
+    """Whitespace-normalized text of the first match, like WebElement.text"""
+    if not elements:
+        return default
+    return " ".join(elements[0].text_content().split())
+
+
+def parse_offers_html(page_html, page_number, base_url):
+    """Parse every offer card out of a page_source snapshot"""
+    document = lxml_html.fromstring(page_html)
+    offers = _offers(document)
+    logger.info(f"Extracting {len(offers)} offers from page {page_number}")
+
+    jobs = []
+    scraped_at = time.strftime("%Y-%m-%d %H:%M:%S")
+    for offer in offers:
+        title_elem = _title(offer)
+        job = {
+            "offer_id": offer.get("data-test-offerid"),
+            "title": _text(title_elem),
+            "url": urljoin(base_url, title_elem[0].get("href", "")) if title_elem else "N/A",
+            "salary": _text(_salary(offer)),
+            "company": _text(_company(offer)),
+            "location": _text(_location(offer)),
+            "published": _text(_published(offer)),
+            "job_type": _text(_job_type(offer)),
+            "contract_type": _text(_contract_type(offer)),
+            "work_conditions": _text(_work_conditions(offer)),
+            "technologies": [" ".join(tech.text_content().split()) for tech in _technologies(offer)],
+            "short_description": _text(_short_description(offer)),
+            'scraped_at': scraped_at
+        }
+        jobs.append(job)
+    return jobs
+
+
 class SecondScrapper:
-    def __init__(self, url, headless=True):
+    def __init__(self, url, headless=True, driver_pool=None, known_jobs=None, stop_after_known=20, lean=False,
+                 checkpoint=None, rate_limiter=None, page_timeout=30, page_retries=2):
         self.url = url
+        self.headless = headless
+        self.lean = lean
+        self.page_timeout = page_timeout
+        # Shared with the other scrapers of the run; every page load goes through it
+        self.rate_limiter = rate_limiter or RateLimiter()
         self.jobs = OrderedDict()
-        firefox_options = Options()
-        if headless:
-            firefox_options.add_argument("--headless")
-        firefox_options.add_argument("--width=1920")
-        firefox_options.add_argument("--height=1080")
-        firefox_options.set_preference("dom.webnotifications.enabled", False)
-        firefox_options.set_preference("app.update.enabled", False)
-        logger.info("Setting up Firefox WebDriver...")
-        self.driver = webdriver.Firefox(service=Service(GeckoDriverManager().install()), options=firefox_options)
+        self.driver_pool = driver_pool
+        self.timer = PhaseTimer()
+        with self.timer.phase('driver_start'):
+            self.driver = driver_pool.acquire() if driver_pool else create_firefox_driver(headless, lean)
+        self.driver.set_page_load_timeout(page_timeout)
+        # A page that will not load is retried by URL, then left for the end of the run
+        self.retry = PageRetry('second_page', attempts=page_retries + 1, retry_on=(WebDriverException,))
+        self.command_counter = WebDriverCommandCounter().attach(self.driver)
+        self.waiter = Waiter(self.driver, timer=self.timer)
+        self.page_stats = PageLoadStats()
         self.current_page = 1
+        # Keys of the jobs yielded so far; the jobs themselves are not kept
+        self.seen = set()
+        self.pending_pages = []
+        self.parse_executor = None
+        # Offers are listed newest first, so a run of known offers means the rest is known too
+        self.incremental = IncrementalTracker(known_jobs, 'second_page', stop_after_known)
+        self.crawl_stats = {'pages_visited': 0, 'pages_total': None, 'stopped_early': False, 'known_seen': 0}
+        # Optional Checkpoint; a resumed crawl opens the page after its last completed one
+        self.checkpoint = checkpoint
+        if checkpoint:
+            self.current_page = checkpoint.position + 1
+            self.seen.update(checkpoint.seen)
 
     def scrape(self):
+        """Scrape every page into self.jobs and save it; iter_jobs() streams the jobs instead"""
+        self.jobs = OrderedDict(
+            (job["offer_id"] if job["offer_id"] else job["title"], job) for job in self.iter_jobs()
+        )
+        self.export()
+
+    def iter_jobs(self):
+        """Yield jobs page by page as the parsed snapshots come in"""
+        # Parsing runs in the background while the browser moves to the next page
+        self.parse_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pracuj-parse")
+        first_page = self.current_page
         try:
-            logger.info(f"Navigating to {self.url}")
-            self.driver.get(self.url)
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#offers-list > div:nth-child(4)"))
-            )
-            logger.info("Page loaded successfully")
-            remove_cookie = self.driver.find_element(By.CSS_SELECTOR, '.cookies_aropjbf > div:nth-child(1) > button:nth-child(1)')
-            remove_cookie.click()
-            time.sleep(2)
-            self._extract_visible_jobs()
-            max_page_elem = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.listing_n1mxvncp button:last-of-type'))
-            )
-            max_page_text = max_page_elem.text.strip()
-            max_page = int(max_page_text) if max_page_text else 1
+            self.timer.current_page = first_page
+            max_page = self.retry.call(first_page, lambda: self._open_first_page(first_page), self._recover)
             logger.info(f"Total pages found: {max_page}")
+            self.crawl_stats['pages_total'] = max_page
+            self._extract_visible_jobs()
 
-            for page in range(2, max_page + 1):
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div.listing_a1ftse4d'))
-                )
+            for page in range(first_page + 1, max_page + 1):
+                self.timer.current_page = page
                 try:
-                    page_button = self.driver.find_element(
-                        By.CSS_SELECTOR, f'button[data-test="bottom-pagination-button-page-{page}"]'
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, 'div.listing_a1ftse4d'))
                     )
-                    self.driver.execute_script("arguments[0].click();", page_button)
-                    logger.info(f"Clicked page button for page {page}")
-                except Exception as e:
-                    logger.warning(f"Page button for page {page} not clickable, using Next button. Error: {e}")
-                    next_button = self.driver.find_element(
-                        By.CSS_SELECTOR, 'button[data-test="bottom-pagination-button-next"]'
-                    )
-                    self.driver.execute_script("arguments[0].click();", next_button)
-                    logger.info(f"Clicked Next button for page {page}")
+                    previous_offer_id = first_attribute(self.driver, OFFER_SELECTOR, "data-test-offerid")
+                    # The ticket only covers the page load; time spent by the consumer must not
+                    # hold the host's slot or count as server latency
+                    with self.rate_limiter.acquire(self.url, self.timer) as ticket:
+                        with self.timer.phase('navigation'):
+                            self._go_to_page(page)
+                        # Snapshot as soon as the next page's offers have replaced the old ones
+                        self.waiter.for_offer_list_replaced(OFFER_SELECTOR, "data-test-offerid", previous_offer_id)
+                        ticket.page_loaded(self.page_stats.record(self.driver, f'page {page}'))
 
+                    # Hand over the pages parsed in the background and check for known offers
+                    yield from self._collect_parsed_pages(wait=self.incremental.enabled)
+                    if self.incremental.should_stop:
+                        logger.info(f"Stopping after {self.incremental.consecutive_known} consecutive known offers "
+                                    f"on page {self.current_page}")
+                        self.crawl_stats['stopped_early'] = True
+                        break
+                except WebDriverException as e:
+                    # Pagination by clicking broke; load the page by URL instead
+                    logger.warning(f"Could not paginate to page {page}, loading it directly: {e.msg or e}")
+                    if not self._load_page(page):
+                        continue
                 self.current_page = page
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#offers-list > div:nth-child(4)"))
-                )
-                time.sleep(2)
                 self._extract_visible_jobs()
 
-            self._save_to_csv()
-            self._save_to_json()
-            self.driver.quit()
+            # Pages that kept failing get one more round now that the rest is done
+            for page in self.retry.take_failed():
+                if self._load_page(page, retried=True):
+                    self.current_page = page
+                    self._extract_visible_jobs()
+
+            yield from self._collect_parsed_pages()
+            self.crawl_stats['known_seen'] = self.incremental.known_seen
+            if self.checkpoint:
+                self.checkpoint.complete()
+            if self.crawl_stats['stopped_early']:
+                logger.info(f"Incremental crawl visited {self.crawl_stats['pages_visited']}/{max_page} pages, "
+                            f"{max_page - self.crawl_stats['pages_visited']} saved")
+            logger.info(f"Issued {self.command_counter.summary()}")
+            logger.info(f"Waits: {self.waiter.summary()}")
+            logger.info(f"Phases: {self.timer.summary()}")
+            logger.info(f"Page loads: {self.page_stats.summary()}")
             logger.info("COMPLETE", "Scraping finished")
         except Exception as e:
-            logger.error(f"An error occurred: {e}")
-            self.driver.quit()
+            # Hand over the pages parsed so far; the checkpoint stays at the last completed page
+            logger.error(f"An error occurred after page {self.current_page}: {e}")
+            yield from self._collect_parsed_pages()
+            if self.checkpoint:
+                self.checkpoint.page_failed(self.current_page + 1)
+            raise
+        finally:
+            self.close_driver()
+            self.parse_executor.shutdown()
 
-    def _extract_visible_jobs(self):
-        offers = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-test="default-offer"]')
-        logger.info(f"Extracting {len(offers)} offers from page {self.current_page}")
-        for offer in offers:
-            try:
-                offer_id = offer.get_attribute("data-test-offerid")
-            except Exception as e:
-                logger.error(f"Failed to extract offer ID: {e}")
-                offer_id = None
+    def iter_page(self, page):
+        """
+        Yield the jobs of a single listing page, for one work queue task.
+        Page 1 also reads the page count into crawl_stats['pages_total'] so
+        the other pages can be queued.
+        """
+        try:
+            self.timer.current_page = page
+            if page == 1:
+                self.crawl_stats['pages_total'] = self.retry.call(page, lambda: self._open_first_page(page),
+                                                                  self._recover)
+            else:
+                self.retry.call(page, lambda: self._open_page(page), self._recover)
+            with self.timer.phase('extraction'):
+                page_html = self.driver.page_source
+            self.crawl_stats['pages_visited'] += 1
+            yield from self._parse_page(page_html, page)
+        finally:
+            self.close_driver()
 
-            try:
-                title_elem = offer.find_element(By.CSS_SELECTOR, '[data-test="offer-title"] a')
-                title = title_elem.text.strip()
-                job_url = title_elem.get_attribute("href")
-            except Exception:
-                title = "N/A"
-                job_url = "N/A"
+    def page_url(self, page):
+        """Listing URL of a given page, used to jump straight to it when resuming"""
+        parts = urlsplit(self.url)
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != 'pn']
+        return urlunsplit(parts._replace(query=urlencode(query + [('pn', str(page))])))
 
-            try:
-                salary_elem = offer.find_element(By.CSS_SELECTOR, '[data-test="offer-salary"]')
-                salary = salary_elem.text.strip()
-            except Exception:
-                salary = "N/A"
+    def _open_page(self, page):
+        """Load a listing page by its URL and wait for the offers"""
+        page_url = self.page_url(page) if page > 1 else self.url
+        logger.info(f"Navigating to {page_url}")
+        with self.rate_limiter.acquire(page_url, self.timer) as ticket:
+            with self.timer.phase('navigation'):
+                self.driver.get(page_url)
+            self.waiter.for_element('page_load', (By.CSS_SELECTOR, OFFERS_LIST_SELECTOR))
+            ticket.page_loaded(self.page_stats.record(self.driver, f'page {page}'))
 
-            try:
-                company_elem = offer.find_element(By.XPATH, '//*[@id="offers-list"]/div[4]/div[1]/div/div/div[1]/div[2]/div[1]/div/div/div[2]/div[1]/a[1]/h3')
-                company = company_elem.text.strip()
-            except Exception:
-                company = "N/A"
+    def _open_first_page(self, page):
+        """Open the page the crawl starts at, accept cookies and return the page count"""
+        self._open_page(page)
+        logger.info("Page loaded successfully")
+        try:
+            remove_cookie = self.driver.find_element(By.CSS_SELECTOR, COOKIE_BUTTON_SELECTOR)
+            remove_cookie.click()
+            self.waiter.until('cookie_banner', EC.invisibility_of_element_located((By.CSS_SELECTOR, COOKIE_BUTTON_SELECTOR)),
+                              required=False)
+        except WebDriverException:
+            logger.warning("Cookie banner not found or already accepted")
+        max_page_elem = WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'div.listing_n1mxvncp button:last-of-type'))
+        )
+        max_page_text = max_page_elem.text.strip()
+        return int(max_page_text) if max_page_text else 1
 
-            try:
-                location_elem = offer.find_element(By.XPATH, '//*[@id="offers-list"]/div[4]/div[5]/div/div/div[1]/div[2]/div[1]/div/div/div[2]/div[2]/h4')
-                location = location_elem.text.strip()
-            except Exception:
-                location = "N/A"
+    def _load_page(self, page, retried=False):
+        """Load a page by URL with retries; False when it still fails and was left for later"""
+        try:
+            self.retry.call(page, lambda: self._open_page(page), self._recover)
+        except WebDriverException as e:
+            self.retry.page_failed(page, e)
+            if self.checkpoint:
+                self.checkpoint.page_failed(page)
+            return False
+        if retried:
+            self.retry.page_recovered(page)
+        return True
 
-            try:
-                date_elem = offer.find_element(By.CSS_SELECTOR, '[data-test="text-added"]')
-                published = date_elem.text.strip()
-            except Exception:
-                published = "N/A"
+    def _recover(self, level):
+        """Escalation before a retry; every attempt loads its page again, so a reload needs nothing extra"""
+        if level == 'new_session':
+            self.command_counter.detach()
+            with self.timer.phase('driver_start'):
+                self.driver = restart_driver(self.driver, self.driver_pool, self.headless, self.lean)
+            self.driver.set_page_load_timeout(self.page_timeout)
+            self.command_counter.attach(self.driver)
+            self.waiter.driver = self.driver
 
-            try:
-                job_type_elem = offer.find_elements(By.XPATH, '//*[@id="offers-list"]/div[4]/div[6]/div/div/div[1]/div[2]/div[1]/div/ul/li[1]')
-                job_type = job_type_elem[0].text.strip() if job_type_elem else "N/A"
-            except Exception as e:
-                logger.error(f"Failed to extract job type: {e}")
-                job_type = "N/A"
+    def _go_to_page(self, page):
+        try:
+            page_button = self.driver.find_element(
+                By.CSS_SELECTOR, f'button[data-test="bottom-pagination-button-page-{page}"]'
+            )
+            self.driver.execute_script("arguments[0].click();", page_button)
+            logger.info(f"Clicked page button for page {page}")
+        except Exception as e:
+            logger.warning(f"Page button for page {page} not clickable, using Next button. Error: {e}")
+            next_button = self.driver.find_element(
+                By.CSS_SELECTOR, 'button[data-test="bottom-pagination-button-next"]'
+            )
+            self.driver.execute_script("arguments[0].click();", next_button)
+            logger.info(f"Clicked Next button for page {page}")
 
-            try:
-                contract_type_elem = offer.find_elements(By.XPATH, '//*[@id="offers-list"]/div[4]/div[6]/div/div/div[1]/div[2]/div[1]/div/ul/li[3]')
-                contract_type = contract_type_elem[0].text.strip() if contract_type_elem else "N/A"
-            except Exception:
-                contract_type = "N/A"
+    def close_driver(self):
+        """Return the browser to the shared pool, or quit it when running standalone"""
+        self.command_counter.detach()
+        if self.driver_pool:
+            self.driver_pool.release(self.driver)
+        else:
+            self.driver.quit()
 
-            try:
-                work_conditions_elem = offer.find_elements(By.CSS_SELECTOR, 'li[data-test="offer-additional-info-4"]')
-                work_conditions = work_conditions_elem[0].text.strip() if work_conditions_elem else "N/A"
-            except Exception:
-                work_conditions = "N/A"
+    def _extract_visible_jobs(self):
+        """Snapshot the current page and parse it off the browser thread"""
+        with self.timer.phase('extraction'):
+            page_html = self.driver.page_source
+        self.crawl_stats['pages_visited'] += 1
+        self.pending_pages.append((self.current_page,
+                                   self.parse_executor.submit(self._parse_page, page_html, self.current_page)))
 
-            try:
-                technologies_elem = offer.find_elements(By.CSS_SELECTOR, '[data-test="technologies-list"] span')
-                technologies = [tech.text.strip() for tech in technologies_elem]
-            except Exception:
-                technologies = []
+    def _parse_page(self, page_html, page_number):
+        with self.timer.phase('parse', page_number):
+            return parse_offers_html(page_html, page_number, self.url)
 
+    def _collect_parsed_pages(self, wait=True):
+        """
+        Yield the jobs of queued page parses in page order, skipping offers
+        already yielded. With wait=False only the pages that are already
+        parsed are collected.
+        """
+        while self.pending_pages:
+            page, future = self.pending_pages[0]
+            if not wait and not future.done():
+                break
+            self.pending_pages.pop(0)
             try:
-                short_description_elem = offer.find_element(By.CSS_SELECTOR, '[data-test="section-short-description"] .invisible')
-                short_description = short_description_elem.text.strip()
-            except Exception:
-                short_description = "N/A"
-
-            job = {
-                "offer_id": offer_id,
-                "title": title,
-                "url": job_url,
-                "salary": salary,
-                "company": company,
-                "location": location,
-                "published": published,
-                "job_type": job_type,
-                "contract_type": contract_type,
-                "work_conditions": work_conditions,
-                "technologies": technologies,
-                "short_description": short_description,
-                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            key = offer_id if offer_id else title
-            self.jobs[key] = job
-            logger.info(f"Offer {key} extracted successfully")
-
-    def _save_to_json(self):
-        with open("jobs2.json", "w", encoding="utf-8") as f:
-            json.dump(self.jobs, f, indent=4)
-        logger.info("Data saved to jobs2.json")
-
-    def _save_to_csv(self):
-        df = pd.DataFrame(self.jobs.values())
-        df.to_csv("jobs2.csv", index=False, encoding="utf-8")
-        logger.info("Data saved to jobs2.csv")
+                jobs = future.result()
+            except Exception as e:
+                logger.error(f"Failed to parse page snapshot: {e}")
+                if self.checkpoint:
+                    self.checkpoint.page_failed(page)
+                continue
+            keys = []
+            for job in jobs:
+                key = job["offer_id"] if job["offer_id"] else job["title"]
+                if key in self.seen:
+                    continue
+                self.seen.add(key)
+                keys.append(key)
+                self.incremental.observe(job)
+                yield job
+            if self.checkpoint:
+                self.checkpoint.page_done(page, keys)
+
+    def export(self, output_dir="output", formats=('ndjson', 'csv')):
+        """Write the jobs of the last scrape() through the export layer"""
+        return export_jobs(self.jobs.values(), 'second_page', output_dir, formats)
 
 
 def main():
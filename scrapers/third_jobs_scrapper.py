@@ -1,84 +1,496 @@
 import time
-import json
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
+import asyncio
+import itertools
+from collections import deque
+import aiohttp
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.firefox import GeckoDriverManager
+from selenium.common.exceptions import WebDriverException
+from utils.driver_pool import create_firefox_driver, restart_driver
+from utils.instrumentation import WebDriverCommandCounter, PhaseTimer, PageLoadStats
+from utils.waits import Waiter
+from utils.known_jobs import IncrementalTracker
+from utils.rate_limit import RateLimiter, html_title, looks_blocked
+from utils.retry import PageRetry
+from utils.export import export_jobs
 from utils.logger import Logger
 
 logger = Logger()
 
+BASE_URL = "https://www.make-it-in-germany.com/en/working-in-germany/job-listings?tx_solr%5Bfilter%5D%5B0%5D=topjobs%3A4"
+
+# Selectors shared by the browser and the HTTP fetch modes
+JOB_LIST_SELECTOR = '#list45536 > div.job-category__main > ul > li.list__item:not(.list__item--newsletter):not(.list__item--customercenter)'
+TITLE_SELECTOR = 'h3 a'
+COMPANY_SELECTOR = 'p'
+LOCATION_SELECTOR = '.icon--before.icon--pin .element'
+DATE_SELECTOR = '.icon--before.icon--calendar time'
+LAST_PAGE_SELECTOR = '.pagination__item--last a'
+COOKIE_BUTTON_SELECTOR = 'button[data-testid="uc-accept-all-button"]'
+
+# Precompiled for lxml; compiling a CSS selector costs more than applying it
+_job_list = CSSSelector(JOB_LIST_SELECTOR)
+_title = CSSSelector(TITLE_SELECTOR)
+_company = CSSSelector(COMPANY_SELECTOR)
+_location = CSSSelector(LOCATION_SELECTOR)
+_date = CSSSelector(DATE_SELECTOR)
+_last_page = CSSSelector(LAST_PAGE_SELECTOR)
+
+
+def parse_jobs_html(page_html, page_url):
+    """Extract jobs from a listing page with lxml, mirroring extract_jobs()"""
+    document = lxml_html.fromstring(page_html)
+    jobs = []
+    for job_element in _job_list(document):
+        try:
+            title_element = _title(job_element)[0]
+            jobs.append({
+                'title': title_element.text_content().strip(),
+                'url': urljoin(page_url, title_element.get('href', '')),
+                'company': _company(job_element)[0].text_content().strip(),
+                'location': _location(job_element)[0].text_content().strip(),
+                'date': _date(job_element)[0].get('datetime', '').strip(),
+                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
+            })
+        except IndexError:
+            logger.warning(f"Failed to extract job details from {page_url}")
+    return jobs
+
+
+def parse_total_pages(page_html):
+    document = lxml_html.fromstring(page_html)
+    last_page = _last_page(document)
+    if not last_page:
+        return 1
+    return int(last_page[0].text_content().strip())
+
+
+def _iterate_async(async_iterator):
+    """Drive an async iterator from synchronous code on a private event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.close()
+
+
 class ThirdJobsScraper:
 
 
-    def __init__(self, headless=True):
-        self.base_url = "https://www.make-it-in-germany.com/en/working-in-germany/job-listings?tx_solr%5Bfilter%5D%5B0%5D=topjobs%3A4"
+    def __init__(self, headless=True, driver_pool=None, fetch_mode='browser', base_url=BASE_URL, concurrency=8,
+                 known_jobs=None, stop_after_known=20, http_cache=None, lean=False, checkpoint=None, rate_limiter=None,
+                 page_timeout=30, page_retries=2):
+        self.base_url = base_url
+        # Seconds a page load or fetch may take before it counts as failed
+        self.page_timeout = page_timeout
+        # Shared with the other scrapers of the run; every page load and fetch goes through it
+        self.rate_limiter = rate_limiter or RateLimiter()
         self.headless = headless
-        self.driver = self.setup_driver()  # Initialize the web driver
+        self.lean = lean
+        self.driver_pool = driver_pool
+        self.fetch_mode = fetch_mode
+        self.concurrency = concurrency
+        # Optional HttpCache for the HTTP mode; unchanged pages are not parsed again
+        self.http_cache = http_cache
+        self.timer = PhaseTimer()
+        # A failing page is retried, then left for the end of the run, instead of ending the crawl
+        self.retry = PageRetry('third_page', attempts=page_retries + 1,
+                               retry_on=(WebDriverException,) if fetch_mode == 'browser'
+                               else (aiohttp.ClientError, asyncio.TimeoutError))
+        # The HTTP mode never needs a browser
+        self.driver = self.setup_driver() if fetch_mode == 'browser' else None  # Initialize the web driver
+        self.command_counter = WebDriverCommandCounter().attach(self.driver) if self.driver else None
+        self.waiter = Waiter(self.driver, timer=self.timer) if self.driver else None
+        self.page_stats = PageLoadStats()
         self.jobs = []  # List to store job data
+        # Offers are listed newest first, so a run of known offers means the rest is known too
+        self.incremental = IncrementalTracker(known_jobs, 'third_page', stop_after_known)
+        self.crawl_stats = {'pages_visited': 0, 'pages_total': None, 'stopped_early': False, 'known_seen': 0,
+                            'pages_unchanged': 0}
+        # Optional Checkpoint; a resumed crawl starts after its last completed page
+        self.checkpoint = checkpoint
+        self.start_page = checkpoint.position + 1 if checkpoint else 1
+
+    def page_url(self, page):
+        return f"{self.base_url}&tx_solr%5Bpage%5D={page}"
 
     def setup_driver(self):
-        firefox_options = Options()
-        if self.headless:
-            firefox_options.add_argument("--headless")
-        firefox_options.add_argument("--width=1920")
-        firefox_options.add_argument("--height=1080")
-        firefox_options.set_preference("dom.webnotifications.enabled", False)
-        return webdriver.Firefox(service=Service(GeckoDriverManager().install()), options=firefox_options)
+        with self.timer.phase('driver_start'):
+            driver = self.driver_pool.acquire() if self.driver_pool else create_firefox_driver(self.headless, self.lean)
+        driver.set_page_load_timeout(self.page_timeout)
+        return driver
+
+    def _recover(self, level):
+        """Escalation before a retry; every attempt loads its page again, so a reload needs nothing extra"""
+        if level == 'new_session':
+            self.command_counter.detach()
+            with self.timer.phase('driver_start'):
+                self.driver = restart_driver(self.driver, self.driver_pool, self.headless, self.lean)
+            self.driver.set_page_load_timeout(self.page_timeout)
+            self.command_counter.attach(self.driver)
+            self.waiter.driver = self.driver
+
+    def close_driver(self):
+        """Return the browser to the shared pool, or quit it when running standalone"""
+        if self.command_counter:
+            self.command_counter.detach()
+        if self.driver is None:
+            # HTTP mode never started one
+            return
+        if self.driver_pool:
+            self.driver_pool.release(self.driver)
+        else:
+            self.driver.quit()
 
     def scrape(self):
-        self.driver.get(self.base_url)
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'h1.h2')))  # Wait for the page to load
+        """Scrape every page into self.jobs and save it; iter_jobs() streams the jobs instead"""
+        self.jobs = list(self.iter_jobs())
+        self.export()
+        logger.info("Scraping finished")
+
+    def iter_jobs(self):
+        """Yield jobs page by page; no page is kept once its jobs are handed over"""
+        if self.fetch_mode == 'http':
+            for page_jobs in _iterate_async(self.aiter_pages()):
+                yield from page_jobs
+            self._log_incremental_stats()
+            logger.info(f"Phases: {self.timer.summary()}")
+            return
+
+        page = 1
+        try:
+            self.timer.current_page = page
+            total_pages = self.retry.call(page, self._open_first_page, self._recover)
+            self.crawl_stats['pages_total'] = total_pages
+
+            # The first page is already loaded, so extract it before paginating
+            if self.start_page <= 1:
+                with self.timer.phase('extraction'):
+                    page_jobs = self._unsaved(self.extract_jobs())
+                yield from page_jobs
+                self._page_done(page, page_jobs)
+            else:
+                logger.info(f"Resuming at page {self.start_page} of {total_pages}")
+
+            # Scrape each remaining page
+            for page in range(max(2, self.start_page), total_pages + 1):
+                if self.incremental.should_stop:
+                    logger.info(f"Stopping after {self.incremental.consecutive_known} consecutive known offers")
+                    self.crawl_stats['stopped_early'] = True
+                    break
+                yield from self._crawl_page(page)
+
+            # Pages that kept failing get one more round now that the rest is done
+            for page in self.retry.take_failed():
+                yield from self._crawl_page(page, retried=True)
+
+            self._log_incremental_stats()
+            if self.checkpoint:
+                self.checkpoint.complete()
+            logger.info(f"Issued {self.command_counter.summary()}")
+            logger.info(f"Waits: {self.waiter.summary()}")
+            logger.info(f"Phases: {self.timer.summary()}")
+            logger.info(f"Page loads: {self.page_stats.summary()}")
+        except Exception as e:
+            # Jobs already handed over are kept; the checkpoint stays at the last completed page
+            logger.error(f"Scraping stopped at page {page}: {e}")
+            if self.checkpoint:
+                self.checkpoint.page_failed(page)
+            raise
+        finally:
+            self.close_driver()  # Close the driver after scraping
+
+    def iter_page(self, page):
+        """
+        Yield the jobs of a single listing page, for one work queue task.
+        Page 1 also reads the page count into crawl_stats['pages_total'] so
+        the other pages can be queued.
+        """
+        if self.fetch_mode == 'http':
+            for page_jobs in _iterate_async(self.aiter_page(page)):
+                yield from page_jobs
+            return
+
+        try:
+            self.timer.current_page = page
+            if page == 1:
+                self.crawl_stats['pages_total'] = self.retry.call(page, self._open_first_page, self._recover)
+            else:
+                self.retry.call(page, lambda: self._load_page(page), self._recover)
+            with self.timer.phase('extraction'):
+                page_jobs = self.extract_jobs()
+            yield from page_jobs
+        finally:
+            self.close_driver()
+
+    def _open_first_page(self):
+        """Load the first listing page, accept cookies and return the page count"""
+        with self.rate_limiter.acquire(self.base_url, self.timer) as ticket:
+            with self.timer.phase('navigation'):
+                self.driver.get(self.base_url)
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'h1.h2')))  # Wait for the page to load
+            ticket.page_loaded(self.page_stats.record(self.driver, 'page 1'))
 
         # Accept cookies if the button is present
         try:
-            cookie_button = WebDriverWait(self.driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-testid="uc-accept-all-button"]')))
+            cookie_button = WebDriverWait(self.driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, COOKIE_BUTTON_SELECTOR)))
             cookie_button.click()
-            time.sleep(2)  # Wait for the cookie acceptance to process
+            # Wait for the cookie acceptance to process
+            self.waiter.until('cookie_banner', EC.invisibility_of_element_located((By.CSS_SELECTOR, COOKIE_BUTTON_SELECTOR)),
+                              required=False)
         except Exception as e:
             logger.warning("Cookie acceptance button not found or already accepted.")
 
         # Determine total pages
-        total_pages = self.get_total_pages()
-
-        # Scrape each page
-        for page in range(1, total_pages + 1):
-            page_url = f"{self.base_url}&tx_solr%5Bpage%5D={page}"
-            self.driver.get(page_url)
-            time.sleep(5)  # Wait for the page to load
-            self.extract_jobs()  # Call the method to extract job data
-
-        self.save_to_json()  # Save data to JSON
-        self.save_to_csv()   # Save data to CSV
-        self.driver.quit()  # Close the driver after scraping
-        logger.info("Scraping finished")
+        return self.get_total_pages()
+
+    def _load_page(self, page):
+        page_url = self.page_url(page)
+        with self.rate_limiter.acquire(page_url, self.timer) as ticket:
+            with self.timer.phase('navigation'):
+                self.driver.get(page_url)
+            # get() returns after the load event; a page without the list is retried
+            self.waiter.for_element('page_load', (By.CSS_SELECTOR, JOB_LIST_SELECTOR), timeout=10)
+            ticket.page_loaded(self.page_stats.record(self.driver, f'page {page}'))
+
+    def _crawl_page(self, page, retried=False):
+        """Load, extract and hand over one listing page; one that keeps failing is left for the end of the run"""
+        self.timer.current_page = page
+        try:
+            self.retry.call(page, lambda: self._load_page(page), self._recover)
+        except WebDriverException as e:
+            self.retry.page_failed(page, e)
+            if self.checkpoint:
+                self.checkpoint.page_failed(page)
+            return
+        if retried:
+            self.retry.page_recovered(page)
+        with self.timer.phase('extraction'):
+            page_jobs = self._unsaved(self.extract_jobs())  # Call the method to extract job data
+        yield from page_jobs
+        self._page_done(page, page_jobs)
 
     def get_total_pages(self):
-        # Navigate to the first page to get the total number of pages
-        self.driver.get(self.base_url)
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, '.pagination__item--last a')))
-        total_pages = self.driver.find_element(By.CSS_SELECTOR, '.pagination__item--last a').text.strip()
+        # Read the total number of pages from the first page, which is already loaded
+        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, LAST_PAGE_SELECTOR)))
+        total_pages = self.driver.find_element(By.CSS_SELECTOR, LAST_PAGE_SELECTOR).text.strip()
         return int(total_pages)
 
+    async def aiter_jobs(self):
+        """Async iterator over the jobs of the browserless fetch mode"""
+        async for page_jobs in self.aiter_pages():
+            for job in page_jobs:
+                yield job
+
+    async def aiter_pages(self):
+        """
+        Browserless fetch mode: the listing pages are server rendered, so fetch
+        them with aiohttp over a pooled connection and parse them with lxml.
+        The first page gives the page count. The rest are fetched at most
+        `concurrency` pages ahead and yielded in page order, so a slow
+        consumer holds the crawl back instead of piling up parsed pages, and
+        the incremental stop is checked after every page.
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.page_timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            first_page_url = self.page_url(1)
+            try:
+                first_page_html, changed = await self.retry.call_async(
+                    1, lambda: self._fetch(session, semaphore, first_page_url, 1))
+            except Exception as e:
+                # Without the page count there is nothing to paginate; recorded like the browser mode does
+                logger.error(f"Scraping stopped at page 1: {e}")
+                if self.checkpoint:
+                    self.checkpoint.page_failed(1)
+                raise
+            total_pages = parse_total_pages(first_page_html)
+            logger.info(f"Total pages found: {total_pages}")
+            self.crawl_stats['pages_total'] = total_pages
+
+            if self.start_page <= 1:
+                jobs = self._parse(first_page_html, first_page_url, 1) if changed else []
+                self._observe_page(jobs, changed)
+                yield jobs
+                self._page_done(1, jobs)
+            else:
+                logger.info(f"Resuming at page {self.start_page} of {total_pages}")
+
+            async def fetch_and_parse(page, retried=False):
+                page_url = self.page_url(page)
+                try:
+                    page_html, changed = await self.retry.call_async(
+                        page, lambda: self._fetch(session, semaphore, page_url, page))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Left for the end-of-run retry
+                    self.retry.page_failed(page, e)
+                    if self.checkpoint:
+                        self.checkpoint.page_failed(page)
+                    return page, None, True
+                if retried:
+                    self.retry.page_recovered(page)
+                if not changed:
+                    logger.info(f"Page {page} unchanged since last run, skipping")
+                    return page, [], False
+                jobs = self._parse(page_html, page_url, page)
+                logger.info(f"Extracted {len(jobs)} jobs from page {page}")
+                return page, jobs, True
+
+            remaining = iter(range(max(2, self.start_page), total_pages + 1))
+            in_flight = deque()
+
+            def schedule():
+                for page in itertools.islice(remaining, self.concurrency - len(in_flight)):
+                    in_flight.append(asyncio.ensure_future(fetch_and_parse(page)))
+
+            schedule()
+            try:
+                while in_flight:
+                    if self.incremental.should_stop:
+                        logger.info(f"Stopping after {self.incremental.consecutive_known} consecutive known offers")
+                        self.crawl_stats['stopped_early'] = True
+                        break
+                    page, page_jobs, changed = await in_flight.popleft()
+                    schedule()
+                    if page_jobs is None:
+                        continue
+                    page_jobs = self._unsaved(page_jobs)
+                    self._observe_page(page_jobs, changed)
+                    yield page_jobs
+                    self._page_done(page, page_jobs)
+
+                # Pages that kept failing get one more round now that the rest is done
+                for page in self.retry.take_failed():
+                    page, page_jobs, changed = await fetch_and_parse(page, retried=True)
+                    if page_jobs is None:
+                        continue
+                    page_jobs = self._unsaved(page_jobs)
+                    self._observe_page(page_jobs, changed)
+                    yield page_jobs
+                    self._page_done(page, page_jobs)
+                # Pages given up on still count as visited
+                self.crawl_stats['pages_visited'] += len(self.retry.failed)
+                if self.checkpoint:
+                    self.checkpoint.complete()
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def aiter_page(self, page):
+        """iter_page() of the browserless fetch mode, as an async iterator with a single page"""
+        timeout = aiohttp.ClientTimeout(total=self.page_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            page_url = self.page_url(page)
+            page_html, changed = await self.retry.call_async(
+                page, lambda: self._fetch(session, asyncio.Semaphore(1), page_url, page))
+            if page == 1:
+                self.crawl_stats['pages_total'] = parse_total_pages(page_html)
+            jobs = self._parse(page_html, page_url, page) if changed else []
+            self._observe_page(jobs, changed)
+            yield jobs
+            self._page_done(page, jobs)
+
+    def _unsaved(self, page_jobs):
+        """Drop jobs a resumed crawl already handed over before it stopped"""
+        if not self.checkpoint or not self.checkpoint.resumed:
+            return page_jobs
+        return [job for job in page_jobs if job['url'] not in self.checkpoint.seen]
+
+    def _page_done(self, page, page_jobs):
+        if self.checkpoint:
+            on_saved = self._cache_saved(self.page_url(page)) if self.http_cache else None
+            self.checkpoint.page_done(page, [job['url'] for job in page_jobs], on_saved)
+        elif self.http_cache:
+            # Standalone: the jobs are with the caller, there is no save to wait for
+            self.http_cache.commit(self.page_url(page))
+
+    def _cache_saved(self, page_url):
+        """Keep a fetched page in the cache only once its jobs are saved, so lost jobs are parsed again"""
+        def on_saved(saved):
+            if saved:
+                self.http_cache.commit(page_url)
+            else:
+                self.http_cache.discard(page_url)
+        return on_saved
+
+    def _parse(self, page_html, page_url, page=None):
+        with self.timer.phase('parse', page):
+            return parse_jobs_html(page_html, page_url)
+
+    def _observe_page(self, page_jobs, changed=True):
+        self.crawl_stats['pages_visited'] += 1
+        if not changed:
+            self.crawl_stats['pages_unchanged'] += 1
+        for job in page_jobs:
+            self.incremental.observe(job)
+
+    def _log_incremental_stats(self):
+        self.crawl_stats['known_seen'] = self.incremental.known_seen
+        if self.crawl_stats['stopped_early']:
+            pages_total = self.crawl_stats['pages_total']
+            logger.info(f"Incremental crawl visited {self.crawl_stats['pages_visited']}/{pages_total} pages, "
+                        f"{pages_total - self.crawl_stats['pages_visited']} saved")
+
+    async def _fetch(self, session, semaphore, url, page=None):
+        """Fetch url and return (body, changed); changed is False for pages the cache already has"""
+        headers = self.http_cache.conditional_headers(url) if self.http_cache else {}
+        async with semaphore:
+            ticket = await self.rate_limiter.acquire_async(url, self.timer, page)
+            start = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    # Error bodies are read too: block pages often come with a 403
+                    body = None if response.status == 304 else await response.text()
+            except asyncio.CancelledError:
+                ticket.done()
+                raise
+            except Exception:
+                ticket.done(error=True)
+                raise
+            self.timer.add('fetch', time.perf_counter() - start, page)
+            ticket.done(status=response.status, blocked=looks_blocked(html_title(body)),
+                        retry_after=response.headers.get('Retry-After'))
+        if response.status == 304 and self.http_cache:
+            body = self.http_cache.not_modified(url)
+            if body is not None:
+                return body, False
+            # Evicted between revalidation and now; fetch it again in full
+            return await self._fetch(session, semaphore, url, page)
+        response.raise_for_status()
+        if not self.http_cache:
+            return body, True
+        changed = self.http_cache.store(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return body, changed
+
     def extract_jobs(self):
-        job_elements = self.driver.find_elements(By.CSS_SELECTOR, '#list45536 > div.job-category__main > ul > li.list__item:not(.list__item--newsletter):not(.list__item--customercenter)')
+        """Return the jobs on the currently loaded page"""
+        job_elements = self.driver.find_elements(By.CSS_SELECTOR, JOB_LIST_SELECTOR)
+        self.crawl_stats['pages_visited'] += 1
+        page_jobs = []
         if not job_elements:
             logger.warning("No job elements found on the current page.")
-            return
+            return page_jobs
 
         for job_element in job_elements:
             try:
-                title_element = job_element.find_element(By.CSS_SELECTOR, 'h3 a')
+                title_element = job_element.find_element(By.CSS_SELECTOR, TITLE_SELECTOR)
                 title = title_element.text.strip()
                 url = title_element.get_attribute('href')  # Get the job URL
-                company = job_element.find_element(By.CSS_SELECTOR, 'p').text.strip()
-                location = job_element.find_element(By.CSS_SELECTOR, '.icon--before.icon--pin .element').text.strip()
-                date = job_element.find_element(By.CSS_SELECTOR, '.icon--before.icon--calendar time').get_attribute('datetime').strip()
+                company = job_element.find_element(By.CSS_SELECTOR, COMPANY_SELECTOR).text.strip()
+                location = job_element.find_element(By.CSS_SELECTOR, LOCATION_SELECTOR).text.strip()
+                date = job_element.find_element(By.CSS_SELECTOR, DATE_SELECTOR).get_attribute('datetime').strip()
                 job_data = {
                     'title': title,
                     'url': url,  # Include the job URL
@@ -87,22 +499,18 @@ class ThirdJobsScraper:
                     'date': date,
                     'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
                 }
-                self.jobs.append(job_data)  # Append job data to the list
+                page_jobs.append(job_data)
+                self.incremental.observe(job_data)
                 logger.info(f"Extracted job: {title}")
             except Exception as e:
                 logger.warning(f"Failed to extract job details: {str(e)}")
 
-        print(f"Extracted {len(job_elements)} jobs from the current page.")
-
-    def save_to_json(self):
-        with open('jobs3.json', 'w', encoding='utf-8') as f:
-            json.dump(self.jobs, f, ensure_ascii=False, indent=4)
-        logger.info("Data saved to jobs3.json")
+        logger.info(f"Extracted {len(page_jobs)} of {len(job_elements)} jobs from the current page")
+        return page_jobs
 
-    def save_to_csv(self):
-        df = pd.DataFrame(self.jobs)
-        df.to_csv('jobs3.csv', index=False, encoding='utf-8')
-        logger.info("Data saved to jobs3.csv")
+    def export(self, output_dir="output", formats=('ndjson', 'csv')):
+        """Write the jobs of the last scrape() through the export layer"""
+        return export_jobs(self.jobs, 'third_page', output_dir, formats)
 
 def main():
     scrapper = ThirdJobsScraper(headless=True)
@@ -0,0 +1,35 @@
+import os
+import uuid
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+
+@pytest.fixture
+def database_dsn():
+    """
+    DSN of a fresh, migrated schema in the database at DATABASE_URL, dropped
+    after the test. Tests using it are skipped when DATABASE_URL is not set.
+    """
+    url = os.getenv('DATABASE_URL')
+    if not url:
+        pytest.skip("set DATABASE_URL to run the tests against Postgres")
+    from utils.db import migrate_schema
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+    dsn = psycopg2.extensions.make_dsn(url, options=f"-csearch_path={schema}")
+    connection = psycopg2.connect(dsn)
+    try:
+        migrate_schema(connection)
+    finally:
+        connection.close()
+    try:
+        yield dsn
+    finally:
+        with admin.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
@@ -0,0 +1,101 @@
+import pytest
+from utils.checkpoint import Checkpoint, CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    yield store
+    store.close()
+
+
+def saved_row(store, label='task'):
+    return store.db.execute("SELECT position, status FROM checkpoints WHERE label = ?", (label,)).fetchone()
+
+
+def hand_over(checkpoint, *pages):
+    """Hand over pages as (position, keys) and take them like the consumer does with a batch"""
+    for position, keys in pages:
+        checkpoint.page_done(position, keys)
+    return checkpoint.take_staged()
+
+
+def test_pages_count_only_once_their_jobs_are_saved(store):
+    checkpoint = store.start('task', 'run1')
+    batch = hand_over(checkpoint, (1, ['a']), (2, ['b']))
+    assert checkpoint.position == 0 and saved_row(store) == (0, 'running')
+    checkpoint.pages_saved(batch)
+    assert checkpoint.position == 2 and checkpoint.seen == {'a', 'b'}
+    assert saved_row(store) == (2, 'running')
+
+
+def test_an_unsaved_batch_holds_the_checkpoint_back(store):
+    checkpoint = store.start('task', 'run1')
+    first = hand_over(checkpoint, (1, ['a']))
+    second = hand_over(checkpoint, (2, ['b']))
+    third = hand_over(checkpoint, (3, ['c']))
+    checkpoint.pages_saved(first)
+    checkpoint.pages_saved(second, saved=False)
+    checkpoint.pages_saved(third)
+    assert checkpoint.position == 1 and checkpoint.failed_pages == [2]
+    assert 'b' not in checkpoint.seen and 'c' in checkpoint.seen
+
+
+def test_a_failed_page_retried_later_releases_the_checkpoint(store):
+    checkpoint = store.start('task', 'run1')
+    checkpoint.page_failed(2)
+    checkpoint.pages_saved(hand_over(checkpoint, (1, ['a']), (3, ['c'])))
+    assert checkpoint.position == 1
+    checkpoint.pages_saved(hand_over(checkpoint, (2, ['b'])))
+    assert checkpoint.position == 3 and checkpoint.failed_pages == []
+
+
+def test_complete_waits_for_the_last_pages_to_be_saved(store):
+    checkpoint = store.start('task', 'run1')
+    batch = hand_over(checkpoint, (1, ['a']))
+    checkpoint.complete()
+    assert saved_row(store) == (0, 'running')
+    checkpoint.pages_saved(batch)
+    assert saved_row(store) == (1, 'complete')
+    assert store.db.execute("SELECT count(*) FROM seen_jobs").fetchone()[0] == 0
+
+
+def test_complete_with_failed_pages_stays_resumable(store):
+    checkpoint = store.start('task', 'run1')
+    checkpoint.pages_saved(hand_over(checkpoint, (1, ['a'])))
+    checkpoint.pages_saved(hand_over(checkpoint, (2, ['b'])), saved=False)
+    checkpoint.complete()
+    assert saved_row(store) == (1, 'running')
+
+
+def test_resume_continues_the_unfinished_run(store):
+    checkpoint = store.start('task', 'run1')
+    checkpoint.pages_saved(hand_over(checkpoint, (1, ['a']), (2, ['b'])))
+    hand_over(checkpoint, (3, ['c']))  # handed over, never saved
+
+    resumed = store.start('task', 'run2', resume=True)
+    assert resumed.resumed and resumed.run_id == 'run1'
+    assert resumed.position == 2 and resumed.seen == {'a', 'b'}
+
+
+def test_without_resume_or_after_completion_the_task_starts_over(store):
+    checkpoint = store.start('task', 'run1')
+    checkpoint.pages_saved(hand_over(checkpoint, (1, ['a'])))
+    fresh = store.start('task', 'run2')
+    assert (fresh.position, fresh.seen, fresh.resumed) == (0, set(), False)
+
+    fresh.pages_saved(hand_over(fresh, (1, ['a'])))
+    fresh.complete()
+    again = store.start('task', 'run3', resume=True)
+    assert (again.run_id, again.position, again.resumed) == ('run3', 0, False)
+
+
+def test_page_callbacks_run_with_the_save_outcome_even_without_a_store():
+    checkpoint = Checkpoint(None, 'queued-task', 'run1')
+    outcomes = []
+    checkpoint.page_done(1, ['a'], lambda saved: outcomes.append((1, saved)))
+    checkpoint.page_done(2, ['b'], lambda saved: outcomes.append((2, saved)))
+    batch = checkpoint.take_staged()
+    checkpoint.complete()
+    checkpoint.pages_saved(batch, saved=False)
+    assert outcomes == [(1, False), (2, False)]
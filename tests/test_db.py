@@ -0,0 +1,73 @@
+from datetime import date
+from types import SimpleNamespace
+import psycopg2
+from utils.db import (JOB_COLUMNS, TimedCursor, _copy_value, _rows_to_copy_buffer, build_job_rows,
+                      instrument_connection, save_job_rows)
+
+
+def job(**fields):
+    return {'title': 'Data Engineer', 'company': 'ACME', 'location': 'Berlin',
+            'url': 'https://example.com/offer/1', 'date': '01.02.2025', 'scraped_at': '2025-02-03 10:00:00',
+            **fields}
+
+
+def test_copy_value_escapes_the_copy_text_format():
+    assert _copy_value(None) == '\\N'
+    assert _copy_value('a\tb\nc\rd') == 'a\\tb\\nc\\rd'
+    assert _copy_value('C:\\temp') == 'C:\\\\temp'
+    assert _copy_value(12.5) == '12.5'
+    assert _copy_value(date(2025, 2, 1)) == '2025-02-01'
+
+
+def test_copy_value_writes_arrays_as_quoted_literals():
+    assert _copy_value([]) == '{}'
+    assert _copy_value(['Python', 'SQL']) == '{"Python","SQL"}'
+    # Quotes and backslashes are escaped for the array literal, then the backslashes again for COPY
+    assert _copy_value(['say "hi"', 'a\\b', 'x,y']) == '{"say \\\\"hi\\\\"","a\\\\\\\\b","x,y"}'
+    assert _copy_value(('tab\there',)) == '{"tab\\there"}'
+
+
+def test_rows_become_one_tab_separated_line_each():
+    buffer = _rows_to_copy_buffer([('1', None, ['a']), ('line\nbreak', 'zaż\u00f3łć', [])])
+    assert buffer.read().decode('utf-8') == '1\t\\N\t{"a"}\nline\\nbreak\tzażółć\t{}\n'
+
+
+def test_build_job_rows_orders_values_like_job_columns():
+    rows = build_job_rows([job(), job(title='Backend Developer', url='https://example.com/offer/2')], 'third_page')
+    assert len(rows) == 2 and all(len(row) == len(JOB_COLUMNS) for row in rows)
+    first = dict(zip(JOB_COLUMNS, rows[0]))
+    assert first['title'] == first['position'] == 'Data Engineer'
+    assert first['source'] == 'third_page' and first['source_url'] == first['url']
+    assert first['published_date'] == date(2025, 2, 1)
+    assert first['salary_min'] is None and first['technologies'] == []
+    assert rows[0][0] != rows[1][0]
+    assert build_job_rows([], 'third_page') == []
+
+
+def test_the_same_offer_twice_in_a_batch_gets_the_same_key():
+    rows = build_job_rows([job(), job(), job(url='https://example.com/offer/1?utm_source=feed')], 'third_page')
+    keys = {(row[JOB_COLUMNS.index('job_id')], row[JOB_COLUMNS.index('source')]) for row in rows}
+    assert len(keys) == 1
+
+
+def test_bulk_upsert_saves_escaped_values_and_each_offer_once(database_dsn):
+    rows = build_job_rows([job(title='Tab\tand\nnewline \\ "quoted"'), job(title='Tab\tand\nnewline \\ "quoted"'),
+                           job(url='https://example.com/offer/2', company=None)], 'third_page')
+    connection = psycopg2.connect(database_dsn)
+    try:
+        assert save_job_rows(connection, rows, 'third_page') == {'third_page': {'inserted': 2, 'skipped': 1}}
+        assert save_job_rows(connection, rows, 'third_page') == {'third_page': {'inserted': 0, 'skipped': 3}}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT title, company, technologies FROM jobs ORDER BY id")
+            assert cursor.fetchall() == [('Tab\tand\nnewline \\ "quoted"', 'ACME', []), ('Data Engineer', None, [])]
+    finally:
+        connection.close()
+
+
+def test_instrumentation_ends_with_the_block():
+    connection = SimpleNamespace(cursor_factory=None)
+    with instrument_connection(connection, timer=object()):
+        assert issubclass(connection.cursor_factory, TimedCursor)
+    assert connection.cursor_factory is None
+    with instrument_connection(connection, timer=None):
+        assert connection.cursor_factory is None
@@ -0,0 +1,90 @@
+import psycopg2
+import pytest
+from utils.db import backfill_fingerprints, build_job_rows, save_job_rows
+from utils.fingerprint import canonical_url, content_fingerprint, normalize_text, stable_job_id
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://www.Example.com/jobs/123/", "https://example.com/jobs/123"),
+    ("https://example.com/jobs/123?utm_source=x&fbclid=y#apply", "https://example.com/jobs/123"),
+    ("https://example.com/jobs?b=2&a=1&gclid=z", "https://example.com/jobs?a=1&b=2"),
+    ("https://example.com:8443/jobs", "https://example.com:8443/jobs"),
+    ("https://example.com:443/jobs", "https://example.com/jobs"),
+    ("https://example.com", "https://example.com/"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [None, "", "N/A", "/job-offer/relative", "mailto:jobs@example.com"])
+def test_canonical_url_rejects_non_http_urls(url):
+    assert canonical_url(url) is None
+
+
+def test_normalize_text_drops_accents_gender_tags_and_punctuation():
+    assert normalize_text("Główny Programista (m/w/d) – Python!") == "glowny programista python"
+    assert normalize_text("N/A") == ""
+
+
+def test_stable_job_id_ignores_tracking_and_formatting():
+    first = stable_job_id('third_page', "https://www.example.com/jobs/42/?utm_campaign=mail")
+    assert first == stable_job_id('third_page', "http://example.com/jobs/42")
+    assert first != stable_job_id('third_page', "https://example.com/jobs/43")
+
+
+def test_stable_job_id_keeps_native_offer_ids():
+    assert stable_job_id('second_page', "https://example.com/x", native_id=1001) == "1001"
+    # Only boards listed as having their own IDs keep them
+    assert stable_job_id('third_page', "https://example.com/x", native_id=1001) != "1001"
+
+
+def test_stable_job_id_uses_the_justjoin_slug():
+    url = "https://justjoin.it/job-offer/acme-python-developer-warsaw?utm_source=feed"
+    assert stable_job_id('justjoin_categories', url) == "acme-python-developer-warsaw"
+
+
+def test_stable_job_id_falls_back_to_the_content_fingerprint():
+    job_id = stable_job_id('third_page', "N/A", "Python Developer (m/w/d)", "ACME GmbH", "Berlin")
+    assert job_id == content_fingerprint("python developer", "acme gmbh", "BERLIN")
+    assert job_id == stable_job_id('second_page', "", "Python Developer", "ACME GmbH", "Berlin")
+
+
+def test_backfill_collapses_offers_stored_under_old_ids_batch_by_batch(database_dsn):
+    offers = [{'title': f'Engineer {n}', 'company': 'ACME', 'location': 'Berlin',
+               'url': f'https://example.com/offer/{n}', 'date': '2025-02-01', 'scraped_at': '2025-02-03 10:00:00'}
+              for n in range(5)]
+    pracuj = [{'title': 'Engineer 0', 'company': 'ACME', 'location': 'Berlin', 'offer_id': '777',
+               'url': 'https://pracuj.example/777', 'scraped_at': '2025-02-03 10:00:00'}]
+    connection = psycopg2.connect(database_dsn)
+    try:
+        for offer in offers:
+            save_job_rows(connection, build_job_rows([offer], 'third_page'), 'third_page')
+        save_job_rows(connection, build_job_rows(pracuj, 'second_page'), 'second_page')
+        with connection.cursor() as cursor:
+            # IDs from before they were stable, and offer 4 stored again later under another ID and URL
+            cursor.execute("""
+            UPDATE jobs SET job_id = 'legacy-' || id, fingerprint = NULL WHERE source = 'third_page';
+            UPDATE jobs SET url = 'https://www.example.com/offer/1?utm_source=feed' WHERE title = 'Engineer 4';
+            DELETE FROM job_keys WHERE source = 'third_page';
+            INSERT INTO job_keys (job_id, source, id, scraped_at)
+            SELECT job_id, source, id, scraped_at FROM jobs WHERE source = 'third_page';
+            """)
+        connection.commit()
+
+        result = backfill_fingerprints(connection, batch_size=2)
+        assert result == {'rows': 6, 'updated': 4, 'removed': 1, 'near_duplicates': 1}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT title, job_id = %s FROM jobs WHERE source = 'third_page' ORDER BY id",
+                           (stable_job_id('third_page', 'https://example.com/offer/0'),))
+            assert cursor.fetchall() == [('Engineer 0', True), ('Engineer 1', False), ('Engineer 2', False),
+                                         ('Engineer 3', False)]
+            cursor.execute("SELECT count(*) FROM job_keys k JOIN jobs j USING (id, job_id, source)")
+            assert cursor.fetchone()[0] == 5
+            cursor.execute("SELECT count(*) FROM job_keys")
+            assert cursor.fetchone()[0] == 5
+            cursor.execute("SELECT source FROM jobs WHERE duplicate_of IS NOT NULL")
+            assert cursor.fetchall() == [('second_page',)]
+        # Nothing left to do on a second run
+        assert backfill_fingerprints(connection, batch_size=2)['updated'] == 0
+    finally:
+        connection.close()
@@ -0,0 +1,61 @@
+import pytest
+from utils.http_cache import HttpCache
+
+URL = "https://example.com/jobs?page=1"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    yield cache
+    cache.close()
+
+
+def test_new_pages_are_staged_until_committed(cache):
+    assert cache.conditional_headers(URL) == {}
+    assert cache.store(URL, "<html>v1</html>", etag='"v1"')
+    # Not committed yet: the next request must not be able to skip the page
+    assert cache.conditional_headers(URL) == {}
+    cache.commit(URL)
+    assert cache.conditional_headers(URL) == {'If-None-Match': '"v1"'}
+    assert cache.not_modified(URL) == "<html>v1</html>"
+
+
+def test_discarded_pages_are_fetched_in_full_again(cache):
+    cache.store(URL, "<html>v1</html>", etag='"v1"')
+    cache.commit(URL)
+    assert cache.store(URL, "<html>v2</html>", etag='"v2"')
+    cache.discard(URL)
+    # Still revalidates against v1, so v2 comes back as changed
+    assert cache.conditional_headers(URL) == {'If-None-Match': '"v1"'}
+    assert cache.store(URL, "<html>v2</html>", etag='"v2"')
+
+
+def test_an_identical_body_is_unchanged_and_updates_the_validators(cache):
+    cache.store(URL, "<html>v1</html>", etag='"a"')
+    cache.commit(URL)
+    assert not cache.store(URL, "<html>v1</html>", etag='"b"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+    assert cache.conditional_headers(URL) == {'If-None-Match': '"b"',
+                                              'If-Modified-Since': "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert cache.stats['unchanged'] == 1
+
+
+def test_without_revalidation_every_page_counts_as_changed(tmp_path):
+    cache = HttpCache(str(tmp_path), revalidate=False)
+    cache.store(URL, "<html>v1</html>", etag='"v1"')
+    cache.commit(URL)
+    assert cache.conditional_headers(URL) == {}
+    assert cache.store(URL, "<html>v1</html>", etag='"v1"')
+    cache.close()
+
+
+def test_least_recently_used_bodies_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=25)
+    for page in range(3):
+        url = f"https://example.com/jobs?page={page}"
+        cache.store(url, f"<html>page {page}</html>", etag=f'"{page}"')
+        cache.commit(url)
+    assert cache.stats['evicted'] == 2
+    assert cache.conditional_headers("https://example.com/jobs?page=0") == {}
+    assert cache.conditional_headers("https://example.com/jobs?page=2") == {'If-None-Match': '"2"'}
+    cache.close()
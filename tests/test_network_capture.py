@@ -0,0 +1,48 @@
+from utils.driver_pool import DriverPool, PooledDriver
+from utils.network_capture import install_capture_hook
+
+
+class FakeDriver:
+    """Records add-on installs; enough of a WebDriver for the pool's release and reset"""
+
+    def __init__(self):
+        self.addons = {}
+        self.installs = 0
+        self.current_url = "about:blank"
+
+    def install_addon(self, path, temporary=False):
+        self.installs += 1
+        self.addons['capture@web-crawler'] = path
+        return 'capture@web-crawler'
+
+    def uninstall_addon(self, addon_id):
+        del self.addons[addon_id]
+
+    def execute_script(self, script):
+        return None
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+
+
+def test_the_hook_is_installed_once_per_session_and_pattern():
+    driver = PooledDriver(FakeDriver())
+    assert install_capture_hook(driver, "/api/offers")
+    assert install_capture_hook(driver, "/api/offers")
+    assert driver.installs == 1
+    assert install_capture_hook(driver, "/api/other")
+    assert driver.installs == 2 and len(driver.addons) == 1
+
+
+def test_released_sessions_go_back_to_the_pool_without_the_hook():
+    pool = DriverPool()
+    driver = PooledDriver(FakeDriver())
+    install_capture_hook(driver, "/api/offers")
+    pool.release(driver)
+    assert pool.idle == [driver]
+    assert driver.addons == {} and driver.scraper_addons == {}
+    # The next scraper of the session installs it again
+    assert install_capture_hook(driver, "/api/offers") and driver.installs == 2
@@ -0,0 +1,95 @@
+import math
+from datetime import datetime
+import numpy as np
+import pytest
+from utils.normalize import normalize_salaries, normalize_dates, normalize_remote, normalize_jobs
+
+
+def salary(text):
+    columns = normalize_salaries([text])
+    return {name: values[0] for name, values in columns.items()}
+
+
+def nan_or(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+@pytest.mark.parametrize("text, low, high, currency, period, basis", [
+    ("10 000 - 15 000 PLN", 10000, 15000, 'PLN', 'month', None),
+    ("12 000–18 000 zł brutto / mies.", 12000, 18000, 'PLN', 'month', 'gross'),
+    ("10-15k EUR", 10000, 15000, 'EUR', 'month', None),
+    ("50 - 70 USD/h", 50, 70, 'USD', 'hour', None),
+    ("80 000 - 100 000 € / year", 80000, 100000, 'EUR', 'year', None),
+    ("1 000 000 PLN", 1000000, 1000000, 'PLN', 'month', None),
+    ("3 500,50 zł", 3500.5, 3500.5, 'PLN', 'month', None),
+    ("25,50 EUR / hour", 25.5, 25.5, 'EUR', 'hour', None),
+])
+def test_salary_ranges(text, low, high, currency, period, basis):
+    parsed = salary(text)
+    assert parsed['salary_min'] == low
+    assert parsed['salary_max'] == high
+    assert (parsed['currency'], parsed['salary_period'], parsed['salary_basis']) == (currency, period, basis)
+
+
+def test_salary_with_only_one_bound():
+    up_to = salary("do 15 000 zł")
+    assert (nan_or(up_to['salary_min']), up_to['salary_max']) == (None, 15000)
+    from_only = salary("od 8000 PLN netto")
+    assert (from_only['salary_min'], nan_or(from_only['salary_max'])) == (8000, None)
+    assert from_only['salary_basis'] == 'net'
+
+
+@pytest.mark.parametrize("text", ["Undisclosed Salary", "", None])
+def test_salary_without_amount(text):
+    parsed = salary(text)
+    assert math.isnan(parsed['salary_min']) and math.isnan(parsed['salary_max'])
+    assert parsed['currency'] is None and parsed['salary_period'] is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-01-15", "2025-01-15"),
+    ("2025-01-15T10:00:00Z", "2025-01-15"),
+    ("15.01.2025", "2025-01-15"),
+    ("1 stycznia 2025", "2025-01-01"),
+    ("3. März 2025", "2025-03-03"),
+    ("Opublikowano: 12 sie 2024", "2024-08-12"),
+    ("dzisiaj", "2025-03-10"),
+    ("wczoraj", "2025-03-09"),
+    ("3 dni temu", "2025-03-07"),
+    ("2 weeks ago", "2025-02-24"),
+    ("vor 5 Tagen", "2025-03-05"),
+    ("an hour ago", "2025-03-10"),
+    ("a day ago", "2025-03-09"),
+    ("tydzień temu", "2025-03-03"),
+    ("vor einem Monat", "2025-02-08"),
+    ("5days ago", "2025-03-05"),
+])
+def test_dates(text, expected):
+    parsed = normalize_dates([text], [datetime(2025, 3, 10, 12)])
+    assert parsed[0] == np.datetime64(expected)
+
+
+@pytest.mark.parametrize("text", ["31 lutego 2025", "whenever", "", None, "Montag", "Saturday", "Vertrag",
+                                  "Sunday brunch", "Monatsgehalt"])
+def test_unparseable_dates_are_nat(text):
+    assert np.isnat(normalize_dates([text], [datetime(2025, 3, 10)])[0])
+
+
+def test_relative_dates_count_back_from_each_rows_scrape_time():
+    parsed = normalize_dates(["wczoraj", "wczoraj"], [datetime(2025, 3, 10), datetime(2025, 1, 1)])
+    assert list(parsed) == [np.datetime64("2025-03-09"), np.datetime64("2024-12-31")]
+
+
+def test_remote_reads_every_column():
+    modes = normalize_remote(["Praca zdalna", "Hybrid", "Stacjonarnie", "", None],
+                             ["", "", "", "home office", None])
+    assert list(modes) == ['remote', 'hybrid', 'onsite', 'remote', None]
+
+
+def test_normalize_jobs_returns_python_values_with_none_for_missing():
+    columns = normalize_jobs(["5 000 PLN", None], ["2025-01-15", "soon"], (["remote", ""],),
+                             [datetime(2025, 3, 10)] * 2)
+    assert columns['salary_min'] == [5000.0, None]
+    assert columns['currency'] == ['PLN', None]
+    assert columns['published_date'][1] is None
+    assert columns['remote'] == ['remote', None]
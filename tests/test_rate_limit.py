@@ -0,0 +1,143 @@
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from utils import rate_limit
+from utils.rate_limit import RateLimiter, HostLimit, looks_blocked, html_title, retry_after_seconds
+
+URL = "https://example.com/jobs?page=1"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(monotonic=clock, time=time.time))
+    return clock
+
+
+def finish(limiter, clock, **result):
+    """Admit one request to URL and report it after a short while"""
+    ticket = limiter.acquire(URL)
+    clock.now += 0.1
+    ticket.done(**result)
+    # Past the once-per-second guard on slowing down
+    clock.now += 1.0
+    return limiter.hosts['example.com']
+
+
+def test_token_bucket_and_in_flight_slots():
+    limit = HostLimit('example.com', rate=2.0, burst=2, max_in_flight=2)
+    now = limit.updated
+    assert limit.try_acquire(now) == 0
+    assert limit.try_acquire(now) == 0
+    # Both slots taken: only a finishing request can free one
+    assert limit.try_acquire(now) is None
+    limit.in_flight = 0
+    # Bucket empty: the next token is due in 1 / rate seconds
+    assert limit.try_acquire(now) == pytest.approx(0.5)
+    assert limit.try_acquire(now + 0.5) == 0
+
+
+def test_healthy_responses_raise_the_rate_up_to_max_rate(clock):
+    limiter = RateLimiter(rate=1.0, max_rate=1.5, increase=0.2)
+    limit = finish(limiter, clock, status=200)
+    assert limit.rate == pytest.approx(1.2)
+    for _ in range(5):
+        limit = finish(limiter, clock, status=200)
+    assert limit.rate == pytest.approx(1.5)
+    assert limit.in_flight == 0
+
+
+def test_throttling_halves_the_rate_down_to_min_rate(clock):
+    limiter = RateLimiter(rate=1.0, min_rate=0.3, decrease=0.5)
+    limit = finish(limiter, clock, status=429)
+    assert limit.rate == pytest.approx(0.5)
+    assert limit.stats['throttled'] == 1
+    clock.now += 10
+    limit = finish(limiter, clock, status=503)
+    assert limit.rate == pytest.approx(0.3)
+
+
+def test_errors_and_slow_responses_back_off(clock):
+    limiter = RateLimiter(rate=4.0, slow_seconds=5.0)
+    assert finish(limiter, clock, status=500).rate == pytest.approx(2.0)
+    assert finish(limiter, clock, error=True).rate == pytest.approx(1.0)
+
+    ticket = limiter.acquire(URL)
+    clock.now += 6.0
+    ticket.done(status=200)
+    limit = limiter.hosts['example.com']
+    assert limit.rate == pytest.approx(0.5)
+    assert limit.stats['slow'] == 1 and limit.stats['errors'] == 2
+
+
+def test_requests_failing_together_back_off_once(clock):
+    limiter = RateLimiter(rate=4.0, max_in_flight=4)
+    tickets = [limiter.acquire(URL) for _ in range(3)]
+    for ticket in tickets:
+        ticket.done(status=429)
+    assert limiter.hosts['example.com'].rate == pytest.approx(2.0)
+
+
+def test_retry_after_and_block_pages_pause_the_host(clock):
+    limiter = RateLimiter(rate=4.0, block_pause=60.0)
+    ticket = limiter.acquire(URL)
+    ticket.done(status=429, retry_after="30")
+    limit = limiter.hosts['example.com']
+    assert limit.try_acquire(clock.now) == pytest.approx(30.0)
+
+    clock.now += 31
+    ticket = limiter.acquire(URL)
+    ticket.done(status=200, blocked=True)
+    assert limit.stats['blocked'] == 1
+    assert limit.try_acquire(clock.now) == pytest.approx(60.0)
+
+
+def test_ticket_context_manager_reports_errors_but_not_abandoned_generators(clock):
+    limiter = RateLimiter(rate=4.0)
+    with pytest.raises(ValueError):
+        with limiter.acquire(URL):
+            raise ValueError("page broke")
+    limit = limiter.hosts['example.com']
+    assert limit.stats['errors'] == 1
+
+    clock.now += 2
+    with pytest.raises(GeneratorExit):
+        with limiter.acquire(URL):
+            raise GeneratorExit()
+    assert limit.stats['errors'] == 1
+    assert limit.in_flight == 0
+
+
+def test_a_ticket_is_reported_once(clock):
+    limiter = RateLimiter(rate=4.0)
+    ticket = limiter.acquire(URL)
+    ticket.done(status=500)
+    ticket.done(status=500)
+    assert limiter.hosts['example.com'].in_flight == 0
+    assert limiter.hosts['example.com'].stats['errors'] == 1
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("12") == 12.0
+    assert retry_after_seconds("-3") == 0.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 < retry_after_seconds(in_a_minute) <= 60
+
+
+def test_block_page_detection():
+    assert looks_blocked(html_title("<html><head><title>Just a moment...</title></head></html>"))
+    assert looks_blocked("Zugriff verweigert")
+    assert not looks_blocked(html_title("<title>Python Developer - Jobs</title>"))
+    assert not looks_blocked(html_title(None))
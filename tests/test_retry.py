@@ -0,0 +1,109 @@
+import asyncio
+import random
+import pytest
+from utils import retry
+from utils.retry import PageRetry, backoff_delay
+
+
+class Flaky:
+    """Step that fails `failures` times before it returns 'ok'"""
+
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error(f"attempt {self.calls} failed")
+        return 'ok'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(retry.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_backoff_is_full_jitter_and_capped():
+    random.seed(7)
+    for attempt in range(8):
+        delays = [backoff_delay(attempt, base_delay=1.0, max_delay=10.0) for _ in range(200)]
+        assert all(0 <= delay <= min(10.0, 2 ** attempt) for delay in delays)
+    # Spread over the whole window rather than pinned to its top
+    delays = [backoff_delay(6, base_delay=1.0, max_delay=10.0) for _ in range(200)]
+    assert min(delays) < 2 and max(delays) > 8
+
+
+def test_escalates_from_reload_to_a_new_session():
+    assert [PageRetry('t', attempts=4).escalation(attempt) for attempt in range(3)] == \
+        ['reload', 'reload', 'new_session']
+    # With a single retry there is no room to escalate
+    assert PageRetry('t', attempts=2).escalation(0) == 'reload'
+
+
+def test_call_retries_with_backoff_and_recovers(sleeps):
+    page_retry = PageRetry('t', attempts=3, base_delay=0.5)
+    levels = []
+    step = Flaky(2)
+    assert page_retry.call(4, step, levels.append) == 'ok'
+    assert step.calls == 3
+    assert levels == ['reload', 'new_session']
+    assert len(sleeps) == 2 and sleeps[0] <= 0.5 and sleeps[1] <= 1.0
+    assert page_retry.stats == {'retries': 2, 'reloads': 1, 'new_sessions': 1, 'recovered': 1, 'failed': 0}
+    assert page_retry.page_retries[4] == 2
+
+
+def test_call_raises_the_last_error_once_attempts_run_out(sleeps):
+    page_retry = PageRetry('t', attempts=3)
+    step = Flaky(5)
+    with pytest.raises(ConnectionError, match="attempt 3"):
+        page_retry.call(1, step)
+    assert step.calls == 3
+    assert page_retry.stats['recovered'] == 0
+
+
+def test_errors_outside_retry_on_are_not_retried(sleeps):
+    page_retry = PageRetry('t', attempts=3, retry_on=(ConnectionError,))
+    step = Flaky(1, error=KeyError)
+    with pytest.raises(KeyError):
+        page_retry.call(1, step)
+    assert step.calls == 1 and not sleeps
+
+
+def test_a_failing_recovery_does_not_end_the_retries(sleeps):
+    page_retry = PageRetry('t', attempts=3, retry_on=(ConnectionError,))
+
+    def recover(level):
+        raise ConnectionError("browser did not restart")
+
+    assert page_retry.call(1, Flaky(2), recover) == 'ok'
+
+
+def test_call_async(monkeypatch):
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr(retry.asyncio, 'sleep', no_sleep)
+    page_retry = PageRetry('t', attempts=2)
+    flaky = Flaky(1)
+
+    async def step():
+        return flaky()
+
+    assert asyncio.run(page_retry.call_async(9, step)) == 'ok'
+    # Without a recover callback a retry is the same request again
+    assert page_retry.stats['retries'] == 1 and page_retry.stats['reloads'] == 0
+
+
+def test_failed_pages_are_kept_for_the_end_of_run_retry():
+    page_retry = PageRetry('t')
+    page_retry.page_failed(3, ConnectionError("down"))
+    page_retry.page_failed(7, ConnectionError("down"))
+    assert page_retry.take_failed() == [3, 7]
+    assert page_retry.take_failed() == []
+    page_retry.page_recovered(3)
+    page_retry.page_failed(7, ConnectionError("still down"))
+    assert page_retry.as_dict()['failed_pages'] == [7]
+    assert page_retry.stats['failed'] == 3 and page_retry.stats['recovered'] == 1
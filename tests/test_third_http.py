@@ -0,0 +1,93 @@
+import asyncio
+import urllib.request
+import aiohttp
+import pytest
+from benchmarks.fixture_server import FixtureServer
+from scrapers.third_jobs_scrapper import ThirdJobsScraper, parse_jobs_html, parse_total_pages
+from utils.checkpoint import CheckpointStore
+from utils.http_cache import HttpCache
+
+PAGES = 5
+PER_PAGE = 4
+
+
+@pytest.fixture
+def server():
+    with FixtureServer(total_pages=PAGES, per_page=PER_PAGE) as server:
+        yield server
+
+
+def scraper(server, **options):
+    return ThirdJobsScraper(fetch_mode='http', base_url=server.make_it_in_germany_url, concurrency=3,
+                            rate_limiter=server.rate_limiter(), page_retries=0, **options)
+
+
+def collect(async_iterator):
+    async def pages():
+        return [page_jobs async for page_jobs in async_iterator]
+    return asyncio.run(pages())
+
+
+def test_listing_pages_parse_with_lxml(server):
+    page_url = scraper(server).page_url(2)
+    with urllib.request.urlopen(page_url) as response:
+        page_html = response.read().decode('utf-8')
+    jobs = parse_jobs_html(page_html, page_url)
+    assert parse_total_pages(page_html) == PAGES
+    assert len(jobs) == PER_PAGE
+    assert all(job['title'] and job['company'] and job['location'] and job['date'] for job in jobs)
+    assert all(job['url'].startswith(server.url) for job in jobs)
+
+
+def test_every_page_is_fetched_once_and_yielded_in_order(server):
+    third_page = scraper(server)
+    pages = collect(third_page.aiter_pages())
+    assert [len(page_jobs) for page_jobs in pages] == [PER_PAGE] * PAGES
+    urls = [job['url'] for page_jobs in pages for job in page_jobs]
+    assert len(set(urls)) == PAGES * PER_PAGE
+    assert third_page.crawl_stats['pages_total'] == PAGES and third_page.crawl_stats['pages_visited'] == PAGES
+    assert server.requests == PAGES
+
+
+def test_pages_the_cache_has_are_answered_304_and_not_parsed_again(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    try:
+        assert len(list(scraper(server, http_cache=cache).iter_jobs())) == PAGES * PER_PAGE
+        second_run = scraper(server, http_cache=cache)
+        assert list(second_run.iter_jobs()) == []
+        assert cache.stats['hit'] == PAGES
+        assert second_run.crawl_stats['pages_unchanged'] == PAGES
+    finally:
+        cache.close()
+
+
+def test_a_failing_page_is_left_out_and_recorded_on_the_checkpoint(server, tmp_path):
+    route = server.route
+
+    def failing_page_3(path, query):
+        if query.get('tx_solr[page]') == ['3']:
+            return 500, 'text/plain', 'Internal Server Error'
+        return route(path, query)
+
+    server.route = failing_page_3
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    try:
+        checkpoint = store.start('third_page', 'run1')
+        third_page = scraper(server, checkpoint=checkpoint)
+        jobs = list(third_page.iter_jobs())
+        assert len(jobs) == (PAGES - 1) * PER_PAGE
+        assert 3 in third_page.retry.failed and checkpoint.failed_pages == [3]
+    finally:
+        store.close()
+
+
+def test_a_failing_first_page_ends_the_crawl_and_is_recorded(tmp_path):
+    with FixtureServer(total_pages=PAGES, per_page=PER_PAGE, fail_rate=1.0) as server:
+        store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+        try:
+            checkpoint = store.start('third_page', 'run1')
+            with pytest.raises(aiohttp.ClientResponseError):
+                list(scraper(server, checkpoint=checkpoint).iter_jobs())
+            assert checkpoint.failed_pages == [1] and checkpoint.position == 0
+        finally:
+            store.close()
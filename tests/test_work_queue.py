@@ -0,0 +1,170 @@
+import psycopg2
+import psycopg2.pool
+import pytest
+from utils import work_queue
+from utils.work_queue import ClaimedTask, WorkQueue
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = 0
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.connection.pool.executed.append((query, params))
+        self.rows, self.rowcount = self.connection.pool.results.pop(0)
+        self.description = [('column',)] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.committed = self.rolled_back = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed += 1
+
+    def rollback(self):
+        self.rolled_back += 1
+        if self.pool.broken:
+            raise psycopg2.InterfaceError("connection already closed")
+
+
+class FakePool:
+    """Hands out one connection that records each statement and answers with the queued (rows, rowcount)"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.executed = []
+        self.connection = FakeConnection(self)
+        self.returned = []
+        self.exhausted = 0
+        self.broken = False
+        self.closed = False
+
+    def getconn(self):
+        if self.exhausted:
+            self.exhausted -= 1
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        return self.connection
+
+    def putconn(self, connection, close=False):
+        self.returned.append(close)
+
+
+def make_queue(*results):
+    pool = FakePool(*results)
+    return WorkQueue(pool, 'crawl1', worker_id='worker-a', lease=30.0), pool
+
+
+def claimed_row(previous_status='pending', previous_worker=None):
+    return (7, 'third_page', 'third_page:page:3', {'page': 3}, 1, 3, previous_status, previous_worker)
+
+
+def test_claim_leases_the_next_task_for_this_worker():
+    queue, pool = make_queue(([], 0), ([claimed_row()], 1))
+    task = queue.claim()
+    assert (task.id, task.label, task.payload, task.attempts) == (7, 'third_page:page:3', {'page': 3}, 1)
+    assert queue.held == {7: task}
+    (give_up, give_up_params), (claim, claim_params) = pool.executed
+    assert "attempts >= max_attempts" in give_up
+    assert "FOR UPDATE SKIP LOCKED" in claim
+    assert claim_params == {'crawl_id': 'crawl1', 'worker': 'worker-a', 'lease': 30.0}
+    assert queue.stats['claimed'] == 1 and queue.stats['reclaimed'] == 0
+    assert pool.connection.committed == 2 and pool.returned == [False, False]
+
+
+def test_claiming_an_expired_lease_counts_as_reclaimed():
+    queue, _ = make_queue(([], 0), ([claimed_row('running', 'worker-b')], 1))
+    queue.claim()
+    assert queue.stats['reclaimed'] == 1
+
+
+def test_claim_returns_none_when_the_queue_is_empty_or_stopped():
+    queue, pool = make_queue(([], 0), ([], 0))
+    assert queue.claim() is None
+    queue.stop()
+    assert queue.claim() is None
+    assert len(pool.executed) == 2
+
+
+def test_complete_only_counts_tasks_still_held():
+    queue, pool = make_queue(([], 1), ([], 0))
+    task = ClaimedTask(7, 'third_page', 'third_page:page:3', {}, 1, 3)
+    queue.held[7] = task
+    queue.complete(task, jobs=20)
+    query, params = pool.executed[0]
+    assert "status = 'done'" in query and params == (20, 7, 'worker-a')
+    assert queue.held == {}
+    queue.complete(task, jobs=20)
+    assert queue.stats['done'] == 1 and queue.stats['lost'] == 1
+
+
+@pytest.mark.parametrize('rows, counted', [
+    ([('pending',)], 'retried'),
+    ([('failed',)], 'failed'),
+    ([], 'lost'),
+])
+def test_fail_counts_the_status_the_task_ends_up_in(rows, counted):
+    queue, pool = make_queue((rows, len(rows)))
+    task = ClaimedTask(7, 'third_page', 'third_page:page:3', {}, 3, 3)
+    queue.fail(task, "x" * 3000)
+    _, params = pool.executed[0]
+    assert len(params[0]) == 2000 and params[1:] == (7, 'worker-a')
+    assert queue.stats[counted] == 1
+
+
+def test_enqueue_sends_one_row_per_task_and_counts_the_new_ones(monkeypatch):
+    sent = []
+
+    def execute_values(cursor, query, values, fetch=False):
+        sent.append((query, values))
+        return [(1,)]
+
+    monkeypatch.setattr(work_queue, 'execute_values', execute_values)
+    queue, _ = make_queue()
+    added = queue.enqueue([('third_page', 'third_page:page:1', {'page': 1}),
+                           ('third_page', 'third_page:page:2', {'page': 2})])
+    assert added == 1 and queue.stats['enqueued'] == 1
+    query, values = sent[0]
+    assert "ON CONFLICT (crawl_id, label) DO NOTHING" in query
+    assert [(crawl_id, label, max_attempts) for crawl_id, _, label, _, max_attempts in values] == [
+        ('crawl1', 'third_page:page:1', 3), ('crawl1', 'third_page:page:2', 3)]
+    assert queue.enqueue([]) == 0 and len(sent) == 1
+
+
+def test_a_failed_statement_is_rolled_back_and_the_connection_returned():
+    queue, pool = make_queue()  # no queued result: execute raises IndexError
+    with pytest.raises(IndexError):
+        queue.counts()
+    assert pool.connection.rolled_back == 1 and pool.returned == [False]
+
+
+def test_statements_wait_for_a_connection_while_the_pool_is_exhausted():
+    queue, pool = make_queue(([], 1))
+    pool.exhausted = 2
+    task = ClaimedTask(7, 'third_page', 'third_page:page:3', {}, 1, 3)
+    queue.complete(task, jobs=20)
+    assert queue.stats['done'] == 1 and pool.exhausted == 0
+
+
+def test_a_connection_that_cannot_roll_back_is_closed_instead_of_returned():
+    queue, pool = make_queue()
+    pool.broken = True
+    with pytest.raises(IndexError):
+        queue.counts()
+    assert pool.returned == [True]
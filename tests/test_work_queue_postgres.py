@@ -0,0 +1,87 @@
+"""The work queue against a real Postgres; skipped unless DATABASE_URL is set"""
+import threading
+import time
+import psycopg2
+import pytest
+from utils.db import create_connection_pool
+from utils.work_queue import WorkQueue
+
+
+@pytest.fixture
+def pool(database_dsn):
+    pool = create_connection_pool(max_connections=10, dsn=database_dsn)
+    yield pool
+    pool.closeall()
+
+
+def seed(pool, pages, **options):
+    queue = WorkQueue(pool, 'crawl1', worker_id='seeder', **options)
+    queue.enqueue(('third_page', f'third_page:page:{page}', {'page': page}) for page in range(1, pages + 1))
+    return queue
+
+
+def test_enqueueing_the_same_tasks_again_adds_nothing(pool):
+    queue = seed(pool, 3)
+    assert queue.enqueue([('third_page', 'third_page:page:1', {'page': 1})]) == 0
+    assert queue.counts() == {'pending': 3}
+
+
+def test_a_task_locked_by_another_claim_is_skipped_not_waited_for(pool, database_dsn):
+    seed(pool, 2)
+    other = psycopg2.connect(database_dsn)
+    try:
+        with other.cursor() as cursor:
+            cursor.execute("SELECT id FROM crawl_tasks WHERE label = 'third_page:page:1' FOR UPDATE")
+        start = time.monotonic()
+        task = WorkQueue(pool, 'crawl1', worker_id='worker-a').claim()
+        assert task.label == 'third_page:page:2' and time.monotonic() - start < 1
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_concurrent_workers_never_claim_the_same_task(pool):
+    seed(pool, 24)
+    claimed = []
+    lock = threading.Lock()
+
+    def work(worker_id):
+        queue = WorkQueue(pool, 'crawl1', worker_id=worker_id)
+        while (task := queue.claim()) is not None:
+            with lock:
+                claimed.append(task.label)
+            queue.complete(task, jobs=1)
+
+    threads = [threading.Thread(target=work, args=(f'worker-{n}',)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(f'third_page:page:{page}' for page in range(1, 25))
+    assert WorkQueue(pool, 'crawl1').counts() == {'done': 24}
+
+
+def test_an_expired_lease_is_reclaimed_and_the_old_worker_loses_the_task(pool):
+    seed(pool, 1, max_attempts=2)
+    # No heartbeat is started, so the lease runs out like the worker died
+    dead = WorkQueue(pool, 'crawl1', worker_id='dead', lease=0.2)
+    task = dead.claim()
+    alive = WorkQueue(pool, 'crawl1', worker_id='alive', lease=30)
+    assert alive.claim() is None
+    time.sleep(0.3)
+
+    again = alive.claim()
+    assert (again.id, again.attempts) == (task.id, 2) and alive.stats['reclaimed'] == 1
+    dead.complete(task, jobs=5)
+    assert dead.stats['lost'] == 1
+    alive.complete(again, jobs=5)
+    assert alive.counts() == {'done': 1}
+
+
+def test_a_task_whose_last_attempt_expired_is_given_up(pool):
+    seed(pool, 1, max_attempts=1)
+    WorkQueue(pool, 'crawl1', worker_id='dead', lease=0.1).claim()
+    time.sleep(0.2)
+    queue = WorkQueue(pool, 'crawl1', worker_id='alive')
+    assert queue.claim() is None
+    assert queue.counts() == {'failed': 1}
@@ -0,0 +1,180 @@
+import os
+import time
+import sqlite3
+import threading
+from utils.config import CACHE_DIR
+from utils.logger import Logger
+
+logger = Logger()
+
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "checkpoints.sqlite")
+
+
+class Checkpoint:
+    """
+    Progress of one crawl task. Scrapers call page_done() once the consumer
+    has taken a page's jobs and complete() once the listing is exhausted.
+    A page only counts when its jobs are in the database: the consumer
+    takes the pages handed over so far with take_staged() as it submits a
+    batch and reports them back through pages_saved() when the writer is
+    done with it. position is the last page (or scroll) saved with every
+    page before it, so a failed page, or one whose jobs could not be
+    written, keeps the checkpoint from moving past it until it succeeds on
+    a later retry. page_done() can also pass an on_saved callback for the
+    page, called with whether its jobs were saved. Without a store (a work
+    queue task, whose progress the queue keeps) only those callbacks run.
+    """
+
+    def __init__(self, store, label, run_id, position=0, seen=None, resumed=False):
+        self.store = store
+        self.label = label
+        self.run_id = run_id
+        self.position = position
+        self.seen = seen or set()
+        self.resumed = resumed
+        self.failed_pages = []
+        # Highest position completed, failed pages before it or not
+        self.completed = position
+        # Pages handed over but not taken with a batch yet, as (position, keys, on_saved)
+        self.staged = []
+        # Groups of taken pages the writer has not reported back on
+        self.in_flight = 0
+        self.exhausted = False
+        # The writer reports back from its own thread
+        self.lock = threading.Lock()
+
+    def page_done(self, position, keys=(), on_saved=None):
+        with self.lock:
+            self.staged.append((position, list(keys), on_saved))
+
+    def take_staged(self):
+        """The pages handed over so far, whose jobs are all in the batches submitted up to now"""
+        with self.lock:
+            pages, self.staged = self.staged, []
+            self.in_flight += 1
+        return pages
+
+    def pages_saved(self, pages, saved=True):
+        """Report back on pages from take_staged(); pages whose jobs were not saved count as failed"""
+        with self.lock:
+            self.in_flight -= 1
+            new_keys = []
+            for position, keys, _ in pages:
+                if saved:
+                    new_keys.extend(self._advance(position, keys))
+                elif position not in self.failed_pages:
+                    self.failed_pages.append(position)
+            if pages and self.store:
+                self.store.save(self, new_keys)
+            finished = self.exhausted and not self.in_flight and not self.staged
+        for _, _, on_saved in pages:
+            if on_saved:
+                on_saved(saved)
+        if finished:
+            self._finish()
+
+    def _advance(self, position, keys):
+        keys = [key for key in keys if key not in self.seen]
+        self.seen.update(keys)
+        self.completed = max(self.completed, position)
+        if position in self.failed_pages:
+            # A failed page that succeeded when retried later in the run
+            self.failed_pages.remove(position)
+        if self.failed_pages:
+            self.position = max(self.position, min(self.failed_pages) - 1)
+        else:
+            self.position = max(self.position, self.completed)
+        return keys
+
+    def page_failed(self, position):
+        with self.lock:
+            if position not in self.failed_pages:
+                self.failed_pages.append(position)
+
+    def complete(self):
+        """The listing is exhausted; the task is finished once its last pages are saved"""
+        with self.lock:
+            self.exhausted = True
+            finished = not self.in_flight and not self.staged
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        if self.store is None:
+            return
+        if self.failed_pages:
+            logger.warning(f"{self.label}: pages {self.failed_pages} failed or were not saved, keeping the "
+                           f"checkpoint at {self.position} for --resume")
+            return
+        self.store.finish(self)
+
+
+class CheckpointStore:
+    """
+    Small SQLite file with per-task crawl progress: the run ID, the last
+    completed page or scroll index and the keys of the jobs already handed
+    over. A task that did not finish can be continued with resume=True.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            label TEXT PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS seen_jobs (
+            label TEXT NOT NULL,
+            job_key TEXT NOT NULL,
+            PRIMARY KEY (label, job_key)
+        );
+        """)
+        self.db.commit()
+
+    def start(self, label, run_id, resume=False):
+        """
+        Return the Checkpoint for a task. With resume=True an unfinished
+        checkpoint is continued under its original run ID; otherwise, or
+        when the last run of the task completed, it starts from scratch.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT run_id, position, status FROM checkpoints WHERE label = ?",
+                                  (label,)).fetchone()
+            if resume and row is not None and row[2] == 'running':
+                seen = {key for key, in self.db.execute("SELECT job_key FROM seen_jobs WHERE label = ?", (label,))}
+                logger.info(f"Resuming {label} from run {row[0]} after position {row[1]} ({len(seen)} jobs already saved)")
+                return Checkpoint(self, label, row[0], row[1], seen, resumed=True)
+
+            self.db.execute("DELETE FROM seen_jobs WHERE label = ?", (label,))
+            self.db.execute("""
+            INSERT INTO checkpoints (label, run_id, position, status, updated_at) VALUES (?, ?, 0, 'running', ?)
+            ON CONFLICT (label) DO UPDATE SET run_id = excluded.run_id, position = 0, status = 'running',
+                updated_at = excluded.updated_at
+            """, (label, run_id, time.time()))
+            self.db.commit()
+        return Checkpoint(self, label, run_id)
+
+    def save(self, checkpoint, new_keys):
+        with self.lock:
+            self.db.executemany("INSERT OR IGNORE INTO seen_jobs (label, job_key) VALUES (?, ?)",
+                                ((checkpoint.label, str(key)) for key in new_keys))
+            self.db.execute("UPDATE checkpoints SET position = ?, updated_at = ? WHERE label = ?",
+                            (checkpoint.position, time.time(), checkpoint.label))
+            self.db.commit()
+
+    def finish(self, checkpoint):
+        """Mark the task complete; its seen keys are no longer needed"""
+        with self.lock:
+            self.db.execute("DELETE FROM seen_jobs WHERE label = ?", (checkpoint.label,))
+            self.db.execute("UPDATE checkpoints SET status = 'complete', position = ?, updated_at = ? WHERE label = ?",
+                            (checkpoint.position, time.time(), checkpoint.label))
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,25 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Fetch database variables
+USER = os.getenv("user")
+PASSWORD = os.getenv("password")
+HOST = os.getenv("host")
+PORT = os.getenv("port")
+DBNAME = os.getenv("dbname")
+
+# Local state (driver path cache, etc.) lives here between runs
+CACHE_DIR = os.getenv("cache_dir", os.path.join(os.path.expanduser("~"), ".cache", "web-crawler"))
+
+# Third-party hosts (and their subdomains) blocked in lean browser mode,
+# comma separated. Analytics, tag managers, ads and chat widgets by default.
+BLOCKED_DOMAINS = [domain.strip() for domain in os.getenv(
+    "blocked_domains",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,googleadservices.com,"
+    "facebook.net,facebook.com,hotjar.com,clarity.ms,bing.com,linkedin.com,licdn.com,tiktok.com,"
+    "criteo.com,criteo.net,adnxs.com,taboola.com,onesignal.com,intercom.io,cookiebot.com,newrelic.com,"
+    "nr-data.net,sentry.io,gemius.pl,smartlook.com"
+).split(",") if domain.strip()]
@@ -0,0 +1,761 @@
+import io
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+import psycopg2
+import psycopg2.pool
+from utils.config import USER, PASSWORD, HOST, PORT, DBNAME
+from utils.fingerprint import stable_job_id, content_fingerprint, find_near_duplicates
+from utils.normalize import column_values, normalize_jobs, normalize_salaries
+from utils.logger import Logger
+
+logger = Logger()
+
+# Columns written by the scrapers, in the order used for staging and inserts
+JOB_COLUMNS = (
+    'job_id', 'title', 'company', 'position', 'location',
+    'salary', 'salary_min', 'salary_max', 'currency', 'salary_period', 'salary_basis', 'url', 'description',
+    'published_date', 'job_type', 'contract_type', 'remote_status', 'remote',
+    'technologies', 'source', 'scraped_at', 'source_url', 'status', 'fingerprint'
+)
+
+UNIQUE_CONSTRAINT_NAME = 'uq_jobs_job_id_source'
+LEGACY_INDEX_NAME = 'idx_jobs_job_id_source'
+FINGERPRINT_INDEX_NAME = 'idx_jobs_fingerprint'
+
+# Rows moved or re-parsed per transaction by the data migrations
+LEGACY_MOVE_BATCH_SIZE = 5000
+
+# Source of moved legacy rows that had none
+LEGACY_UNKNOWN_SOURCE = 'unknown'
+
+
+def connect_to_database():
+    try:
+        connection = psycopg2.connect(
+            user=USER,
+            password=PASSWORD,
+            host=HOST,
+            port=PORT,
+            dbname=DBNAME
+        )
+        logger.info("Database connection successful!")
+        return connection
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor that books the time of every statement on a PhaseTimer, keyed by
+    the statement's first keyword (insert, copy, select, ...). Installed on
+    a connection with instrument_connection().
+    """
+
+    timer = None
+
+    def _timed(self, kind, call, *args):
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            self.timer.add(kind, time.perf_counter() - start)
+
+    def execute(self, query, vars=None):
+        return self._timed(_statement_kind(query), super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(_statement_kind(query), super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed('copy', super().copy_expert, sql, file, size)
+
+
+def _statement_kind(query):
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    words = str(query).split(None, 1)
+    return words[0].lower() if words else 'empty'
+
+
+def timed_cursor_factory(timer):
+    return type('TimedCursor', (TimedCursor,), {'timer': timer})
+
+
+@contextmanager
+def instrument_connection(connection, timer):
+    """
+    Time every statement run on connection's cursors (named cursors included)
+    on timer until the block ends. The previous cursor factory is restored
+    afterwards, so a pooled connection does not keep reporting to this timer
+    once it is handed to someone else. A None timer leaves it untouched.
+    """
+    if timer is None:
+        yield connection
+        return
+    previous = connection.cursor_factory
+    connection.cursor_factory = timed_cursor_factory(timer)
+    try:
+        yield connection
+    finally:
+        connection.cursor_factory = previous
+
+
+def create_connection_pool(max_connections=4, timer=None, dsn=None):
+    """
+    Thread-safe pool of connections to the configured database (or dsn).
+    Connections are opened on demand up to max_connections; with a timer
+    their statements are timed like instrument_connection() does.
+    """
+    options = {'cursor_factory': timed_cursor_factory(timer)} if timer else {}
+    if dsn:
+        return psycopg2.pool.ThreadedConnectionPool(1, max_connections, dsn, **options)
+    return psycopg2.pool.ThreadedConnectionPool(1, max_connections, user=USER, password=PASSWORD, host=HOST,
+                                                port=PORT, dbname=DBNAME, **options)
+
+
+def borrow_connection(pool, timeout=30.0, poll_interval=0.05):
+    """
+    pool.getconn() that waits up to timeout seconds for a connection while
+    all of them are in use, instead of raising PoolError right away
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return pool.getconn()
+        except psycopg2.pool.PoolError:
+            if pool.closed or time.monotonic() >= deadline:
+                raise
+            time.sleep(poll_interval)
+
+
+# Columns of the jobs table as first released; older tables that predate a
+# column get it added by the first migration
+_BASE_COLUMNS = (
+    ('job_id', 'VARCHAR(255)'),
+    ('title', 'VARCHAR(255)'),
+    ('company', 'VARCHAR(255)'),
+    ('position', 'VARCHAR(255)'),
+    ('location', 'VARCHAR(255)'),
+    ('salary', 'VARCHAR(255)'),
+    ('url', 'TEXT'),
+    ('source_url', 'TEXT'),
+    ('description', 'TEXT'),
+    ('published_date', 'VARCHAR(255)'),
+    ('job_type', 'VARCHAR(255)'),
+    ('contract_type', 'VARCHAR(255)'),
+    ('remote_status', 'VARCHAR(255)'),
+    ('technologies', 'TEXT[]'),
+    ('source', 'VARCHAR(50)'),
+    ('status', 'VARCHAR(50)'),
+    ('scraped_at', 'TIMESTAMP'),
+    ('created_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+)
+
+# Schema changes in order as (version, description, sql). sql may also be a
+# function taking the connection, for data migrations that commit in batches.
+# Each one runs once and is recorded in schema_migrations. They must also work
+# on tables created before migrations existed.
+MIGRATIONS = (
+    (1, "jobs table", "CREATE TABLE IF NOT EXISTS jobs (id SERIAL PRIMARY KEY);\n" + "\n".join(
+        f"ALTER TABLE jobs ADD COLUMN IF NOT EXISTS {column} {data_type};" for column, data_type in _BASE_COLUMNS
+    )),
+    (2, "unique (job_id, source)", f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT FROM pg_constraint
+                       WHERE conrelid = 'jobs'::regclass AND conname = '{UNIQUE_CONSTRAINT_NAME}') THEN
+            -- The old plain index allowed duplicates; keep the oldest row of each group
+            DELETE FROM jobs a USING jobs b
+            WHERE a.job_id = b.job_id AND a.source = b.source AND a.id > b.id;
+            DROP INDEX IF EXISTS {LEGACY_INDEX_NAME};
+            ALTER TABLE jobs ADD CONSTRAINT {UNIQUE_CONSTRAINT_NAME} UNIQUE (job_id, source);
+        END IF;
+    END $$;
+    """),
+    (3, "fingerprints and cross-source duplicates", f"""
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(32);
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS duplicate_of INTEGER;
+    CREATE INDEX IF NOT EXISTS {FINGERPRINT_INDEX_NAME} ON jobs (fingerprint);
+    """),
+    # A unique constraint on a partitioned table has to include the partition
+    # key, so (job_id, source) uniqueness moves to the job_keys ledger. The old
+    # table is kept as jobs_legacy until migration 5 has moved its rows.
+    (4, "typed columns, monthly partitions and job_keys", f"""
+    CREATE TYPE job_remote AS ENUM ('onsite', 'hybrid', 'remote');
+
+    ALTER TABLE jobs RENAME TO jobs_legacy;
+    ALTER INDEX jobs_pkey RENAME TO jobs_legacy_pkey;
+    ALTER TABLE jobs_legacy RENAME CONSTRAINT {UNIQUE_CONSTRAINT_NAME} TO jobs_legacy_job_id_source_key;
+    ALTER INDEX {FINGERPRINT_INDEX_NAME} RENAME TO jobs_legacy_fingerprint_idx;
+
+    CREATE TABLE jobs (
+        id INTEGER NOT NULL DEFAULT nextval('jobs_id_seq'),
+        job_id VARCHAR(255) NOT NULL,
+        title VARCHAR(255),
+        company VARCHAR(255),
+        position VARCHAR(255),
+        location VARCHAR(255),
+        salary VARCHAR(255),
+        salary_min NUMERIC(12, 2),
+        salary_max NUMERIC(12, 2),
+        currency CHAR(3),
+        salary_period VARCHAR(5),
+        url TEXT,
+        source_url TEXT,
+        description TEXT,
+        published_date DATE,
+        job_type VARCHAR(255),
+        contract_type VARCHAR(255),
+        remote_status VARCHAR(255),
+        remote job_remote,
+        technologies TEXT[],
+        source VARCHAR(50) NOT NULL,
+        status VARCHAR(50),
+        scraped_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        fingerprint VARCHAR(32),
+        duplicate_of INTEGER,
+        PRIMARY KEY (id, scraped_at)
+    ) PARTITION BY RANGE (scraped_at);
+    ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id;
+
+    CREATE TABLE job_keys (
+        job_id VARCHAR(255) NOT NULL,
+        source VARCHAR(50) NOT NULL,
+        id INTEGER NOT NULL,
+        scraped_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (job_id, source)
+    );
+
+    CREATE INDEX idx_jobs_job_id_source ON jobs (job_id, source);
+    CREATE INDEX {FINGERPRINT_INDEX_NAME} ON jobs (fingerprint);
+    CREATE INDEX idx_jobs_source_published ON jobs (source, published_date DESC)
+        INCLUDE (salary_min, salary_max, currency, remote);
+    CREATE INDEX idx_jobs_currency_salary ON jobs (currency, salary_min)
+        INCLUDE (salary_max, salary_period, published_date, source) WHERE salary_min IS NOT NULL;
+    CREATE INDEX idx_jobs_technologies ON jobs USING GIN (technologies);
+    """),
+    (5, "move jobs_legacy rows into the partitioned table", lambda connection: move_legacy_jobs(connection)),
+    (6, "gross/net salary basis", "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS salary_basis VARCHAR(5);"),
+    (7, "re-parse stored salaries with the batch parser", lambda connection: renormalize_salaries(connection)),
+    # Page-level tasks of distributed crawls, see utils/work_queue.py
+    (8, "crawl work queue", """
+    CREATE TABLE crawl_tasks (
+        id BIGSERIAL PRIMARY KEY,
+        crawl_id VARCHAR(64) NOT NULL,
+        source VARCHAR(50) NOT NULL,
+        label TEXT NOT NULL,
+        payload JSONB NOT NULL DEFAULT '{}',
+        status VARCHAR(10) NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        worker TEXT,
+        lease_until TIMESTAMPTZ,
+        heartbeat_at TIMESTAMPTZ,
+        jobs INTEGER,
+        error TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ,
+        UNIQUE (crawl_id, label)
+    );
+    CREATE INDEX idx_crawl_tasks_open ON crawl_tasks (crawl_id, id) WHERE status IN ('pending', 'running');
+    """),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _schema_version(cursor):
+    """Latest applied migration, 0 for a database that has none, None without a migration table"""
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute("SELECT coalesce(max(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def migrate_schema(connection):
+    """
+    Bring the database up to SCHEMA_VERSION. An up-to-date database costs a
+    single query. Pending migrations are applied in order under an advisory
+    lock, so concurrent runs do not apply them twice. There is no single
+    transaction over the run: the data migrations commit in batches so they
+    can continue after an interruption. Instead each migration is committed
+    together with its schema_migrations row, so the table always lists
+    exactly the migrations applied, and a failed run continues at the
+    migration that failed.
+    """
+    cursor = connection.cursor()
+    locked = False
+    try:
+        try:
+            cursor.execute("SELECT max(version) FROM schema_migrations")
+            if cursor.fetchone()[0] == SCHEMA_VERSION:
+                connection.rollback()
+                return SCHEMA_VERSION
+        except psycopg2.errors.UndefinedTable:
+            pass
+        connection.rollback()
+
+        cursor.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+        locked = True
+        current = _schema_version(cursor)
+        if current is None:
+            cursor.execute("""
+            CREATE TABLE schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """)
+            current = 0
+        connection.commit()
+
+        for version, description, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info(f"Applying schema migration {version}: {description}")
+            if callable(migration):
+                migration(connection)
+            else:
+                cursor.execute(migration)
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                           (version, description))
+            connection.commit()
+        logger.info(f"Database schema is at version {SCHEMA_VERSION}")
+        return SCHEMA_VERSION
+    except Exception as e:
+        logger.error(f"Error migrating the database schema: {e}")
+        connection.rollback()
+        raise
+    finally:
+        if locked:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext('schema_migrations'))")
+            connection.commit()
+        cursor.close()
+
+
+def _job_fields(job, source):
+    """The columns of one scraped job that need no batch normalization, plus the raw text it parses"""
+    title = job.get('title', '')
+    url = job.get('url', '')
+    company = job.get('company', '')
+    location = job.get('location', '')
+
+    if source == 'justjoin_categories':
+        job_id = stable_job_id(source, url, title, company, location)
+        description = ''
+        published = job.get('published', '')  # Only set by the network extraction mode
+        job_type = ''
+        contract_type = job.get('contract_type', '')
+        remote_status = job.get('remote_status', '')
+        technologies = job.get('skills', [])
+        salary = job.get('salary', '')
+    elif source == 'second_page':
+        job_id = stable_job_id(source, url, title, company, location, native_id=job.get('offer_id'))
+        description = job.get('short_description', '')
+        published = job.get('published', '')
+        job_type = job.get('job_type', '')
+        contract_type = job.get('contract_type', '')
+        remote_status = ''  # Pracuj doesn't provide remote status in the current scraping
+        technologies = job.get('technologies', [])
+        salary = job.get('salary', '')
+    elif source == 'third_page':
+        job_id = stable_job_id(source, url, title, company, location)
+        description = ''  # Germany scraper doesn't provide description in the current scraping
+        published = job.get('date', '')
+        job_type = ''
+        contract_type = ''
+        remote_status = ''
+        technologies = []
+        salary = ''  # Germany scraper doesn't provide salary in the current scraping
+    else:
+        raise ValueError(f"Unknown source: {source}")
+
+    return {
+        'job_id': job_id, 'title': title, 'company': company, 'position': title, 'location': location,
+        'salary': salary, 'url': url, 'description': description, 'published': published,
+        'job_type': job_type, 'contract_type': contract_type, 'remote_status': remote_status,
+        # Pracuj lists the work mode among its work conditions
+        'work_conditions': job.get('work_conditions', ''),
+        'technologies': technologies, 'source': source,
+        'scraped_at': job.get('scraped_at', time.strftime("%Y-%m-%d %H:%M:%S")),
+        'source_url': url, 'status': 'new', 'fingerprint': content_fingerprint(title, company, location),
+    }
+
+
+def build_job_rows(jobs, source):
+    """
+    Map a batch of scraped job dicts to tuples ordered like JOB_COLUMNS.
+    Salary, publish date and work mode are normalized for the whole batch
+    at once by utils.normalize.
+    """
+    if not jobs:
+        return []
+    columns = {name: [] for name in _job_fields({}, source)}
+    for job in jobs:
+        for name, value in _job_fields(job, source).items():
+            columns[name].append(value)
+    columns.update(normalize_jobs(columns['salary'], columns['published'],
+                                  (columns['remote_status'], columns['work_conditions']), columns['scraped_at']))
+    return list(zip(*(columns[column] for column in JOB_COLUMNS)))
+
+
+def build_job_row(job, source):
+    """Map a single scraped job dict to a tuple ordered like JOB_COLUMNS; prefer build_job_rows for batches"""
+    return build_job_rows([job], source)[0]
+
+
+def _copy_escape(text):
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy_value(value):
+    """Encode a single value in PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        items = ('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value)
+        return _copy_escape('{' + ','.join(items) + '}')
+    return _copy_escape(str(value))
+
+
+def _rows_to_copy_buffer(rows):
+    buffer = io.BytesIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row).encode('utf-8'))
+        buffer.write(b'\n')
+    buffer.seek(0)
+    return buffer
+
+
+def ensure_month_partitions(cursor, staging_table):
+    """
+    Create the monthly jobs partitions that rows in staging_table fall into.
+    Several writers can meet a new month at once, and CREATE TABLE IF NOT
+    EXISTS alone does not stop two of them from creating the same partition,
+    so creation is serialized with a lock held until the transaction ends.
+    """
+    missing_months = f"""
+    SELECT month::date FROM (SELECT DISTINCT date_trunc('month', scraped_at) AS month FROM {staging_table}) months
+    WHERE to_regclass('jobs_' || to_char(month, 'YYYY_MM')) IS NULL;
+    """
+    cursor.execute(missing_months)
+    if not cursor.fetchall():
+        return
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('jobs_partitions'))")
+    # Whoever held the lock before may have created them meanwhile
+    cursor.execute(missing_months)
+    for month, in cursor.fetchall():
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS jobs_{month:%Y_%m} PARTITION OF jobs
+        FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}');
+        """)
+
+
+def _insert_staged_jobs(cursor, staging_table, columns, id_expression="nextval('jobs_id_seq')"):
+    """
+    Insert the staged rows whose (job_id, source) is not in job_keys yet.
+    The key is claimed in job_keys first, so concurrent writers cannot insert
+    the same offer twice. Returns {source: inserted}.
+    """
+    column_list = ', '.join(columns)
+    cursor.execute(f"""
+    WITH staged AS (
+        -- DISTINCT ON keeps duplicates inside one batch from conflicting with each other
+        SELECT DISTINCT ON (job_id, source) {id_expression} AS new_id, {column_list}
+        FROM {staging_table}
+        ORDER BY job_id, source
+    ), claimed AS (
+        INSERT INTO job_keys (job_id, source, id, scraped_at)
+        SELECT job_id, source, new_id, scraped_at FROM staged
+        ON CONFLICT (job_id, source) DO NOTHING
+        RETURNING job_id, source
+    ), inserted AS (
+        INSERT INTO jobs (id, {column_list})
+        SELECT new_id, {column_list} FROM staged JOIN claimed USING (job_id, source)
+        RETURNING source
+    )
+    SELECT source, count(*) FROM inserted GROUP BY source;
+    """)
+    return dict(cursor.fetchall())
+
+
+def bulk_upsert_jobs(connection, rows):
+    """
+    Write job rows (tuples ordered like JOB_COLUMNS) in one round trip per phase:
+    COPY into a temporary staging table, create missing month partitions, then
+    insert the offers whose (job_id, source) is not in job_keys yet.
+
+    Returns {source: {'inserted': n, 'skipped': m}}.
+    """
+    columns = ', '.join(JOB_COLUMNS)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+        CREATE TEMP TABLE jobs_staging ON COMMIT DROP AS
+        SELECT {columns} FROM jobs WITH NO DATA;
+        """)
+        cursor.copy_expert(f"COPY jobs_staging ({columns}) FROM STDIN WITH (ENCODING 'UTF8')", _rows_to_copy_buffer(rows))
+
+        cursor.execute("SELECT source, count(*) FROM jobs_staging GROUP BY source;")
+        staged = dict(cursor.fetchall())
+
+        ensure_month_partitions(cursor, 'jobs_staging')
+        inserted = _insert_staged_jobs(cursor, 'jobs_staging', JOB_COLUMNS)
+
+        connection.commit()
+        return {
+            source: {'inserted': inserted.get(source, 0), 'skipped': count - inserted.get(source, 0)}
+            for source, count in staged.items()
+        }
+    except Exception as e:
+        logger.error(f"Error bulk saving jobs to database: {e}")
+        if not connection.closed:
+            connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _legacy_job_rows(batch):
+    """Typed rows for the partitioned table from a batch of jobs_legacy rows"""
+    (row_ids, job_ids, titles, companies, positions, locations, salaries, urls, source_urls, descriptions,
+     published, job_types, contract_types, remote_statuses, technologies, sources, statuses, scraped_at,
+     created_at, fingerprints, duplicate_of) = (list(column) for column in zip(*batch))
+    # job_id, source and scraped_at could be NULL in the old table but are NOT NULL now
+    scraped_at = [scraped or created or datetime.now() for scraped, created in zip(scraped_at, created_at)]
+    sources = [source or LEGACY_UNKNOWN_SOURCE for source in sources]
+    job_ids = [job_id or stable_job_id(source, url or '', title or '', company or '', location or '')
+               for job_id, source, url, title, company, location in zip(job_ids, sources, urls, titles, companies,
+                                                                        locations)]
+    typed = normalize_jobs(salaries, published, (remote_statuses,), scraped_at)
+    return list(zip(
+        row_ids, job_ids, titles, companies, positions, locations,
+        salaries, typed['salary_min'], typed['salary_max'], typed['currency'], typed['salary_period'],
+        urls, source_urls, descriptions, typed['published_date'], job_types, contract_types, remote_statuses,
+        typed['remote'], technologies, sources, statuses, scraped_at, created_at, fingerprints, duplicate_of
+    ))
+
+
+def move_legacy_jobs(connection, batch_size=LEGACY_MOVE_BATCH_SIZE):
+    """
+    Move the rows of the pre-partitioning table into the typed, partitioned
+    jobs table, batch_size rows per transaction. Moved rows are deleted in
+    the same transaction, so an interrupted move continues where it stopped.
+    jobs_legacy is dropped once it is empty.
+    """
+    columns = ('id', 'job_id', 'title', 'company', 'position', 'location',
+               'salary', 'salary_min', 'salary_max', 'currency', 'salary_period', 'url', 'source_url',
+               'description', 'published_date', 'job_type', 'contract_type', 'remote_status', 'remote',
+               'technologies', 'source', 'status', 'scraped_at', 'created_at', 'fingerprint', 'duplicate_of')
+    legacy_columns = ('id, job_id, title, company, position, location, salary, url, source_url, description, '
+                      'published_date, job_type, contract_type, remote_status, technologies, source, status, '
+                      'scraped_at, created_at, fingerprint, duplicate_of')
+    cursor = connection.cursor()
+    moved = 0
+    try:
+        cursor.execute("SELECT to_regclass('jobs_legacy') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return 0
+        connection.commit()
+
+        while True:
+            cursor.execute(f"SELECT {legacy_columns} FROM jobs_legacy ORDER BY id LIMIT %s", (batch_size,))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            cursor.execute(f"""
+            CREATE TEMP TABLE jobs_move ON COMMIT DROP AS
+            SELECT {', '.join(columns)} FROM jobs WITH NO DATA;
+            """)
+            cursor.copy_expert(f"COPY jobs_move ({', '.join(columns)}) FROM STDIN WITH (ENCODING 'UTF8')",
+                               _rows_to_copy_buffer(_legacy_job_rows(batch)))
+            ensure_month_partitions(cursor, 'jobs_move')
+            _insert_staged_jobs(cursor, 'jobs_move', columns[1:], id_expression='id')
+            cursor.execute("DELETE FROM jobs_legacy WHERE id = ANY(%s)", ([row[0] for row in batch],))
+            connection.commit()
+            moved += len(batch)
+            logger.info(f"Moved {moved} legacy jobs into the partitioned table")
+
+        cursor.execute("DROP TABLE jobs_legacy")
+        connection.commit()
+        return moved
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def renormalize_salaries(connection, batch_size=LEGACY_MOVE_BATCH_SIZE):
+    """
+    Re-parse the salary text of every stored job with the batch parser and
+    update the typed salary columns that changed. Works through the table
+    batch_size rows per transaction, in id order.
+    """
+    columns = ('salary_min', 'salary_max', 'currency', 'salary_period', 'salary_basis')
+    cursor = connection.cursor()
+    last_id = 0
+    updated = 0
+    try:
+        while True:
+            cursor.execute("SELECT id, salary FROM jobs WHERE id > %s ORDER BY id LIMIT %s", (last_id, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            typed = normalize_salaries([salary for _, salary in batch])
+            cursor.execute(f"""
+            CREATE TEMP TABLE jobs_salaries ON COMMIT DROP AS
+            SELECT id, {', '.join(columns)} FROM jobs WITH NO DATA;
+            """)
+            cursor.copy_expert(f"COPY jobs_salaries (id, {', '.join(columns)}) FROM STDIN",
+                               _rows_to_copy_buffer(zip([row_id for row_id, _ in batch],
+                                                        *(column_values(typed[column]) for column in columns))))
+            cursor.execute(f"""
+            UPDATE jobs j SET {', '.join(f'{column} = s.{column}' for column in columns)}
+            FROM jobs_salaries s
+            WHERE j.id = s.id AND ({' OR '.join(f'j.{column} IS DISTINCT FROM s.{column}' for column in columns)});
+            """)
+            updated += cursor.rowcount
+            connection.commit()
+        logger.info(f"Re-parsed salaries, {updated} jobs updated")
+        return updated
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def save_jobs_to_database(connection, jobs, source):
+    """Save scraped jobs to the database"""
+    return save_job_rows(connection, build_job_rows(jobs, source), source)
+
+
+def save_job_rows(connection, rows, source):
+    """Save rows already built with build_job_rows"""
+    if not rows:
+        logger.info(f"No jobs to save from {source}")
+        return {}
+
+    counts = bulk_upsert_jobs(connection, rows)
+    for job_source, result in counts.items():
+        logger.info(f"Added {result['inserted']} new jobs to the database from {job_source} "
+                    f"({result['skipped']} already known)")
+    return counts
+
+
+def _near_duplicate_records(connection, batch_size):
+    """Stream (id, source, text) of every stored job, oldest first, for find_near_duplicates"""
+    with connection.cursor(name='near_duplicate_records') as reader:
+        reader.itersize = batch_size
+        reader.execute("SELECT id, source, title, company, location FROM jobs ORDER BY id")
+        for row_id, source, title, company, location in reader:
+            yield row_id, source, f"{title or ''} {company or ''} {location or ''}"
+
+
+def backfill_fingerprints(connection, near_duplicate_threshold=0.8, batch_size=10000):
+    """
+    Recompute stable job IDs and fingerprints for every stored job, collapse
+    rows that turn out to be the same offer (the oldest row of each group is
+    kept) and mark cross-source near duplicates via duplicate_of.
+
+    The table is worked through in id order, batch_size rows per
+    transaction, so an interrupted backfill keeps what it did and can simply
+    be run again. Near-duplicate detection then streams the rows once more
+    and only keeps their MinHash signatures. Run it while no crawl is
+    writing: offers saved in between batches are not compared.
+
+    Returns {'rows', 'updated', 'removed', 'near_duplicates'}.
+    """
+    native_id_sources = ('second_page',)
+    last_id = 0
+    total = updated = removed = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute("""
+            SELECT id, source, job_id, url, title, company, location, scraped_at FROM jobs
+            WHERE id > %s ORDER BY id LIMIT %s
+            """, (last_id, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            first_id, last_id = batch[0][0], batch[-1][0]
+            rows = []
+            for row_id, source, job_id, url, title, company, location, scraped_at in batch:
+                native_id = job_id if source in native_id_sources else None
+                rows.append((row_id, source, job_id, stable_job_id(source, url, title, company, location, native_id),
+                             content_fingerprint(title, company, location), scraped_at))
+
+            cursor.execute("""
+            CREATE TEMP TABLE jobs_fingerprints (
+                id INTEGER PRIMARY KEY, source VARCHAR(50), old_job_id VARCHAR(255), job_id VARCHAR(255),
+                fingerprint VARCHAR(32), scraped_at TIMESTAMP
+            ) ON COMMIT DROP;
+            """)
+            cursor.copy_expert("COPY jobs_fingerprints FROM STDIN WITH (ENCODING 'UTF8')", _rows_to_copy_buffer(rows))
+
+            # Rows that now share a stable ID are the same offer scraped on different runs. Every row
+            # before this batch already carries its new ID, so the oldest row is the one kept
+            cursor.execute("""
+            DELETE FROM jobs j USING jobs_fingerprints f
+            WHERE j.id = f.id AND (
+                EXISTS (SELECT FROM jobs_fingerprints e
+                        WHERE e.source = f.source AND e.job_id = f.job_id AND e.id < f.id)
+                OR EXISTS (SELECT FROM jobs k WHERE k.job_id = f.job_id AND k.source = f.source AND k.id < %s)
+            );
+            """, (first_id,))
+            removed += cursor.rowcount
+
+            cursor.execute("""
+            UPDATE jobs j SET job_id = f.job_id, fingerprint = f.fingerprint
+            FROM jobs_fingerprints f
+            WHERE j.id = f.id AND (j.job_id IS DISTINCT FROM f.job_id OR j.fingerprint IS DISTINCT FROM f.fingerprint);
+            """)
+            updated += cursor.rowcount
+
+            # Move the batch's (job_id, source) ledger entries to the IDs of the surviving rows
+            cursor.execute("""
+            DELETE FROM job_keys k USING jobs_fingerprints f
+            WHERE k.job_id = f.old_job_id AND k.source = f.source AND k.id = f.id;
+            INSERT INTO job_keys (job_id, source, id, scraped_at)
+            SELECT f.job_id, f.source, f.id, f.scraped_at FROM jobs_fingerprints f JOIN jobs j ON j.id = f.id
+            ON CONFLICT (job_id, source) DO UPDATE SET id = excluded.id, scraped_at = excluded.scraped_at;
+            """)
+            connection.commit()
+            total += len(batch)
+            logger.info(f"Fingerprint backfill: {total} rows done")
+
+        duplicates = find_near_duplicates(_near_duplicate_records(connection, batch_size),
+                                          threshold=near_duplicate_threshold)
+        cursor.execute("""
+        CREATE TEMP TABLE jobs_near_duplicates (id INTEGER PRIMARY KEY, duplicate_of INTEGER) ON COMMIT DROP;
+        """)
+        cursor.copy_expert("COPY jobs_near_duplicates (id, duplicate_of) FROM STDIN",
+                           _rows_to_copy_buffer(duplicates.items()))
+        cursor.execute("""
+        UPDATE jobs SET duplicate_of = NULL
+        WHERE duplicate_of IS NOT NULL AND id NOT IN (SELECT id FROM jobs_near_duplicates);
+        UPDATE jobs j SET duplicate_of = d.duplicate_of
+        FROM jobs_near_duplicates d
+        WHERE j.id = d.id AND j.duplicate_of IS DISTINCT FROM d.duplicate_of;
+        """)
+        connection.commit()
+    except Exception as e:
+        logger.error(f"Error backfilling job fingerprints: {e}")
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    logger.info(f"Fingerprint backfill: {total} rows, {updated} updated, {removed} duplicates removed, "
+                f"{len(duplicates)} cross-source near duplicates")
+    return {'rows': total, 'updated': updated, 'removed': removed, 'near_duplicates': len(duplicates)}
@@ -0,0 +1,184 @@
+import time
+import queue
+import threading
+import psycopg2
+import psycopg2.pool
+from utils.db import JOB_COLUMNS, bulk_upsert_jobs, borrow_connection, instrument_connection
+from utils.logger import Logger
+
+logger = Logger()
+
+# Errors after which the connection is gone but the write can be retried on a
+# new one. bulk_upsert_jobs commits once per batch and skips keys that are
+# already in job_keys, so writing a batch again never duplicates a job.
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Errors caused by the content of a row (a value too long for its column, a
+# number out of range, ...). Writing the batch again cannot help, so it is
+# split until the offending rows are found and dropped.
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+_SOURCE = JOB_COLUMNS.index('source')
+_URL = JOB_COLUMNS.index('url')
+
+
+class DatabaseWriter(threading.Thread):
+    """
+    Background sink that saves job rows while the crawl continues. Rows
+    submitted by the pipeline are buffered and written with one bulk upsert
+    when flush_rows have piled up or flush_interval seconds after the first
+    buffered row, whichever comes first. Writes borrow a connection from
+    pool, waiting while all of them are in use; a connection lost mid-write
+    is discarded and the write retried on a fresh one with exponential
+    backoff. A batch rejected for the content of some rows is bisected so
+    only those rows are dropped, and logged. The queue holds at most
+    max_pending submissions, so a slow database makes submit() block. With
+    a timer, the statements of every borrowed connection are timed on it.
+    An on_saved callback passed with a submission is called once the write
+    that included its rows is over, with True when it went through (rows
+    dropped for their content included, they would fail again) and False
+    when it did not (failed writes are in errors).
+    """
+
+    def __init__(self, pool, flush_rows=1000, flush_interval=2.0, max_pending=8, retries=3, retry_delay=1.0,
+                 timer=None, pool_timeout=30.0):
+        super().__init__(name="db-writer", daemon=True)
+        self.pool = pool
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timer = timer
+        self.pool_timeout = pool_timeout
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.counts = {}
+        self.errors = []
+        self.stats = {'flushes': 0, 'rows': 0, 'retries': 0, 'rejected': 0, 'seconds': 0.0, 'blocked_seconds': 0.0}
+        # Every scraper thread submits and books its blocked time; the rest of stats is the writer thread's
+        self.submit_lock = threading.Lock()
+
+    def submit(self, rows, source, on_saved=None):
+        """Queue rows built with build_job_rows; blocks while max_pending submissions are waiting"""
+        start = time.perf_counter()
+        self.queue.put((rows, source, on_saved))
+        blocked = time.perf_counter() - start
+        with self.submit_lock:
+            self.stats['blocked_seconds'] += blocked
+
+    def run(self):
+        buffer = []
+        callbacks = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(buffer, callbacks)
+                buffer, callbacks, deadline = [], [], None
+                continue
+            try:
+                if item is None:
+                    break
+                rows, _, on_saved = item
+                buffer.extend(rows)
+                if on_saved:
+                    callbacks.append(on_saved)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(buffer) >= self.flush_rows:
+                    self._flush(buffer, callbacks)
+                    buffer, callbacks, deadline = [], [], None
+            finally:
+                self.queue.task_done()
+        # Shutdown: whatever is still buffered goes out before the thread ends
+        self._flush(buffer, callbacks)
+
+    def _flush(self, rows, callbacks=()):
+        saved = False
+        try:
+            saved = self._write(rows)
+        finally:
+            for callback in callbacks:
+                try:
+                    callback(saved)
+                except Exception as e:
+                    logger.error(f"Callback after saving jobs failed: {e}")
+
+    def _write(self, rows):
+        """Save rows; returns whether they were written"""
+        if not rows:
+            return True
+        start = time.perf_counter()
+        try:
+            counts = self._upsert(rows)
+        except Exception as e:
+            logger.error(f"Could not save {len(rows)} jobs: {e}")
+            self.errors.append(e)
+            return False
+
+        self.stats['flushes'] += 1
+        self.stats['rows'] += len(rows)
+        self.stats['seconds'] += time.perf_counter() - start
+        for source, result in counts.items():
+            totals = self.counts.setdefault(source, {'inserted': 0, 'skipped': 0})
+            totals['inserted'] += result['inserted']
+            totals['skipped'] += result['skipped']
+            logger.info(f"Added {result['inserted']} new jobs to the database from {source} "
+                        f"({result['skipped']} already known)")
+        return True
+
+    def _upsert(self, rows, split=False):
+        """Upsert rows, halving a batch rejected for its content until the bad rows are isolated and dropped"""
+        try:
+            return self._upsert_with_retry(rows)
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                row = rows[0]
+                self.stats['rejected'] += 1
+                logger.error(f"Dropped a {row[_SOURCE]} job the database rejects ({row[_URL]}): "
+                             f"{str(e).splitlines()[0]}")
+                return {}
+            if not split:
+                logger.warning(f"{len(rows)} jobs were rejected ({str(e).splitlines()[0]}), saving them in halves "
+                               f"to find the bad rows")
+            middle = len(rows) // 2
+            counts = self._upsert(rows[:middle], split=True)
+            for source, result in self._upsert(rows[middle:], split=True).items():
+                totals = counts.setdefault(source, {'inserted': 0, 'skipped': 0})
+                totals['inserted'] += result['inserted']
+                totals['skipped'] += result['skipped']
+            return counts
+
+    def _upsert_with_retry(self, rows):
+        for attempt in range(self.retries + 1):
+            connection = None
+            try:
+                connection = borrow_connection(self.pool, self.pool_timeout)
+                with instrument_connection(connection, self.timer):
+                    counts = bulk_upsert_jobs(connection, rows)
+                self.pool.putconn(connection)
+                return counts
+            except TRANSIENT_ERRORS + (psycopg2.pool.PoolError,) as e:
+                if connection is not None:
+                    self.pool.putconn(connection, close=True)
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                if isinstance(e, psycopg2.pool.PoolError):
+                    logger.warning(f"No database connection free for {self.pool_timeout:g}s while saving "
+                                   f"{len(rows)} jobs, retrying in {delay:.1f}s")
+                else:
+                    logger.warning(f"Database connection lost while saving {len(rows)} jobs ({e}), "
+                                   f"retrying in {delay:.1f}s")
+                self.stats['retries'] += 1
+                time.sleep(delay)
+            except Exception:
+                if connection is not None:
+                    self.pool.putconn(connection)
+                raise
+
+    def close(self):
+        """Write everything still queued or buffered, then stop the thread"""
+        self.queue.put(None)
+        self.join()
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import hashlib
+import zipfile
+import threading
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.firefox.options import Options
+from utils.config import CACHE_DIR, BLOCKED_DOMAINS
+from utils.logger import Logger
+
+logger = Logger()
+
+GECKODRIVER_CACHE_FILE = os.path.join(CACHE_DIR, "geckodriver.json")
+ADDON_DIR = os.path.join(CACHE_DIR, "addons")
+
+# Request types the lean profile never downloads. <img src> attributes are
+# still in the DOM, so company logos can be read without fetching them.
+LEAN_BLOCKED_TYPES = ['image', 'imageset', 'media', 'font', 'object']
+
+_BLOCKER_BACKGROUND_SCRIPT = """
+const BLOCKED_DOMAINS = %s;
+const BLOCKED_TYPES = new Set(%s);
+browser.webRequest.onBeforeRequest.addListener(details => {
+    if (BLOCKED_TYPES.has(details.type)) return {cancel: true};
+    const host = new URL(details.url).hostname;
+    return {cancel: BLOCKED_DOMAINS.some(domain => host === domain || host.endsWith('.' + domain))};
+}, {urls: ['<all_urls>']}, ['blocking']);
+"""
+
+_resolve_lock = threading.Lock()
+
+
+def resolve_geckodriver_path(cache_file=GECKODRIVER_CACHE_FILE):
+    """
+    Return the geckodriver executable path. The path resolved by
+    webdriver-manager is cached on disk, so once cached no network lookup
+    is needed. A GECKODRIVER_PATH environment variable always wins.
+    """
+    env_path = os.getenv("GECKODRIVER_PATH")
+    if env_path:
+        return env_path
+
+    with _resolve_lock:
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                cached_path = json.load(f).get('path')
+            if cached_path and os.access(cached_path, os.X_OK):
+                return cached_path
+            logger.warning(f"Cached geckodriver path {cached_path} is no longer valid")
+        except (OSError, ValueError):
+            pass
+
+        # Only needed on a cold cache, so keep it out of the import path
+        from webdriver_manager.firefox import GeckoDriverManager
+
+        logger.info("Resolving geckodriver with webdriver-manager...")
+        path = GeckoDriverManager().install()
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'path': path, 'resolved_at': time.strftime("%Y-%m-%d %H:%M:%S")}, f)
+        return path
+
+
+def write_addon(name, manifest, files, directory=ADDON_DIR):
+    """
+    Package a WebExtension as an .xpi under directory. The file is named
+    after its content, so it is only rebuilt when the content changes.
+    """
+    manifest = {
+        'manifest_version': 2,
+        'name': f"web-crawler {name}",
+        'version': '1.0',
+        'browser_specific_settings': {'gecko': {'id': f"{name}@web-crawler"}},
+        **manifest,
+    }
+    digest = hashlib.sha1(json.dumps([manifest, files], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(directory, f"{name}-{digest}.xpi")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with zipfile.ZipFile(path, 'w') as xpi:
+            xpi.writestr('manifest.json', json.dumps(manifest))
+            for file_name, content in files.items():
+                xpi.writestr(file_name, content)
+    return path
+
+
+def build_blocker_addon(blocked_domains=BLOCKED_DOMAINS, directory=ADDON_DIR):
+    """WebExtension that cancels requests to blocked_domains and for LEAN_BLOCKED_TYPES"""
+    background = _BLOCKER_BACKGROUND_SCRIPT % (json.dumps(sorted(blocked_domains)), json.dumps(LEAN_BLOCKED_TYPES))
+    return write_addon('lean', {
+        'permissions': ['webRequest', 'webRequestBlocking', '<all_urls>'],
+        'background': {'scripts': ['background.js']},
+    }, {'background.js': background}, directory)
+
+
+def build_firefox_options(headless=True, lean=False):
+    firefox_options = Options()
+    if headless:
+        firefox_options.add_argument("--headless")
+    firefox_options.add_argument("--width=1920")
+    firefox_options.add_argument("--height=1080")
+    firefox_options.set_preference("dom.webnotifications.enabled", False)
+    firefox_options.set_preference("app.update.enabled", False)
+    if lean:
+        # Blocked before the blocker add-on is even installed
+        firefox_options.set_preference("permissions.default.image", 2)
+        firefox_options.set_preference("gfx.downloadable_fonts.enabled", False)
+        firefox_options.set_preference("media.autoplay.default", 5)
+        firefox_options.set_preference("media.preload.default", 0)
+        firefox_options.set_preference("media.preload.auto", 0)
+        firefox_options.set_preference("browser.display.use_document_fonts", 0)
+    return firefox_options
+
+
+def create_firefox_driver(headless=True, lean=False):
+    logger.info(f"Setting up Firefox WebDriver{' (lean profile)' if lean else ''}...")
+    driver = webdriver.Firefox(service=Service(resolve_geckodriver_path()), options=build_firefox_options(headless, lean))
+    if lean:
+        try:
+            driver.install_addon(build_blocker_addon(), temporary=True)
+        except WebDriverException as e:
+            logger.warning(f"Could not install the request blocker, only prefs-based blocking is active: {e}")
+    logger.info("Firefox WebDriver setup complete")
+    return driver
+
+
+def restart_driver(driver, driver_pool=None, headless=True, lean=False):
+    """Replace a broken session: through driver_pool when there is one, otherwise quit it and start a new one"""
+    if driver_pool:
+        return driver_pool.replace(driver)
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+    return create_firefox_driver(headless, lean)
+
+
+class PooledDriver:
+    """
+    Thin wrapper around a pooled WebDriver that counts page loads so the
+    pool can recycle long-lived sessions. Everything else is delegated.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+        # Add-ons a scraper installed for its own use, as name -> (option, add-on ID); removed on release
+        self.scraper_addons = {}
+
+    def get(self, url):
+        self.pages += 1
+        return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm Firefox sessions shared by all scrapers in a run.
+
+    acquire() hands out an idle session (or starts a new one), release()
+    removes the add-ons its scraper installed, resets cookies and storage
+    and puts it back. Sessions are quit instead of
+    reused after max_pages_per_session page loads or when they stop responding.
+    """
+
+    def __init__(self, headless=True, max_pages_per_session=200, max_idle=4, lean=False):
+        self.headless = headless
+        self.lean = lean
+        self.max_pages_per_session = max_pages_per_session
+        self.max_idle = max_idle
+        self.idle = []
+        self.lock = threading.Lock()
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0}
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                driver = self.idle.pop() if self.idle else None
+            if driver is None:
+                break
+            if self._is_alive(driver):
+                with self.lock:
+                    self.stats['reused'] += 1
+                logger.info(f"Reusing warm Firefox session ({driver.pages} pages so far)")
+                return driver
+            self._discard(driver)
+
+        driver = PooledDriver(create_firefox_driver(self.headless, self.lean))
+        with self.lock:
+            self.stats['created'] += 1
+        return driver
+
+    def release(self, driver):
+        if driver.pages >= self.max_pages_per_session:
+            logger.info(f"Recycling Firefox session after {driver.pages} pages")
+            self._discard(driver)
+            return
+
+        try:
+            self._remove_scraper_addons(driver)
+            self._reset(driver)
+        except WebDriverException as e:
+            logger.warning(f"Firefox session did not survive reset, recycling it: {e}")
+            self._discard(driver)
+            return
+
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(driver)
+                return
+        self._discard(driver)
+
+    def replace(self, driver):
+        """Quit a session that stopped behaving and hand out another one instead"""
+        logger.info(f"Replacing Firefox session after {driver.pages} pages")
+        self._discard(driver)
+        return self.acquire()
+
+    def close(self):
+        with self.lock:
+            drivers, self.idle = self.idle, []
+        for driver in drivers:
+            self._discard(driver, recycled=False)
+        logger.info(f"Driver pool closed: {self.stats['created']} sessions started, "
+                    f"{self.stats['reused']} reuses, {self.stats['recycled']} recycled")
+
+    def _remove_scraper_addons(self, driver):
+        """Uninstall add-ons like the network capture hook, which would otherwise keep running for the next scraper"""
+        while driver.scraper_addons:
+            _, (_, addon_id) = driver.scraper_addons.popitem()
+            driver.uninstall_addon(addon_id)
+
+    def _reset(self, driver):
+        # Storage is per origin, so clear it while still on the page the scraper used
+        driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+        driver.delete_all_cookies()
+        driver._driver.get("about:blank")
+
+    def _is_alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, driver, recycled=True):
+        if recycled:
+            with self.lock:
+                self.stats['recycled'] += 1
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
@@ -0,0 +1,166 @@
+import os
+import csv
+import json
+import time
+from utils.db import JOB_COLUMNS, build_job_row, build_job_rows
+from utils.logger import Logger
+
+logger = Logger()
+
+# Every source is exported with the same columns: the database row plus the
+# justjoin category, which is empty for the other sources
+EXPORT_COLUMNS = JOB_COLUMNS + ('category',)
+
+
+def export_record(job, source, row=None):
+    """Normalize a scraped job into an EXPORT_COLUMNS dict; pass row if build_job_rows already ran"""
+    record = dict(zip(JOB_COLUMNS, row or build_job_row(job, source)))
+    record['category'] = job.get('category', '')
+    return record
+
+
+class NdjsonWriter:
+    """One JSON object per line, flushed after every batch"""
+
+    extension = 'ndjson'
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        self.file.write(''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    """CSV with a fixed header; lists are joined with ', '"""
+
+    extension = 'csv'
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, records):
+        self.writer.writerows(
+            [', '.join(value) if isinstance(value, list) else ('' if value is None else value)
+             for value in (record[column] for column in EXPORT_COLUMNS)]
+            for record in records
+        )
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Columnar output via pyarrow. Records are buffered and written one row
+    group of row_group_size rows at a time, so memory stays bounded by a
+    single row group.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, path, row_group_size=10000, compression='zstd'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from e
+
+        self.pa = pa
+        self.schema = pa.schema([
+            (column, pa.date32() if column == 'published_date'
+             else pa.float64() if column in ('salary_min', 'salary_max')
+             else pa.list_(pa.string()) if column == 'technologies'
+             else pa.string())
+            for column in EXPORT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def write(self, records):
+        self.buffer.extend(records)
+        while len(self.buffer) >= self.row_group_size:
+            self._write_row_group(self.buffer[:self.row_group_size])
+            del self.buffer[:self.row_group_size]
+
+    def _write_row_group(self, records):
+        columns = {column: [record[column] for record in records] for column in EXPORT_COLUMNS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        if self.buffer:
+            self._write_row_group(self.buffer)
+            self.buffer = []
+        self.writer.close()
+
+
+WRITERS = {
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+EXPORT_FORMATS = tuple(WRITERS)
+
+
+class JobExporter:
+    """
+    Streams normalized job records to one file per source and format under
+    output_dir/source=<source>/date=<YYYY-MM-DD>/<run_id>.<ext>. Writers are
+    opened on the first batch of a source and finished by close().
+    """
+
+    def __init__(self, output_dir="output", formats=('ndjson', 'csv'), run_id=None):
+        unknown = set(formats) - set(WRITERS)
+        if unknown:
+            raise ValueError(f"Unknown export format(s): {', '.join(sorted(unknown))}")
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.date = time.strftime("%Y-%m-%d")
+        self.writers = {}
+        self.counts = {}
+
+    def directory(self, source):
+        return os.path.join(self.output_dir, f"source={source}", f"date={self.date}")
+
+    def path(self, source, extension):
+        directory = self.directory(source)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{self.run_id}.{extension}")
+
+    def write(self, source, records):
+        """Append EXPORT_COLUMNS records of one source to each format"""
+        writers = self.writers.get(source)
+        if writers is None:
+            writers = self.writers[source] = [WRITERS[name](self.path(source, WRITERS[name].extension))
+                                              for name in self.formats]
+        for writer in writers:
+            writer.write(records)
+        self.counts[source] = self.counts.get(source, 0) + len(records)
+
+    def close(self):
+        for source, writers in self.writers.items():
+            for writer in writers:
+                writer.close()
+            logger.info(f"Exported {self.counts[source]} {source} jobs as {', '.join(self.formats)} "
+                        f"to {self.directory(source)}")
+        self.writers = {}
+
+
+def export_jobs(jobs, source, output_dir="output", formats=('ndjson', 'csv')):
+    """Export a finished list of jobs in one go; used by the scrapers when run standalone"""
+    exporter = JobExporter(output_dir, formats)
+    try:
+        exporter.write(source, [export_record(job, source, row) for job, row in zip(jobs, build_job_rows(jobs, source))])
+    finally:
+        exporter.close()
+    return exporter
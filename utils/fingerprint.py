@@ -0,0 +1,167 @@
+import re
+import zlib
+import hashlib
+import unicodedata
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAMS = re.compile(r'^(utm_.*|fbclid|gclid|msclkid|mc_cid|mc_eid|ref|refid|s|searchid|sessionid|trk|ck)$',
+                              re.IGNORECASE)
+
+# Gender markers boards append to titles, e.g. "(m/w/d)", "(k/m)", "(f/m/x)"
+_GENDER_TAG = re.compile(r'\(\s*[a-z]{1,2}\s*(/\s*[a-z]{1,2}\s*){1,3}\)')
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Sources whose job_id already is the board's own offer ID
+_NATIVE_ID_SOURCES = {'second_page'}
+
+# Large prime for the MinHash permutations; hashes are kept below 2**31 so
+# a * x + b never overflows uint64
+_PRIME = (1 << 61) - 1
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def canonical_url(url):
+    """
+    Normalize an offer URL so the same offer always gives the same string:
+    https, lowercase host without www., no fragment, no trailing slash,
+    tracking parameters dropped and the rest sorted. Returns None for
+    anything that is not an absolute http(s) URL.
+    """
+    if not url or url == 'N/A':
+        return None
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(key)))
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def normalize_text(text):
+    """Lowercase, strip accents, gender tags and punctuation, collapse whitespace"""
+    if not text or text == 'N/A':
+        return ''
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char)).replace('ł', 'l')
+    text = _GENDER_TAG.sub(' ', text)
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def content_fingerprint(title, company, location=''):
+    """Hash of the normalized title, company and location; equal for the same offer on any board"""
+    return _digest('\0'.join((normalize_text(title), normalize_text(company), normalize_text(location))))
+
+
+def stable_job_id(source, url, title='', company='', location='', native_id=None):
+    """
+    Job ID that does not change between runs. Boards with their own offer
+    IDs keep them, justjoin uses the offer slug, everything else a hash of
+    the canonical URL, with the content fingerprint as a last resort.
+    """
+    if source in _NATIVE_ID_SOURCES and native_id:
+        return str(native_id)
+    canonical = canonical_url(url)
+    if canonical:
+        if source == 'justjoin_categories' and '/job-offer/' in canonical:
+            return urlsplit(canonical).path.rsplit('/', 1)[-1]
+        return _digest(canonical)
+    return content_fingerprint(title, company, location)
+
+
+def shingles(text, size=3):
+    text = f" {text} "
+    return {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+
+
+class MinHasher:
+    """MinHash signatures over character shingles, deterministic for a given seed"""
+
+    def __init__(self, num_perm=64, seed=1):
+        # Only the near-duplicate backfill needs numpy, so keep it out of the scraping import path
+        import numpy as np
+
+        self.np = np
+        self.prime = np.uint64(_PRIME)
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 31, num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, num_perm).astype(np.uint64)
+
+    def signature(self, text):
+        hashes = self.np.fromiter((zlib.crc32(shingle.encode('utf-8')) & 0x7fffffff for shingle in shingles(text)),
+                                  dtype=self.np.uint64)
+        return ((self.np.outer(hashes, self.a) + self.b) % self.prime).min(axis=0)
+
+
+def find_near_duplicates(records, threshold=0.8, num_perm=64, bands=16, max_bucket=500):
+    """
+    Cross-source near-duplicate detection with MinHash + LSH banding.
+
+    records is an iterable of (key, source, text) with keys ordered oldest
+    first. Returns {key: canonical_key} for every record that is a near
+    duplicate (estimated Jaccard >= threshold) of a record from another
+    source; the canonical record is the smallest key of its cluster.
+    Records from the same source are never merged with each other.
+    """
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    keys, sources, signatures = [], [], []
+    buckets = defaultdict(list)
+    for key, source, text in records:
+        text = normalize_text(text)
+        if not text:
+            continue
+        position = len(keys)
+        signature = hasher.signature(text)
+        keys.append(key)
+        sources.append(source)
+        signatures.append(signature)
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(position)
+
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        # Huge buckets are boilerplate titles; comparing them pairwise is quadratic
+        if len(members) < 2 or len(members) > max_bucket:
+            continue
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                if sources[first] == sources[second] or (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                root_first, root_second = find(first), find(second)
+                if root_first != root_second and (signatures[first] == signatures[second]).mean() >= threshold:
+                    parent[root_second] = root_first
+
+    clusters = defaultdict(list)
+    for position in range(len(keys)):
+        clusters[find(position)].append(position)
+
+    duplicates = {}
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        canonical = min(members, key=lambda position: keys[position])
+        for position in members:
+            if sources[position] != sources[canonical]:
+                duplicates[keys[position]] = keys[canonical]
+    return duplicates
@@ -0,0 +1,159 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+from utils.config import CACHE_DIR
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+
+
+class HttpCache:
+    """
+    Persistent on-disk cache for pages fetched without a browser.
+
+    Each URL keeps its last body plus ETag/Last-Modified and a content hash.
+    Requests are revalidated with If-None-Match/If-Modified-Since; a 304 or a
+    200 with an identical hash means the page is unchanged and callers can skip
+    parsing it. A changed page is only staged by store(): callers commit() it
+    once its jobs are saved, or discard() it, so a page whose jobs were lost
+    is fetched and parsed in full again. With revalidate=False (--full) every
+    page is fetched and reported as changed, and the cache is only refreshed.
+    Bodies are evicted least-recently-used once the cache grows past
+    max_bytes.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR, max_bytes=200 * 1024 * 1024, revalidate=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        # Changed pages waiting for commit(), by URL
+        self.staged = {}
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """)
+        self.db.commit()
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".body")
+
+    def conditional_headers(self, url):
+        """Revalidation headers for url; also counts the request as a miss or a revalidation"""
+        if not self.revalidate:
+            self.stats['miss'] += 1
+            return {}
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(self._path(url)):
+            self.stats['miss'] += 1
+            return {}
+
+        self.stats['revalidate'] += 1
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def not_modified(self, url):
+        """
+        Handle a 304: return the cached body and mark the entry as recently
+        used. Returns None if the body was evicted in the meantime.
+        """
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        self.stats['hit'] += 1
+        with self.lock:
+            self.db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+        return body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Take a freshly fetched body. Returns True if its content differs from
+        the cached one; such a body is staged until commit().
+        """
+        content_hash = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        with self.lock:
+            row = self.db.execute("SELECT content_hash FROM entries WHERE url = ?", (url,)).fetchone()
+        changed = row is None or row[0] != content_hash or not os.path.exists(self._path(url))
+        if changed:
+            with self.lock:
+                self.staged[url] = (body, etag, last_modified, content_hash)
+            return True
+
+        # Same content as the committed entry, whose jobs are saved; only its validators may have moved
+        self.stats['unchanged'] += 1
+        with self.lock:
+            self.db.execute("UPDATE entries SET etag = ?, last_modified = ?, last_access = ? WHERE url = ?",
+                            (etag, last_modified, time.time(), url))
+            self.db.commit()
+        return not self.revalidate
+
+    def commit(self, url):
+        """Keep the body staged for url, now that the jobs parsed from it are saved"""
+        with self.lock:
+            staged = self.staged.pop(url, None)
+        if staged is None:
+            return
+        body, etag, last_modified, content_hash = staged
+        with open(self._path(url), 'w', encoding='utf-8') as f:
+            f.write(body)
+        with self.lock:
+            self.db.execute("""
+            INSERT INTO entries (url, etag, last_modified, content_hash, size, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag, last_modified = excluded.last_modified,
+                content_hash = excluded.content_hash, size = excluded.size, last_access = excluded.last_access
+            """, (url, etag, last_modified, content_hash, len(body.encode('utf-8')), time.time()))
+            self.db.commit()
+        self._evict()
+
+    def discard(self, url):
+        """Drop the body staged for url; its jobs were not saved, so the next run fetches it in full"""
+        with self.lock:
+            self.staged.pop(url, None)
+
+    def _evict(self):
+        with self.lock:
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for url, size in self.db.execute("SELECT url, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                try:
+                    os.remove(self._path(url))
+                except OSError:
+                    pass
+                total -= size
+                self.stats['evicted'] += 1
+            self.db.commit()
+
+    def summary(self):
+        return (f"{self.stats['hit']} hits (304), {self.stats['miss']} misses, "
+                f"{self.stats['revalidate']} revalidated, {self.stats['unchanged']} unchanged by hash, "
+                f"{self.stats['evicted']} evicted")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
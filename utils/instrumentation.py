@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class WebDriverCommandCounter:
+    """
+    Counts the WebDriver protocol commands issued through a driver. Every
+    find_element, .text, get_attribute, execute_script, ... is one HTTP round
+    trip to geckodriver, so this is the number to watch when optimizing
+    extraction. Elements route their commands through their parent driver,
+    so hooking the driver's execute() covers them too.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = defaultdict(float)
+        self.lock = threading.Lock()
+        self._target = None
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def attach(self, driver):
+        # Pooled drivers wrap the real WebDriver; hook the real one
+        target = getattr(driver, '_driver', driver)
+        original_execute = target.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                duration = time.perf_counter() - start
+                with self.lock:
+                    self.counts[driver_command] += 1
+                    self.seconds[driver_command] += duration
+
+        target.execute = execute
+        self._target = target
+        return self
+
+    def detach(self):
+        """Remove the hook so a pooled session can be handed to the next scraper"""
+        if self._target is not None:
+            self._target.__dict__.pop('execute', None)
+            self._target = None
+
+    def as_dict(self):
+        with self.lock:
+            return {command: {'seconds': round(self.seconds[command], 4), 'count': count}
+                    for command, count in self.counts.most_common()}
+
+    def summary(self):
+        top = ', '.join(f"{command}={count}" for command, count in self.counts.most_common(5))
+        return f"{self.total} WebDriver commands ({top}) in {sum(self.seconds.values()):.2f}s"
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock time per named phase (driver_start, navigation,
+    wait, extraction, ...), in total and per page. Time is booked to the
+    page passed in, or else to current_page, which the crawl loop moves
+    along as it goes. Safe to use from parser threads.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.pages = defaultdict(lambda: defaultdict(float))
+        self.current_page = None
+        self.lock = threading.Lock()
+
+    def add(self, name, duration, page=None):
+        page = page if page is not None else self.current_page
+        with self.lock:
+            self.totals[name] += duration
+            self.counts[name] += 1
+            if page is not None:
+                self.pages[page][name] += duration
+
+    @contextmanager
+    def phase(self, name, page=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, page)
+
+    def merge(self, other):
+        """Add another timer's phase totals to this one; its pages stay with it"""
+        with other.lock:
+            totals, counts = dict(other.totals), dict(other.counts)
+        with self.lock:
+            for name, total in totals.items():
+                self.totals[name] += total
+                self.counts[name] += counts[name]
+
+    def as_dict(self):
+        with self.lock:
+            return {name: {'seconds': round(total, 4), 'count': self.counts[name]}
+                    for name, total in self.totals.items()}
+
+    def pages_as_dict(self):
+        with self.lock:
+            return {page: {name: round(duration, 4) for name, duration in phases.items()}
+                    for page, phases in self.pages.items()}
+
+    def summary(self):
+        return ", ".join(f"{name}={total:.2f}s" for name, total in self.totals.items()) or "no phases"
+
+
+# Reads the Navigation/Resource Timing entries recorded since the last call and
+# clears them, so each call reports what one page load (or one scroll or
+# pagination step of a single-page app) transferred. It also reports what the
+# rate limiter needs to notice throttling: the document's HTTP status, any
+# 429/503 among the page's own requests, the title and whether a captcha or
+# challenge widget is on the page.
+_PAGE_LOAD_SCRIPT = """
+performance.setResourceTimingBufferSize(5000);
+let bytes = 0, loadMs = null, status = null;
+if (!window.__crawlerNavigationReported) {
+    const navigation = performance.getEntriesByType('navigation')[0];
+    if (navigation) {
+        bytes += navigation.transferSize;
+        loadMs = navigation.loadEventEnd > 0 ? navigation.loadEventEnd - navigation.startTime : null;
+        status = navigation.responseStatus || null;
+    }
+    window.__crawlerNavigationReported = true;
+}
+const resources = performance.getEntriesByType('resource');
+for (const resource of resources) {
+    bytes += resource.transferSize;
+    if (resource.responseStatus === 429 || resource.responseStatus === 503) status = resource.responseStatus;
+}
+performance.clearResourceTimings();
+const challenge = document.querySelector(
+    '#challenge-form, #challenge-stage, .g-recaptcha, .h-captcha, iframe[src*="captcha"], iframe[src*="challenges"]');
+return {bytes: bytes, requests: resources.length, load_ms: loadMs, status: status, title: document.title,
+        challenge: challenge !== null};
+"""
+
+
+class PageLoadStats:
+    """
+    Bytes transferred, request count and load time per page, as reported by
+    the browser's own timing API. Cross-origin responses without a
+    Timing-Allow-Origin header report 0 bytes, so the byte count is a floor.
+    """
+
+    def __init__(self):
+        self.pages = []
+
+    def record(self, driver, label=None):
+        # Imported here so the DB and pipeline side can use this module without selenium
+        from selenium.common.exceptions import WebDriverException
+        try:
+            entry = driver.execute_script(_PAGE_LOAD_SCRIPT)
+        except WebDriverException:
+            return None
+        entry['label'] = label
+        self.pages.append(entry)
+        return entry
+
+    def total_bytes(self):
+        return sum(page['bytes'] for page in self.pages)
+
+    def as_dict(self):
+        load_times = [page['load_ms'] for page in self.pages if page['load_ms'] is not None]
+        return {
+            'pages': len(self.pages),
+            'bytes': self.total_bytes(),
+            'requests': sum(page['requests'] for page in self.pages),
+            'avg_bytes_per_page': round(self.total_bytes() / len(self.pages)) if self.pages else 0,
+            'avg_load_ms': round(sum(load_times) / len(load_times), 1) if load_times else None,
+        }
+
+    def summary(self):
+        stats = self.as_dict()
+        if not stats['pages']:
+            return "no pages recorded"
+        load = f", {stats['avg_load_ms']:.0f} ms average load" if stats['avg_load_ms'] is not None else ""
+        return (f"{stats['pages']} pages, {stats['bytes'] / 1024:.0f} KiB in {stats['requests']} requests "
+                f"({stats['avg_bytes_per_page'] / 1024:.1f} KiB per page{load})")
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RunMetrics:
+    """
+    Everything measured during one run, per source: phase times from the
+    scrapers (per page as well) and from the pipeline, WebDriver command
+    counts and time, named waits, page loads and DB statement time. Written
+    out as a JSON run report and as a Prometheus textfile for node_exporter's
+    textfile collector. labels are added to every Prometheus sample, so
+    several runs can share one textfile directory.
+    """
+
+    def __init__(self, run_id, labels=None):
+        self.run_id = run_id
+        self.labels = labels or {}
+        self.started_at = time.time()
+        self.sources = {}
+        # Keyed by SQL statement kind (insert, copy, select, ...)
+        self.db = PhaseTimer()
+        self.summary = {}
+        self.lock = threading.Lock()
+
+    def _source(self, source):
+        with self.lock:
+            return self.sources.setdefault(source, {
+                'timer': PhaseTimer(), 'commands': Counter(), 'command_seconds': defaultdict(float), 'tasks': {},
+            })
+
+    def timer(self, source):
+        """PhaseTimer for phases measured outside the scrapers, e.g. normalization and db_write"""
+        return self._source(source)['timer']
+
+    def record_scraper(self, source, label, scraper, job_count=0, error=None):
+        """Fold a finished (or failed) scraper's measurements into the run"""
+        entry = self._source(source)
+        entry['timer'].merge(scraper.timer)
+        task = {
+            'jobs': job_count,
+            'error': str(error) if error else None,
+            'crawl_stats': dict(scraper.crawl_stats),
+            'phases': scraper.timer.as_dict(),
+            'pages': scraper.timer.pages_as_dict(),
+            'page_loads': list(scraper.page_stats.pages),
+        }
+        if getattr(scraper, 'command_counter', None):
+            commands = scraper.command_counter.as_dict()
+            task['webdriver_commands'] = commands
+            with self.lock:
+                for command, stats in commands.items():
+                    entry['commands'][command] += stats['count']
+                    entry['command_seconds'][command] += stats['seconds']
+        if getattr(scraper, 'waiter', None):
+            task['waits'] = scraper.waiter.as_dict()
+        if getattr(scraper, 'retry', None):
+            task['retries'] = scraper.retry.as_dict()
+        with self.lock:
+            entry['tasks'][label] = task
+
+    def finish(self, **summary):
+        """Record the run totals (jobs, failures, ...) that go at the top of the report"""
+        self.summary = summary
+
+    def slowest_pages(self, limit=10):
+        pages = []
+        for source, entry in self.sources.items():
+            for label, task in entry['tasks'].items():
+                for page, phases in task['pages'].items():
+                    pages.append({'source': source, 'task': label, 'page': page,
+                                  'seconds': round(sum(phases.values()), 4), 'phases': phases})
+        return sorted(pages, key=lambda page: page['seconds'], reverse=True)[:limit]
+
+    def report(self):
+        return {
+            'run_id': self.run_id,
+            **({'labels': self.labels} if self.labels else {}),
+            'started_at': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            **self.summary,
+            'sources': {
+                source: {
+                    'phases': entry['timer'].as_dict(),
+                    'webdriver_commands': {command: {'seconds': round(entry['command_seconds'][command], 4),
+                                                     'count': count}
+                                           for command, count in entry['commands'].most_common()},
+                    'tasks': entry['tasks'],
+                }
+                for source, entry in self.sources.items()
+            },
+            'db_statements': self.db.as_dict(),
+            'slowest_pages': self.slowest_pages(),
+        }
+
+    def prometheus(self, report=None, slowest_per_source=5):
+        """The report as Prometheus text exposition format; every value describes this run, so all are gauges"""
+        report = report or self.report()
+        metrics = defaultdict(list)
+
+        def sample(name, value, **labels):
+            labels = {**self.labels, **labels}
+            label_text = ','.join(f'{key}="{_label_value(label)}"' for key, label in labels.items())
+            metrics[name].append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+        sample('crawler_run_timestamp_seconds', round(self.started_at, 3))
+        sample('crawler_run_duration_seconds', report['duration_seconds'])
+        for name in ('total_jobs', 'failed_tasks', 'failed_batches'):
+            if name in report:
+                value = report[name]
+                sample(f'crawler_run_{name}', len(value) if isinstance(value, list) else value)
+        for source, counts in report.get('saved', {}).items():
+            for outcome, count in counts.items():
+                sample('crawler_jobs_saved', count, source=source, outcome=outcome)
+        for source, entry in report['sources'].items():
+            sample('crawler_jobs_scraped', sum(task['jobs'] for task in entry['tasks'].values()), source=source)
+            for phase, stats in entry['phases'].items():
+                sample('crawler_phase_seconds', stats['seconds'], source=source, phase=phase)
+                sample('crawler_phase_calls', stats['count'], source=source, phase=phase)
+            for command, stats in entry['webdriver_commands'].items():
+                sample('crawler_webdriver_command_seconds', stats['seconds'], source=source, command=command)
+                sample('crawler_webdriver_commands', stats['count'], source=source, command=command)
+            pages = [(label, page, sum(phases.values()))
+                     for label, task in entry['tasks'].items() for page, phases in task['pages'].items()]
+            sample('crawler_pages', len(pages), source=source)
+            retries = [task['retries'] for task in entry['tasks'].values() if 'retries' in task]
+            if retries:
+                sample('crawler_page_retries', sum(stats['retries'] for stats in retries), source=source)
+                sample('crawler_pages_failed', sum(len(stats['failed_pages']) for stats in retries), source=source)
+            # Only the slowest few pages, to keep label cardinality bounded
+            for label, page, seconds in sorted(pages, key=lambda item: item[2], reverse=True)[:slowest_per_source]:
+                sample('crawler_slow_page_seconds', round(seconds, 4), source=source, task=label, page=page)
+        for name, value in report.get('db_writer', {}).items():
+            sample(f'crawler_db_writer_{name}', round(value, 4))
+        # Where the adaptive limiter has settled per site; rate is requests/s
+        for host, stats in report.get('rate_limits', {}).items():
+            for name, value in stats.items():
+                sample(f'crawler_rate_limit_{name}', value, host=host)
+        # Tasks this worker took from a queued crawl
+        for name, value in report.get('work_queue', {}).items():
+            if isinstance(value, int):
+                sample(f'crawler_work_queue_tasks_{name}', value)
+        for statement, stats in report['db_statements'].items():
+            sample('crawler_db_statement_seconds', stats['seconds'], statement=statement)
+            sample('crawler_db_statements', stats['count'], statement=statement)
+
+        lines = []
+        for name, samples in metrics.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory, prometheus_name='crawler.prom'):
+        """
+        Write <directory>/run_<run_id>.json and <directory>/crawler.prom. The
+        textfile is replaced atomically, as the textfile collector requires.
+        Returns both paths.
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+        report_path = os.path.join(directory, f"run_{self.run_id}.json")
+        with open(report_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False, default=str)
+
+        prometheus_path = os.path.join(directory, prometheus_name)
+        temporary_path = f"{prometheus_path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus(report))
+        os.replace(temporary_path, prometheus_path)
+        return report_path, prometheus_path
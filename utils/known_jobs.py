@@ -0,0 +1,94 @@
+import hashlib
+from utils.fingerprint import stable_job_id
+from utils.logger import Logger
+
+logger = Logger()
+
+# Field holding the board's own offer ID, for sources that have one
+_NATIVE_ID_FIELDS = {
+    'second_page': 'offer_id',
+}
+
+
+def _digest(namespace, source, value):
+    key = f"{namespace}\0{source}\0{value}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+
+class KnownJobs:
+    """
+    Compact in-memory set of offers already stored in the jobs table. Keys are
+    kept as 64-bit digests rather than strings, so a few hundred thousand jobs
+    fit in a few tens of MB; a false positive needs a 64-bit hash collision.
+    """
+
+    def __init__(self):
+        self.digests = set()
+
+    def __len__(self):
+        return len(self.digests)
+
+    def add(self, source, job_id=None, url=None):
+        if job_id:
+            self.digests.add(_digest('id', source, job_id))
+        if url and url != 'N/A':
+            self.digests.add(_digest('url', source, url))
+
+    def contains(self, source, job):
+        """
+        Whether a freshly scraped job dict matches a stored offer, by stable
+        job ID or, for rows stored before IDs were stable, by URL
+        """
+        native_id = job.get(_NATIVE_ID_FIELDS[source]) if source in _NATIVE_ID_FIELDS else None
+        job_id = stable_job_id(source, job.get('url'), job.get('title', ''), job.get('company', ''),
+                               job.get('location', ''), native_id)
+        if _digest('id', source, job_id) in self.digests:
+            return True
+        url = job.get('url')
+        return bool(url) and url != 'N/A' and _digest('url', source, url) in self.digests
+
+    @classmethod
+    def load(cls, connection, sources, batch_size=10000):
+        """Preload the keys of every stored job for the given sources"""
+        known = cls()
+        # A named cursor streams rows from the server instead of materializing them all
+        with connection.cursor(name='known_jobs') as cursor:
+            cursor.itersize = batch_size
+            cursor.execute("SELECT source, job_id, url FROM jobs WHERE source = ANY(%s)", (list(sources),))
+            for source, job_id, url in cursor:
+                known.add(source, job_id, url)
+        connection.commit()
+        logger.info(f"Loaded {len(known)} known job keys for {', '.join(sources)}")
+        return known
+
+
+class IncrementalTracker:
+    """
+    Counts consecutive already-known offers while a listing is walked newest
+    first. Once stop_after offers in a row are known, the rest of the listing
+    is assumed to be known as well.
+    """
+
+    def __init__(self, known_jobs, source, stop_after=20):
+        self.known_jobs = known_jobs
+        self.source = source
+        self.stop_after = stop_after
+        self.consecutive_known = 0
+        self.known_seen = 0
+
+    @property
+    def enabled(self):
+        return self.known_jobs is not None and self.stop_after > 0
+
+    def observe(self, job):
+        if not self.enabled:
+            return
+        if self.known_jobs.contains(self.source, job):
+            self.consecutive_known += 1
+            self.known_seen += 1
+        else:
+            self.consecutive_known = 0
+
+    @property
+    def should_stop(self):
+        return self.enabled and self.consecutive_known >= self.stop_after
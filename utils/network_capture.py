@@ -0,0 +1,91 @@
+import json
+from selenium.common.exceptions import WebDriverException
+from utils.driver_pool import write_addon
+from utils.logger import Logger
+
+logger = Logger()
+
+# Runs in the page before any of its own scripts: wraps fetch() and
+# XMLHttpRequest so every JSON response whose URL matches the pattern is kept
+# in window.__crawlerCapture until the scraper drains it.
+_PAGE_HOOK_SCRIPT = """
+(() => {
+    if (window.__crawlerCapture) return;
+    const pattern = new RegExp(%s);
+    const captured = window.__crawlerCapture = [];
+    const keep = (url, text) => {
+        try { captured.push({url: url, body: JSON.parse(text)}); } catch (e) {}
+    };
+
+    const originalFetch = window.fetch;
+    window.fetch = async function (...args) {
+        const response = await originalFetch.apply(this, args);
+        if (pattern.test(response.url)) {
+            response.clone().text().then(text => keep(response.url, text), () => {});
+        }
+        return response;
+    };
+
+    const originalOpen = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (...args) {
+        this.addEventListener('load', () => {
+            if (!pattern.test(this.responseURL)) return;
+            if (this.responseType === 'json') captured.push({url: this.responseURL, body: this.response});
+            else if (this.responseType === '' || this.responseType === 'text') keep(this.responseURL, this.responseText);
+        });
+        return originalOpen.apply(this, args);
+    };
+})();
+"""
+
+# Content scripts live in an isolated world, so the hook is injected into the
+# page itself as an inline script at document_start
+_CONTENT_SCRIPT = """
+const script = document.createElement('script');
+script.textContent = %s;
+(document.head || document.documentElement).appendChild(script);
+script.remove();
+"""
+
+_DRAIN_SCRIPT = """
+const captured = window.__crawlerCapture;
+return captured ? captured.splice(0, captured.length) : null;
+"""
+
+
+def build_capture_addon(url_pattern):
+    hook = _PAGE_HOOK_SCRIPT % json.dumps(url_pattern)
+    return write_addon('capture', {
+        'content_scripts': [{'matches': ['<all_urls>'], 'js': ['content.js'], 'run_at': 'document_start'}],
+    }, {'content.js': _CONTENT_SCRIPT % json.dumps(hook)})
+
+
+def install_capture_hook(driver, url_pattern):
+    """
+    Make the browser record JSON responses matching url_pattern from the next
+    navigation on. The add-on stays for the rest of the session, so it is
+    installed once per session and pattern; a DriverPool uninstalls it when
+    the session is released, so the next scraper gets a session without it.
+    Returns False if the add-on could not be installed.
+    """
+    addons = getattr(driver, 'scraper_addons', None)
+    if addons is None:
+        addons = driver.scraper_addons = {}
+    if addons.get('capture', (None,))[0] == url_pattern:
+        return True
+    try:
+        # The add-on ID is fixed, so a hook for another pattern replaces the previous one
+        addon_id = driver.install_addon(build_capture_addon(url_pattern), temporary=True)
+    except WebDriverException as e:
+        logger.warning(f"Could not install the network capture add-on: {e}")
+        return False
+    addons['capture'] = (url_pattern, addon_id)
+    return True
+
+
+def drain_captured(driver):
+    """
+    Return the captured responses as a list of {'url', 'body'} dicts and clear
+    them in the page, or None when the hook is not present in the page.
+    """
+    return driver.execute_script(_DRAIN_SCRIPT)
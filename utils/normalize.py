@@ -0,0 +1,190 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Normalization runs over a whole batch of jobs at once: every step is an
+# Arrow string kernel or a NumPy operation over the batch's columns. The
+# patterns are RE2 syntax (Arrow's regex engine), so no lookarounds.
+
+# Currency symbols and local names seen on the boards, mapped to ISO codes
+_CURRENCIES = (
+    (r'(?i)\bpln\b|zł|\bzl\b', 'PLN'),
+    (r'(?i)\beur\b|€', 'EUR'),
+    (r'(?i)\busd\b|\$', 'USD'),
+    (r'(?i)\bgbp\b|£', 'GBP'),
+    (r'(?i)\bchf\b', 'CHF'),
+)
+_HOURLY = r'(?i)/\s*h\b|\bgodz|\bhour|\bhr\b|\bstd\b|stunde'
+_YEARLY = r'(?i)\byear|\brok\b|\brocz|\bannual|/\s*y\b|\bjahr'
+_GROSS = r'(?i)\bbrutto\b|\bgross\b'
+_NET = r'(?i)\bnetto\b|\bnet\b'
+# "do 15 000 zł" / "up to" / "bis" give only the top of the range, "od" / "from" / "ab" only the bottom
+_UP_TO = r'(?i)\bdo\b|\bup to\b|\bbis\b'
+_FROM = r'(?i)\bod\b|\bfrom\b|\bab\b'
+# Space, non-breaking space and comma thousands separators
+_THOUSANDS = r'(\d)[ \x{a0}\x{202f},](\d{3})\b'
+# Amounts after the thousands separators are gone, with an optional "k" suffix
+_RANGE = (r'(?i)(?P<low>\d+(?:\.\d+)?)\s*(?P<low_k>k\b)?'
+          r'(?:\s*(?:-|–|—|to|do|bis)\s*(?P<high>\d+(?:\.\d+)?)\s*(?P<high_k>k\b)?)?')
+
+# First three letters of month names in Polish (genitive), English and German
+_MONTHS = {
+    'sty': 1, 'lut': 2, 'mar': 3, 'kwi': 4, 'maj': 5, 'cze': 6,
+    'lip': 7, 'sie': 8, 'wrz': 9, 'paź': 10, 'lis': 11, 'gru': 12,
+    'jan': 1, 'feb': 2, 'apr': 4, 'may': 5, 'jun': 6, 'jul': 7,
+    'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+    'mär': 3, 'mai': 5, 'okt': 10, 'dez': 12,
+}
+_MONTH_NAMES = pa.array(list(_MONTHS))
+# Indexed by position in _MONTH_NAMES; the trailing 0 is what unknown names (index -1) map to
+_MONTH_NUMBERS = np.array(list(_MONTHS.values()) + [0])
+_TEXT_DATE = r'(?P<day>\d{1,2})\.?\s+(?P<month>[^\s\d.,:]{3,})\.?\s+(?P<year>\d{4})'
+_TIME_UNITS = r'minut|godzin|hour|stunde|dzień|dni|day|tag|tydzie|tygodni|week|woche|miesią|miesię|month|monat'
+# A unit only counts after a number ("3 dni temu", "vor 5 Tagen") or with a word saying it is in the
+# past ("an hour ago", "godzinę temu", "vor einem Tag"), so "Montag" or "Vertrag" are not dates
+_RELATIVE = (rf'(?i)\b(?P<count>\d+)\s*(?P<unit>{_TIME_UNITS})'
+             rf'|\b(?P<unit_ago>{_TIME_UNITS})\S*\s+(?:ago|temu)\b'
+             rf'|\bvor\s+(?:[^\s\d]+\s+)?\b(?P<unit_vor>{_TIME_UNITS})')
+_UNIT_DAYS = (
+    (r'(?i)minut|godzin|hour|stunde', 0),
+    (r'(?i)dzień|dni|day|tag', 1),
+    (r'(?i)tydzie|tygodni|week|woche', 7),
+    (r'(?i)miesią|miesię|month|monat', 30),
+)
+_TODAY = r'(?i)dzisiaj|\bdziś|\btoday\b|\bheute\b|\bjust now\b'
+_YESTERDAY = r'(?i)wczoraj|yesterday|gestern'
+
+REMOTE_VALUES = ('onsite', 'hybrid', 'remote')
+
+
+def _strings(values):
+    return pc.fill_null(pa.array(values, type=pa.string()), '')
+
+
+def _matches(text, pattern):
+    return pc.match_substring_regex(text, pattern).to_numpy(zero_copy_only=False)
+
+
+def _numbers(text):
+    """Float array from numeric strings, NaN where empty"""
+    return pc.cast(pc.if_else(pc.equal(text, ''), None, text), pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _parsed_dates(text, pattern, date_format):
+    found = pc.struct_field(pc.extract_regex(text, pattern), [0])
+    parsed = pc.strptime(pc.if_else(pc.equal(found, ''), None, found), format=date_format, unit='s',
+                         error_is_null=True)
+    return pc.cast(parsed, pa.date32()).to_numpy(zero_copy_only=False).astype('datetime64[D]')
+
+
+def column_values(values):
+    """Column as Python objects with None for missing (NaN, NaT, None), ready for COPY and the writers"""
+    return pa.array(values, from_pandas=True).to_pylist()
+
+
+def normalize_salaries(texts):
+    """
+    Split salary strings like "10 000 - 15 000 PLN" or "12 000–18 000 zł
+    brutto / mies." into min, max, currency, period ('hour', 'month' or
+    'year'; boards list monthly pay unless they say otherwise) and basis
+    ('gross' or 'net'). Returns a dict of NumPy columns; texts without an
+    amount give NaN and None.
+    """
+    text = _strings(texts)
+    # Twice, since a match consumes the digit the next separator needs ("1 000 000")
+    amounts = pc.replace_substring_regex(pc.replace_substring_regex(text, _THOUSANDS, r'\1\2'), _THOUSANDS, r'\1\2')
+    amounts = pc.replace_substring_regex(amounts, r'(\d),(\d)', r'\1.\2')
+    parts = pc.extract_regex(amounts, _RANGE)
+    low_k = pc.not_equal(parts.field('low_k'), '').to_numpy(zero_copy_only=False)
+    high_k = pc.not_equal(parts.field('high_k'), '').to_numpy(zero_copy_only=False)
+    low = _numbers(parts.field('low')) * np.where(low_k, 1000, 1)
+    high = _numbers(parts.field('high')) * np.where(high_k, 1000, 1)
+    # "10-15k" puts the suffix on the upper bound only
+    low = np.where(high_k & ~low_k & (low * 1000 <= high), low * 1000, low)
+
+    single = np.isnan(high)
+    up_to = single & _matches(text, _UP_TO)
+    from_only = single & ~up_to & _matches(text, _FROM)
+    salary_min = np.where(up_to, np.nan, np.where(single, low, np.fmin(low, high)))
+    salary_max = np.where(from_only, np.nan, np.where(single, low, np.fmax(low, high)))
+
+    has_amount = ~np.isnan(low)
+    currency = np.select([_matches(text, pattern) for pattern, _ in _CURRENCIES], [code for _, code in _CURRENCIES],
+                         default=None)
+    period = np.select([_matches(text, _HOURLY), _matches(text, _YEARLY)], ['hour', 'year'], default='month')
+    basis = np.select([_matches(text, _GROSS), _matches(text, _NET)], ['gross', 'net'], default=None)
+    return {
+        'salary_min': salary_min.round(2),
+        'salary_max': salary_max.round(2),
+        'currency': np.where(has_amount, currency, None),
+        'salary_period': np.where(has_amount, period, None),
+        'salary_basis': np.where(has_amount, basis, None),
+    }
+
+
+def normalize_dates(texts, reference):
+    """
+    Parse publish dates into a datetime64[D] array. Understands ISO dates
+    and timestamps, dd.mm.yyyy, "1 stycznia 2025" style dates in Polish,
+    English or German, and relative text ("dzisiaj", "wczoraj", "3 dni
+    temu", "2 weeks ago", "vor 5 Tagen") counted back from reference, the
+    scrape time of each row. Unparseable text gives NaT.
+    """
+    text = pc.utf8_trim_whitespace(_strings(texts))
+    reference = np.array(reference, dtype='datetime64[s]').astype('datetime64[D]')
+
+    iso = _parsed_dates(text, r'(?P<date>\d{4}-\d{2}-\d{2})', '%Y-%m-%d')
+    dotted = _parsed_dates(text, r'(?P<date>\d{1,2}\.\d{1,2}\.\d{4})', '%d.%m.%Y')
+
+    parts = pc.extract_regex(text, _TEXT_DATE)
+    month_index = pc.index_in(pc.utf8_slice_codeunits(pc.utf8_lower(parts.field('month')), 0, 3), _MONTH_NAMES)
+    month = _MONTH_NUMBERS[pc.fill_null(month_index, -1).to_numpy(zero_copy_only=False)]
+    year = _numbers(parts.field('year'))
+    day = _numbers(parts.field('day'))
+    valid = (month > 0) & ~np.isnan(year) & ~np.isnan(day)
+    first_of_month = np.where(valid, (np.nan_to_num(year) - 1970) * 12 + month - 1, 0).astype('datetime64[M]')
+    spelled = first_of_month.astype('datetime64[D]') + (np.nan_to_num(day) - 1).astype('timedelta64[D]')
+    # "31 lutego" and the like roll into the next month; reject those
+    valid &= (spelled.astype('datetime64[M]') == first_of_month) & (day >= 1)
+    spelled = np.where(valid, spelled, np.datetime64('NaT'))
+
+    relative = pc.extract_regex(text, _RELATIVE)
+    # At most one of the unit groups is set
+    unit = pc.binary_join_element_wise(relative.field('unit'), relative.field('unit_ago'), relative.field('unit_vor'),
+                                       '')
+    unit_days = np.select([_matches(unit, pattern) for pattern, _ in _UNIT_DAYS],
+                          [days for _, days in _UNIT_DAYS], default=np.nan)
+    # "an hour ago", "a day ago": no number means one
+    count = np.nan_to_num(_numbers(relative.field('count')), nan=1)
+    days_ago = np.select([_matches(text, _TODAY), _matches(text, _YESTERDAY)], [0, 1], default=count * unit_days)
+    relative_date = np.where(np.isnan(days_ago), np.datetime64('NaT'),
+                             reference - np.nan_to_num(days_ago).astype('timedelta64[D]'))
+
+    dates = iso
+    for fallback in (dotted, spelled, relative_date):
+        dates = np.where(np.isnat(dates), fallback, dates)
+    return dates
+
+
+def normalize_remote(*columns):
+    """Map free-text work mode columns to one of REMOTE_VALUES per row, None when none is stated"""
+    text = _strings(columns[0])
+    for column in columns[1:]:
+        text = pc.binary_join_element_wise(text, _strings(column), ' ')
+    return np.select(
+        [_matches(text, r'(?i)hybr'),
+         _matches(text, r'(?i)remote|zdaln|home ?office'),
+         _matches(text, r'(?i)stacjonar|on-?site|office|vor ort')],
+        ['hybrid', 'remote', 'onsite'], default=None)
+
+
+def normalize_jobs(salaries, published, remote_texts, scraped_at):
+    """
+    Normalize one batch of jobs column-wise. Arguments are equally long
+    sequences (remote_texts a tuple of them); returns a dict of typed
+    columns as Python lists with None for missing values.
+    """
+    columns = normalize_salaries(salaries)
+    columns['published_date'] = normalize_dates(published, scraped_at)
+    columns['remote'] = normalize_remote(*remote_texts)
+    return {name: column_values(values) for name, values in columns.items()}
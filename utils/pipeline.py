@@ -0,0 +1,89 @@
+import queue
+import threading
+from utils.db import build_job_rows
+from utils.export import export_record
+from utils.instrumentation import RunMetrics
+from utils.logger import Logger
+
+logger = Logger()
+
+
+def batched(iterable, size):
+    """
+    Yield lists of up to size items from iterable. If the iterable fails,
+    the items read so far are yielded before the error is raised.
+    """
+    batch = []
+    try:
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    except Exception:
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+class JobPipeline(threading.Thread):
+    """
+    Single consumer between the scraper workers and the sinks. Workers submit
+    job batches while they scrape; the pipeline normalizes each batch,
+    appends it to its source's export files and hands the rows to the
+    DatabaseWriter. Both queues are bounded, so a worker that gets ahead of
+    the sinks blocks instead of piling jobs up in memory. Normalization,
+    export and hand-off time is booked per source on metrics; db_handoff
+    grows when the writer is holding the crawl back.
+    """
+
+    def __init__(self, exporter, writer, max_batches=8, metrics=None):
+        super().__init__(name="job-pipeline", daemon=True)
+        self.exporter = exporter
+        self.writer = writer
+        self.metrics = metrics or RunMetrics(None)
+        self.queue = queue.Queue(maxsize=max_batches)
+        self.errors = []
+
+    def submit(self, jobs, source, on_saved=None):
+        """Queue a batch; on_saved is passed on to the writer with it, and told False when the batch fails here"""
+        self.queue.put((jobs, source, on_saved))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            on_saved = None
+            try:
+                if item is None:
+                    break
+                jobs, source, on_saved = item
+                if not jobs:
+                    # Nothing to save; the callback still waits for the batches before it
+                    self.writer.submit([], source, on_saved)
+                    on_saved = None
+                    continue
+                timer = self.metrics.timer(source)
+                # Normalize once for both sinks
+                with timer.phase('normalization'):
+                    rows = build_job_rows(jobs, source)
+                with timer.phase('export'):
+                    self.exporter.write(source, [export_record(job, source, row) for job, row in zip(jobs, rows)])
+                with timer.phase('db_handoff'):
+                    self.writer.submit(rows, source, on_saved)
+                on_saved = None
+            except Exception as e:
+                logger.error(f"Could not process a batch of {len(item[0])} jobs from {item[1]}: {e}")
+                self.errors.append(e)
+            finally:
+                if on_saved:
+                    # Through the writer all the same, so callbacks keep the order of their batches
+                    self.writer.submit([], item[1], lambda saved, on_saved=on_saved: on_saved(False))
+                self.queue.task_done()
+
+    def close(self):
+        """Wait for queued batches to be handed over, stop the thread and finish the export files"""
+        self.queue.put(None)
+        self.join()
+        self.exporter.close()
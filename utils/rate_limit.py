@@ -0,0 +1,220 @@
+import re
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from utils.logger import Logger
+
+logger = Logger()
+
+# Responses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = {429, 503}
+# Titles of the challenge, captcha and block pages sites serve instead of content
+BLOCKED_TITLE = re.compile(r'just a moment|attention required|access denied|captcha|are you a robot|verify you are human|'
+                           r'too many requests|request blocked|zugriff verweigert|dostęp zablokowany', re.IGNORECASE)
+_HTML_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def host_of(url):
+    return urlsplit(url).hostname or url
+
+
+def html_title(page_html):
+    match = _HTML_TITLE.search(page_html[:65536]) if page_html else None
+    return match.group(1).strip() if match else None
+
+
+def looks_blocked(title):
+    return bool(title and BLOCKED_TITLE.search(title))
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header (delta seconds or an HTTP date), None when absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimit:
+    """Token bucket, in-flight count and current adaptive rate of one host"""
+
+    def __init__(self, host, rate, burst, max_in_flight):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'throttled': 0, 'blocked': 0, 'slow': 0, 'errors': 0, 'wait_seconds': 0.0}
+
+    def try_acquire(self, now):
+        """
+        Take a token and an in-flight slot. Returns 0 when both were taken,
+        otherwise the seconds until a token is due, or None when only a
+        finishing request can free a slot.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= self.max_in_flight:
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.in_flight += 1
+        self.stats['requests'] += 1
+        return 0
+
+    def as_dict(self):
+        return {'rate': round(self.rate, 3), 'in_flight': self.in_flight,
+                **{name: round(value, 3) if isinstance(value, float) else value for name, value in self.stats.items()}}
+
+
+class Ticket:
+    """
+    One admitted request. Report how it went with done() (or page_loaded()
+    for a browser navigation); used as a context manager it reports a plain
+    success on exit and an error when the block raises.
+    """
+
+    def __init__(self, limiter, limit):
+        self.limiter = limiter
+        self.limit = limit
+        self.started = time.monotonic()
+        self.finished = False
+
+    def done(self, status=None, blocked=False, error=False, retry_after=None):
+        if self.finished:
+            return
+        self.finished = True
+        self.limiter._finish(self.limit, time.monotonic() - self.started, status, blocked, error,
+                             retry_after_seconds(retry_after))
+
+    def page_loaded(self, entry):
+        """Report a browser page load from its PageLoadStats entry (None when it could not be read)"""
+        entry = entry or {}
+        self.done(status=entry.get('status'), blocked=bool(entry.get('challenge')) or looks_blocked(entry.get('title')))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # A generator closed mid-request was abandoned, not failed
+        self.done(error=exc_type is not None and not issubclass(exc_type, GeneratorExit))
+
+
+class RateLimiter:
+    """
+    Politeness shared by all scrapers of a run (and across the daemon's
+    runs). Every host gets a token bucket refilled at its current rate and
+    at most max_in_flight requests at once. The rate adapts AIMD style: it
+    grows by `increase` requests/s after each healthy response and is
+    multiplied by `decrease` after a 429/503, a challenge or block page, a
+    5xx, a failed request or one slower than slow_seconds. Block pages
+    pause the host for block_pause seconds, a Retry-After header for as
+    long as it asks.
+    """
+
+    def __init__(self, rate=2.0, burst=4, max_in_flight=4, min_rate=0.1, max_rate=20.0, increase=0.2, decrease=0.5,
+                 slow_seconds=10.0, block_pause=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_seconds = slow_seconds
+        self.block_pause = block_pause
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def _host(self, url):
+        host = host_of(url)
+        limit = self.hosts.get(host)
+        if limit is None:
+            limit = self.hosts[host] = HostLimit(host, self.rate, self.burst, self.max_in_flight)
+        return limit
+
+    def acquire(self, url, timer=None, page=None):
+        """Block until a request to url's host may start; the wait is booked as 'rate_limit' on timer"""
+        start = time.monotonic()
+        with self.condition:
+            limit = self._host(url)
+            while True:
+                wait = limit.try_acquire(time.monotonic())
+                if wait == 0:
+                    break
+                self.condition.wait(wait)
+        return self._admitted(limit, start, timer, page)
+
+    async def acquire_async(self, url, timer=None, page=None):
+        """acquire() for coroutines: waits on the event loop instead of blocking it"""
+        start = time.monotonic()
+        while True:
+            with self.condition:
+                limit = self._host(url)
+                wait = limit.try_acquire(time.monotonic())
+            if wait == 0:
+                break
+            # Slots are freed by other requests, so poll for those
+            await asyncio.sleep(0.05 if wait is None else wait)
+        return self._admitted(limit, start, timer, page)
+
+    def _admitted(self, limit, start, timer, page):
+        waited = time.monotonic() - start
+        with self.condition:
+            limit.stats['wait_seconds'] += waited
+        if timer is not None and waited > 0.001:
+            timer.add('rate_limit', waited, page)
+        return Ticket(self, limit)
+
+    def _finish(self, limit, elapsed, status, blocked, error, retry_after):
+        with self.condition:
+            limit.in_flight -= 1
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES or blocked:
+                limit.stats['blocked' if blocked else 'throttled'] += 1
+                pause = retry_after if retry_after is not None else self.block_pause if blocked else 0
+                limit.paused_until = max(limit.paused_until, now + pause)
+                limit.tokens = 0
+                self._slow_down(limit, now, f"{'block page' if blocked else f'HTTP {status}'}"
+                                            f"{f', pausing {pause:.0f}s' if pause else ''}")
+            elif error or (status or 0) >= 500:
+                limit.stats['errors'] += 1
+                self._slow_down(limit, now, f"HTTP {status}" if status else "request failed")
+            elif elapsed > self.slow_seconds:
+                limit.stats['slow'] += 1
+                self._slow_down(limit, now, f"{elapsed:.1f}s response")
+            elif status is None or status < 400:
+                limit.rate = min(self.max_rate, limit.rate + self.increase)
+            self.condition.notify_all()
+
+    def _slow_down(self, limit, now, reason):
+        # Requests already in flight report the same trouble; back off once per second
+        if now - limit.last_decrease < 1.0:
+            return
+        limit.last_decrease = now
+        limit.rate = max(self.min_rate, limit.rate * self.decrease)
+        logger.warning(f"Slowing down {limit.host} to {limit.rate:.2f} requests/s ({reason})")
+
+    def as_dict(self):
+        with self.condition:
+            return {host: limit.as_dict() for host, limit in self.hosts.items()}
+
+    def summary(self):
+        return ", ".join(f"{host}: {stats['rate']:.2f}/s after {stats['requests']} requests "
+                         f"({stats['throttled']} throttled, {stats['blocked']} blocked, {stats['wait_seconds']:.1f}s waiting)"
+                         for host, stats in self.as_dict().items()) or "no requests"
@@ -0,0 +1,118 @@
+import time
+import random
+import asyncio
+from collections import Counter
+from utils.logger import Logger
+
+logger = Logger()
+
+
+def _short(error):
+    """First line of an error; WebDriver errors carry a stack trace after it"""
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    """Exponential backoff with full jitter: anywhere up to base_delay * 2**attempt, capped at max_delay"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class PageRetry:
+    """
+    Retries one page (or scroll step) of a crawl instead of giving up on the
+    whole source. A failed step is tried again after a jittered exponential
+    backoff, up to `attempts` tries in total. Before each retry the scraper's
+    recover callback is asked to escalate: 'reload' the page first and, for
+    the last retry, start a 'new_session'. Pages that still fail are kept in
+    `failed` so the scraper can try them once more at the end of its run.
+    """
+
+    def __init__(self, label, attempts=3, base_delay=1.0, max_delay=30.0, retry_on=(Exception,)):
+        self.label = label
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.failed = []
+        # Retries per page, so flaky pages show up in the run report
+        self.page_retries = Counter()
+        self.stats = {'retries': 0, 'reloads': 0, 'new_sessions': 0, 'recovered': 0, 'failed': 0}
+
+    def escalation(self, attempt):
+        """What to do before retry number attempt + 1"""
+        return 'new_session' if self.attempts > 2 and attempt == self.attempts - 2 else 'reload'
+
+    def _before_retry(self, position, attempt, error, recover):
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        level = self.escalation(attempt)
+        # Without a recover callback (plain HTTP fetches) a retry is just the same request again
+        action = f"{level.replace('_', ' ')} and retry" if recover else "retry"
+        logger.warning(f"{self.label}: page {position} failed ({_short(error)}), "
+                       f"{action} {attempt + 1}/{self.attempts - 1} in {delay:.1f}s")
+        self.stats['retries'] += 1
+        if recover:
+            self.stats['reloads' if level == 'reload' else 'new_sessions'] += 1
+        self.page_retries[position] += 1
+        return delay, level
+
+    def _recover(self, recover, level, position):
+        if not recover:
+            return
+        try:
+            recover(level)
+        except self.retry_on as e:
+            # The next attempt will most likely fail too and escalate further
+            logger.warning(f"{self.label}: {level.replace('_', ' ')} before retrying page {position} failed: {_short(e)}")
+
+    def call(self, position, step, recover=None):
+        """Run step() for a page until it succeeds or attempts run out; the last error is raised"""
+        for attempt in range(self.attempts):
+            try:
+                result = step()
+            except self.retry_on as e:
+                if attempt == self.attempts - 1:
+                    raise
+                delay, level = self._before_retry(position, attempt, e, recover)
+                time.sleep(delay)
+                self._recover(recover, level, position)
+                continue
+            if attempt:
+                self.stats['recovered'] += 1
+            return result
+
+    async def call_async(self, position, step, recover=None):
+        """call() for coroutines: step is a coroutine function, recover a plain callable"""
+        for attempt in range(self.attempts):
+            try:
+                result = await step()
+            except self.retry_on as e:
+                if attempt == self.attempts - 1:
+                    raise
+                delay, level = self._before_retry(position, attempt, e, recover)
+                await asyncio.sleep(delay)
+                self._recover(recover, level, position)
+                continue
+            if attempt:
+                self.stats['recovered'] += 1
+            return result
+
+    def page_failed(self, position, error):
+        logger.error(f"{self.label}: giving up on page {position} for now: {_short(error)}")
+        self.stats['failed'] += 1
+        self.failed.append(position)
+
+    def page_recovered(self, position):
+        logger.info(f"{self.label}: page {position} succeeded on the end-of-run retry")
+        self.stats['recovered'] += 1
+
+    def take_failed(self):
+        """The pages that failed so far, for the end-of-run retry; call page_failed() again for those that still fail"""
+        failed, self.failed = self.failed, []
+        if failed:
+            logger.info(f"{self.label}: retrying {len(failed)} failed page(s): {failed}")
+        return failed
+
+    def as_dict(self):
+        return {**self.stats, 'failed_pages': list(self.failed),
+                'page_retries': {str(position): count for position, count in self.page_retries.items()}}
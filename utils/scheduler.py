@@ -0,0 +1,204 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.logger import Logger
+
+logger = Logger()
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """Seconds from "90", "90s", "15m", "6h" or "1d" """
+    text = str(text).strip().lower()
+    unit = _DURATION_UNITS.get(text[-1:])
+    try:
+        seconds = float(text[:-1]) * unit if unit else float(text)
+    except ValueError:
+        raise ValueError(f"Invalid duration {text!r}, expected e.g. 90, 15m, 6h or 1d")
+    if seconds < 0:
+        raise ValueError(f"Invalid duration {text!r}, must not be negative")
+    return seconds
+
+
+def parse_intervals(values, sources):
+    """
+    Map each source to its run interval in seconds from values like
+    ["24h", "third_page=6h"]. A bare interval applies to every source not
+    named explicitly.
+    """
+    default = None
+    intervals = {}
+    for value in values:
+        source, separator, duration = value.rpartition('=')
+        if not separator:
+            default = parse_duration(duration)
+        elif source not in sources:
+            raise ValueError(f"--every names {source}, which is not being scraped ({', '.join(sources)})")
+        else:
+            intervals[source] = parse_duration(duration)
+    missing = [source for source in sources if source not in intervals]
+    if missing and default is None:
+        raise ValueError(f"No interval for {', '.join(missing)}; add a bare interval such as 24h")
+    return {source: intervals.get(source, default) for source in sources}
+
+
+def _timestamp(value):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(value)) if value else None
+
+
+class SourceSchedule:
+    """
+    When one source runs next and how its runs went. Each run is followed by
+    the next one interval seconds after it started, plus up to jitter
+    seconds at random so sources do not hit their sites in lockstep.
+    """
+
+    def __init__(self, source, interval, jitter=0.0):
+        self.source = source
+        self.interval = interval
+        self.jitter = jitter
+        self.next_run = time.time() + random.uniform(0, jitter)
+        self.running_since = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+
+    def due(self, now):
+        return self.running_since is None and self.next_run <= now
+
+    def started(self, now):
+        self.running_since = now
+
+    def finished(self, now, summary, error=None):
+        started_at, self.running_since = self.running_since, None
+        self.runs += 1
+        if error or summary.get('failed_tasks') or summary.get('failed_batches'):
+            self.failures += 1
+        self.last_run = {
+            'started_at': _timestamp(started_at),
+            'finished_at': _timestamp(now),
+            'duration_seconds': round(now - started_at, 3),
+            'error': str(error) if error else None,
+            **summary,
+        }
+        # A run that overran its interval is followed straight away
+        self.next_run = max(started_at + self.interval, now) + random.uniform(0, self.jitter)
+
+    def as_dict(self):
+        return {
+            'state': 'running' if self.running_since else 'idle',
+            'running_since': _timestamp(self.running_since),
+            'interval_seconds': self.interval,
+            'next_run_at': _timestamp(self.next_run),
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_run': self.last_run,
+        }
+
+
+class Scheduler:
+    """
+    Long-running loop that starts run_source(source) whenever a source is due,
+    each in its own thread. A source is never started again while its last
+    run is still going, and an exception in one source's run is recorded on
+    its schedule without affecting the others. run_source returns a summary
+    dict (jobs, saved counts, failures) that is kept as the last run.
+    """
+
+    def __init__(self, run_source, schedules, poll_interval=1.0):
+        self.run_source = run_source
+        self.schedules = {schedule.source: schedule for schedule in schedules}
+        self.poll_interval = poll_interval
+        self.started_at = time.time()
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.threads = {}
+
+    def run_forever(self):
+        """Start due sources until stop() is called, then wait for the running ones to finish"""
+        logger.info(f"Scheduler started for {', '.join(self.schedules)}")
+        while not self.stopping.is_set():
+            now = time.time()
+            with self.lock:
+                due = [schedule for schedule in self.schedules.values() if schedule.due(now)]
+                for schedule in due:
+                    schedule.started(now)
+            for schedule in due:
+                thread = threading.Thread(target=self._run, args=(schedule,), name=f"schedule-{schedule.source}",
+                                          daemon=True)
+                self.threads[schedule.source] = thread
+                thread.start()
+            with self.lock:
+                next_run = min(schedule.next_run for schedule in self.schedules.values())
+            self.stopping.wait(min(self.poll_interval, max(0.0, next_run - time.time())))
+
+        running = [thread for thread in self.threads.values() if thread.is_alive()]
+        if running:
+            logger.info(f"Waiting for {len(running)} running source(s) to finish...")
+        for thread in running:
+            thread.join()
+        logger.info("Scheduler stopped")
+
+    def _run(self, schedule):
+        logger.info(f"Scheduled run of {schedule.source} starting")
+        summary, error = {}, None
+        try:
+            summary = self.run_source(schedule.source) or {}
+        except Exception as e:
+            logger.error(f"Scheduled run of {schedule.source} failed: {e}")
+            error = e
+        with self.lock:
+            schedule.finished(time.time(), summary, error)
+            next_run = schedule.next_run
+        logger.info(f"Next run of {schedule.source} at {_timestamp(next_run)}")
+
+    def stop(self):
+        self.stopping.set()
+
+    def status(self):
+        with self.lock:
+            return {
+                'started_at': _timestamp(self.started_at),
+                'uptime_seconds': round(time.time() - self.started_at, 3),
+                'stopping': self.stopping.is_set(),
+                'sources': {source: schedule.as_dict() for source, schedule in self.schedules.items()},
+            }
+
+
+class StatusServer(threading.Thread):
+    """
+    Local HTTP endpoint with the scheduler's status as JSON: GET /status (or
+    /) returns every source's state, next run and last run with its
+    duration and counts.
+    """
+
+    def __init__(self, scheduler, host='127.0.0.1', port=8787):
+        super().__init__(name="status-server", daemon=True)
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/status'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(scheduler.status(), indent=2, ensure_ascii=False, default=str).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Status request from {self.client_address[0]}: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), StatusHandler)
+        self.address = f"http://{host}:{self.server.server_address[1]}/status"
+
+    def run(self):
+        self.server.serve_forever()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,167 @@
+import time
+from collections import defaultdict
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, JavascriptException
+)
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# Raised while the page is mid-render or mid-navigation; keep polling on these
+_TRANSIENT_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException, JavascriptException)
+
+# Default timeout (seconds) per named wait; callers can override per call
+DEFAULT_TIMEOUTS = {
+    'page_load': 15,
+    'new_cards': 2,
+    'offers_replaced': 15,
+    'network_idle': 5,
+    'cookie_banner': 5,
+    'json_batch': 5,
+}
+
+_MAX_DATA_INDEX_SCRIPT = """
+let max = -1;
+for (const element of document.querySelectorAll('[data-index]')) {
+    const index = parseInt(element.getAttribute('data-index'), 10);
+    if (!Number.isNaN(index) && index > max) max = index;
+}
+return max;
+"""
+
+_FIRST_ATTRIBUTE_SCRIPT = """
+const element = document.querySelector(arguments[0]);
+return element ? element.getAttribute(arguments[1]) : null;
+"""
+
+# Installs a MutationObserver once per document and reports whether neither the
+# DOM nor the list of finished resource requests has changed for quietMs.
+_NETWORK_IDLE_SCRIPT = """
+const quietMs = arguments[0];
+const now = performance.now();
+let probe = window.__crawlerIdleProbe;
+if (!probe) {
+    probe = window.__crawlerIdleProbe = {
+        lastChange: now,
+        resources: performance.getEntriesByType('resource').length
+    };
+    new MutationObserver(() => { probe.lastChange = performance.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+}
+const resources = performance.getEntriesByType('resource').length;
+if (resources !== probe.resources) {
+    probe.resources = resources;
+    probe.lastChange = now;
+}
+return document.readyState === 'complete' && now - probe.lastChange >= quietMs;
+"""
+
+_CAPTURED_COUNT_SCRIPT = "return window.__crawlerCapture ? window.__crawlerCapture.length : 0;"
+
+
+def new_data_index_beyond(last_index):
+    """A [data-index] element with an index greater than last_index is in the DOM"""
+    def condition(driver):
+        max_index = driver.execute_script(_MAX_DATA_INDEX_SCRIPT)
+        return max_index > last_index
+    return condition
+
+
+def first_attribute(driver, css_selector, attribute):
+    """Attribute of the first element matching css_selector, or None"""
+    return driver.execute_script(_FIRST_ATTRIBUTE_SCRIPT, css_selector, attribute)
+
+
+def offer_list_replaced(css_selector, attribute, previous_value):
+    """
+    The first element of a list now carries a different identifying attribute,
+    i.e. pagination has swapped in the next page. Works whether the framework
+    replaces the nodes or re-renders them in place.
+    """
+    def condition(driver):
+        value = first_attribute(driver, css_selector, attribute)
+        return value is not None and value != previous_value
+    return condition
+
+
+def captured_responses():
+    """The network capture hook holds at least one undrained JSON response"""
+    def condition(driver):
+        return driver.execute_script(_CAPTURED_COUNT_SCRIPT) > 0
+    return condition
+
+
+def network_idle(quiet_ms=500):
+    """No DOM mutations and no newly finished requests for quiet_ms"""
+    def condition(driver):
+        return driver.execute_script(_NETWORK_IDLE_SCRIPT, quiet_ms)
+    return condition
+
+
+class Waiter:
+    """
+    Runs named wait conditions against a driver and records how long each
+    wait actually took, so dead time shows up in the run summary instead of
+    hiding in fixed sleeps.
+    """
+
+    def __init__(self, driver, timeouts=None, poll_frequency=0.1, timer=None):
+        self.driver = driver
+        # Optional PhaseTimer; all waits are also booked under its 'wait' phase
+        self.timer = timer
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.poll_frequency = poll_frequency
+        self.timings = defaultdict(list)
+        self.timeouts_hit = defaultdict(int)
+
+    def until(self, name, condition, timeout=None, required=True):
+        """
+        Wait for condition under a name. Returns the condition's value, or
+        None when an optional (required=False) wait times out.
+        """
+        timeout = timeout if timeout is not None else self.timeouts.get(name, 10)
+        start = time.perf_counter()
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency,
+                                 ignored_exceptions=_TRANSIENT_EXCEPTIONS).until(condition)
+        except TimeoutException:
+            self.timeouts_hit[name] += 1
+            if required:
+                raise
+            return None
+        finally:
+            duration = time.perf_counter() - start
+            self.timings[name].append(duration)
+            if self.timer:
+                self.timer.add('wait', duration)
+
+    def for_element(self, name, locator, timeout=None, required=True):
+        return self.until(name, EC.presence_of_element_located(locator), timeout, required)
+
+    def for_new_cards(self, last_index, timeout=None):
+        return self.until('new_cards', new_data_index_beyond(last_index), timeout, required=False)
+
+    def for_offer_list_replaced(self, css_selector, attribute, previous_value, timeout=None):
+        return self.until('offers_replaced', offer_list_replaced(css_selector, attribute, previous_value), timeout)
+
+    def for_captured_responses(self, timeout=None, required=False):
+        return self.until('json_batch', captured_responses(), timeout, required)
+
+    def for_network_idle(self, quiet_ms=500, timeout=None):
+        return self.until('network_idle', network_idle(quiet_ms), timeout, required=False)
+
+    def total_time(self):
+        return sum(sum(durations) for durations in self.timings.values())
+
+    def as_dict(self):
+        return {name: {'seconds': round(sum(durations), 4), 'count': len(durations),
+                       'max_seconds': round(max(durations), 4), 'timeouts': self.timeouts_hit[name]}
+                for name, durations in self.timings.items()}
+
+    def summary(self):
+        parts = []
+        for name, durations in self.timings.items():
+            part = f"{name}: {len(durations)} waits, {sum(durations):.2f}s total, {max(durations):.2f}s max"
+            if self.timeouts_hit[name]:
+                part += f", {self.timeouts_hit[name]} timed out"
+            parts.append(part)
+        return "; ".join(parts) if parts else "no waits"
@@ -0,0 +1,245 @@
+import os
+import socket
+import threading
+import psycopg2
+from psycopg2.extras import Json, execute_values
+from utils.db import borrow_connection
+from utils.db_writer import TRANSIENT_ERRORS
+from utils.logger import Logger
+
+logger = Logger()
+
+# Give up on tasks whose last allowed attempt died with its worker
+_GIVE_UP_EXPIRED = """
+UPDATE crawl_tasks
+SET status = 'failed', finished_at = now(), lease_until = NULL,
+    error = coalesce(error, 'lease of ' || worker || ' expired')
+WHERE crawl_id = %(crawl_id)s AND status = 'running' AND lease_until < now() AND attempts >= max_attempts
+"""
+
+# Take the oldest open task nobody else is claiming right now: a pending one,
+# or a running one whose worker stopped renewing its lease. Rows locked by a
+# concurrent claim are skipped instead of waited for.
+_CLAIM = """
+WITH next AS (
+    SELECT id, status AS previous_status, worker AS previous_worker
+    FROM crawl_tasks
+    WHERE crawl_id = %(crawl_id)s
+      AND (status = 'pending' OR (status = 'running' AND lease_until < now()))
+      AND attempts < max_attempts
+    ORDER BY id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE crawl_tasks t
+SET status = 'running', worker = %(worker)s, attempts = t.attempts + 1, started_at = now(),
+    heartbeat_at = now(), lease_until = now() + make_interval(secs => %(lease)s)
+FROM next
+WHERE t.id = next.id
+RETURNING t.id, t.source, t.label, t.payload, t.attempts, t.max_attempts, next.previous_status, next.previous_worker
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ClaimedTask:
+    """A task this worker holds the lease on"""
+
+    def __init__(self, task_id, source, label, payload, attempts, max_attempts):
+        self.id = task_id
+        self.source = source
+        self.label = label
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+
+
+class WorkQueue:
+    """
+    Page-level tasks of one crawl in the crawl_tasks table, shared by any
+    number of worker processes on any number of machines. claim() takes
+    the next open task with FOR UPDATE SKIP LOCKED, so concurrent workers
+    never get the same one, and leases it for `lease` seconds. A heartbeat
+    thread renews the leases of the tasks still held; when a worker dies
+    its leases run out and the tasks are claimed again by someone else, up
+    to max_attempts times. Tasks are identified by (crawl_id, label), so
+    enqueueing the same task twice is a no-op and every worker can seed the
+    crawl. Jobs are saved idempotently through job_keys, so a task that is
+    run again after a lost lease does not duplicate anything.
+    """
+
+    def __init__(self, pool, crawl_id, worker_id=None, lease=120.0, max_attempts=3):
+        self.pool = pool
+        self.crawl_id = crawl_id
+        self.worker_id = worker_id or default_worker_id()
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.held = {}
+        self.lock = threading.Lock()
+        # stop() only ends claiming; leases are renewed until close()
+        self.stop_requested = threading.Event()
+        self.closing = threading.Event()
+        self.heartbeat = threading.Thread(target=self._heartbeat, name="queue-heartbeat", daemon=True)
+        self.stats = {'enqueued': 0, 'claimed': 0, 'reclaimed': 0, 'done': 0, 'retried': 0, 'failed': 0,
+                      'lost': 0}
+
+    def _execute(self, query, params=None, values=None):
+        """Run one statement in its own transaction; returns (rows, rowcount)"""
+        connection = borrow_connection(self.pool)
+        try:
+            with connection.cursor() as cursor:
+                if values is not None:
+                    rows = execute_values(cursor, query, values, fetch=True)
+                else:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall() if cursor.description else []
+                rowcount = cursor.rowcount
+            connection.commit()
+        except TRANSIENT_ERRORS:
+            self.pool.putconn(connection, close=True)
+            raise
+        except Exception:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                # The connection broke with the statement; don't hand it out again
+                self.pool.putconn(connection, close=True)
+            else:
+                self.pool.putconn(connection)
+            raise
+        self.pool.putconn(connection)
+        return rows, rowcount
+
+    def start(self):
+        self.heartbeat.start()
+        return self
+
+    def enqueue(self, tasks):
+        """Add (source, label, payload) tasks; ones already in the crawl are left alone. Returns how many were new"""
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+        rows, _ = self._execute("""
+        INSERT INTO crawl_tasks (crawl_id, source, label, payload, max_attempts) VALUES %s
+        ON CONFLICT (crawl_id, label) DO NOTHING
+        RETURNING id
+        """, values=[(self.crawl_id, source, label, Json(payload), self.max_attempts)
+                     for source, label, payload in tasks])
+        with self.lock:
+            self.stats['enqueued'] += len(rows)
+        if rows:
+            logger.info(f"Queued {len(rows)} new task(s) for crawl {self.crawl_id}")
+        return len(rows)
+
+    def claim(self):
+        """Lease the next open task, or None when there is none (or stop() was called)"""
+        if self.stop_requested.is_set():
+            return None
+        params = {'crawl_id': self.crawl_id, 'worker': self.worker_id, 'lease': self.lease}
+        _, given_up = self._execute(_GIVE_UP_EXPIRED, params)
+        if given_up:
+            logger.error(f"Gave up on {given_up} task(s) of crawl {self.crawl_id} after their last attempt's "
+                         f"worker stopped responding")
+        rows, _ = self._execute(_CLAIM, params)
+        if not rows:
+            return None
+        task_id, source, label, payload, attempts, max_attempts, previous_status, previous_worker = rows[0]
+        task = ClaimedTask(task_id, source, label, payload, attempts, max_attempts)
+        with self.lock:
+            self.held[task_id] = task
+            self.stats['claimed'] += 1
+            if previous_status == 'running':
+                self.stats['reclaimed'] += 1
+        if previous_status == 'running':
+            logger.warning(f"Reclaimed {label} from {previous_worker}, whose lease expired "
+                           f"(attempt {attempts}/{max_attempts})")
+        return task
+
+    def complete(self, task, jobs=0):
+        """Mark a held task done; a task whose lease was lost meanwhile belongs to its new worker"""
+        _, updated = self._execute("""
+        UPDATE crawl_tasks SET status = 'done', jobs = %s, error = NULL, finished_at = now(), lease_until = NULL
+        WHERE id = %s AND worker = %s AND status = 'running'
+        """, (jobs, task.id, self.worker_id))
+        with self.lock:
+            self.held.pop(task.id, None)
+            self.stats['done' if updated else 'lost'] += 1
+        if not updated:
+            logger.warning(f"{task.label} finished after its lease was taken over; its jobs were saved anyway "
+                           f"and are not duplicated")
+
+    def fail(self, task, error):
+        """Give a held task back for another attempt, or mark it failed once it has used them all"""
+        rows, _ = self._execute("""
+        UPDATE crawl_tasks
+        SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+            error = %s, lease_until = NULL,
+            finished_at = CASE WHEN attempts >= max_attempts THEN now() END
+        WHERE id = %s AND worker = %s AND status = 'running'
+        RETURNING status
+        """, (str(error)[:2000], task.id, self.worker_id))
+        status = rows[0][0] if rows else None
+        with self.lock:
+            self.held.pop(task.id, None)
+            self.stats[{'pending': 'retried', 'failed': 'failed'}.get(status, 'lost')] += 1
+        if status == 'pending':
+            logger.warning(f"{task.label} failed (attempt {task.attempts}/{task.max_attempts}), back in the queue")
+        elif status == 'failed':
+            logger.error(f"{task.label} failed for good after {task.attempts} attempt(s): {error}")
+
+    def _heartbeat(self):
+        while not self.closing.wait(self.lease / 3):
+            with self.lock:
+                task_ids = list(self.held)
+            if not task_ids:
+                continue
+            try:
+                rows, _ = self._execute("""
+                UPDATE crawl_tasks SET lease_until = now() + make_interval(secs => %s), heartbeat_at = now()
+                WHERE id = ANY(%s) AND worker = %s AND status = 'running'
+                RETURNING id
+                """, (self.lease, task_ids, self.worker_id))
+            except psycopg2.Error as e:
+                # The leases run out if this keeps failing, and the tasks go to other workers
+                logger.warning(f"Could not renew the leases of {len(task_ids)} task(s): {e}")
+                continue
+            renewed = {row[0] for row in rows}
+            for task_id in task_ids:
+                if task_id in renewed:
+                    continue
+                with self.lock:
+                    task = self.held.get(task_id)
+                if task:
+                    logger.warning(f"Lost the lease on {task.label}; another worker may be running it")
+
+    def counts(self):
+        """Tasks of the crawl by status"""
+        rows, _ = self._execute("SELECT status, count(*) FROM crawl_tasks WHERE crawl_id = %s GROUP BY status",
+                                (self.crawl_id,))
+        return {status: count for status, count in rows}
+
+    def finished(self):
+        """True once no task of the crawl is pending or running anywhere"""
+        counts = self.counts()
+        return not counts.get('pending') and not counts.get('running')
+
+    def stop(self):
+        self.stop_requested.set()
+
+    def close(self):
+        self.closing.set()
+        if self.heartbeat.is_alive():
+            self.heartbeat.join()
+        with self.lock:
+            held = list(self.held.values())
+        for task in held:
+            # Still held after the run, e.g. its jobs could not be handed over; let another worker retry it
+            self.fail(task, "worker shut down before the task was saved")
+        logger.info(f"Work queue {self.crawl_id} ({self.worker_id}): "
+                    f"{', '.join(f'{name}={value}' for name, value in self.stats.items())}")
+
+    def as_dict(self):
+        with self.lock:
+            return {'crawl_id': self.crawl_id, 'worker': self.worker_id, **self.stats}